@@ -89,6 +89,21 @@ class PostAdmin(admin.ModelAdmin):
 class InboxItemAdmin(admin.ModelAdmin):
     list_display = ('id', 'object_id', 'content_type')
 
+class RemotePostAdmin(admin.ModelAdmin):
+    list_display = ('fqid', 'host', 'visibility', 'status', 'published', 'last_fetched')
+    search_fields = ('fqid', 'author_fqid')
+    list_filter = ('status', 'visibility')
+
+class RemoteAuthorAdmin(admin.ModelAdmin):
+    list_display = ('fqid', 'key', 'node', 'listed', 'status', 'last_fetched')
+    search_fields = ('fqid', 'key')
+    list_filter = ('status', 'listed', 'node')
+
+class OutboxDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('activity_type', 'url', 'status', 'attempts', 'last_status_code', 'next_attempt_at', 'created_at')
+    search_fields = ('url', 'host')
+    list_filter = ('status', 'activity_type', 'host')
+
 class LikeAdmin(admin.ModelAdmin):
     list_display = ('uuid', 'post', 'get_user_display_name')
 
@@ -189,4 +204,7 @@ admin.site.register(Inbox)
 admin.site.register(InboxItem, InboxItemAdmin)
 admin.site.register(SiteConfiguration, SiteConfigurationAdmin)
 admin.site.register(Share, ShareAdmin)
+admin.site.register(RemotePost, RemotePostAdmin)
+admin.site.register(OutboxDelivery, OutboxDeliveryAdmin)
+admin.site.register(RemoteAuthor, RemoteAuthorAdmin)
 
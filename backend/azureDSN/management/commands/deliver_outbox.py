@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ...utils.outbox import deliver_due, requeue_dead
+import time
+
+
+class Command(BaseCommand):
+    help = "Send the activities queued for remote inboxes, and their retries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Maximum number of deliveries sent per run")
+        parser.add_argument("--loop", action="store_true", help="Keep running, checking for due deliveries every OUTBOX_POLL_INTERVAL seconds")
+        parser.add_argument("--requeue-dead", action="store_true", help="Give the dead deliveries a new set of attempts first")
+        parser.add_argument("--host", default=None, help="With --requeue-dead, only requeue the deliveries to this node")
+
+    def handle(self, *args, **options):
+        if options["requeue_dead"]:
+            requeued = requeue_dead(options["host"])
+            self.stdout.write(f"Requeued {requeued} dead delivery(ies)")
+
+        while True:
+            counts = deliver_due(options["limit"])
+            if counts:
+                summary = ", ".join(f"{count} {delivery_status}" for delivery_status, count in sorted(counts.items()))
+                self.stdout.write(self.style.SUCCESS(f"Sent {sum(counts.values())} delivery(ies): {summary}"))
+
+            if not options["loop"]:
+                break
+            if not counts:
+                time.sleep(settings.OUTBOX_POLL_INTERVAL)
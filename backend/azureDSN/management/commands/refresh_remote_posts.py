@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from ...utils.remote_posts import refresh_stale_remote_posts
+
+
+class Command(BaseCommand):
+    help = "Refetch stale remote posts from their origin nodes into the RemotePost cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-age", type=int, default=None, help="Seconds before a cached post is considered stale")
+        parser.add_argument("--limit", type=int, default=None, help="Maximum number of posts to refresh")
+        parser.add_argument("--all", action="store_true", help="Refresh every cached post regardless of age")
+
+    def handle(self, *args, **options):
+        max_age = 0 if options["all"] else options["max_age"]
+        refreshed = refresh_stale_remote_posts(max_age=max_age, limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} remote post(s)"))
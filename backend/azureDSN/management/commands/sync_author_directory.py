@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from ...utils.author_directory import sync_stale_nodes
+
+
+class Command(BaseCommand):
+    help = "Copy the authors of the remote nodes into the federated author directory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-age", type=int, default=None, help="Seconds before a node is synced again")
+        parser.add_argument("--all", action="store_true", help="Sync every node regardless of its last sync")
+
+    def handle(self, *args, **options):
+        max_age = 0 if options["all"] else options["max_age"]
+        for node, listed in sync_stale_nodes(max_age=max_age).items():
+            if listed is None:
+                self.stdout.write(self.style.WARNING(f"Failed to sync the authors of {node.host}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Synced {listed} author(s) of {node.host}"))
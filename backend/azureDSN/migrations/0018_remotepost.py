@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0017_alter_comment_post'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemotePost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fqid', models.CharField(max_length=500, unique=True)),
+                ('author_fqid', models.CharField(blank=True, max_length=500)),
+                ('host', models.CharField(blank=True, max_length=255)),
+                ('visibility', models.CharField(default='PUBLIC', max_length=10)),
+                ('body', models.JSONField(default=dict)),
+                ('published', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_fetched', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ok', 'OK'), ('failed', 'Failed'), ('deleted', 'Deleted')], default='pending', max_length=10)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['visibility', 'status', '-published'], name='remotepost_stream_idx'), models.Index(fields=['last_fetched'], name='remotepost_fetched_idx')],
+            },
+        ),
+    ]
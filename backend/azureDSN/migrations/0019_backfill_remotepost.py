@@ -0,0 +1,50 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:12
+
+from django.db import migrations
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Fill the remote post cache from the remote posts already sitting in the inboxes, oldest first so updates win
+def backfill_remote_posts(apps, schema_editor):
+    InboxItem = apps.get_model('azureDSN', 'InboxItem')
+    RemotePost = apps.get_model('azureDSN', 'RemotePost')
+
+    remote_posts = {}
+    for item in InboxItem.objects.filter(remote_payload__isnull=False).order_by('time'):
+        payload = item.remote_payload
+        if not isinstance(payload, dict) or str(payload.get('type', '')).lower() != 'post' or not payload.get('id'):
+            continue
+
+        post_status = (item.post_status or '').lower()
+        if post_status in ['edited', 'update-old']:
+            continue
+
+        visibility = str(payload.get('visibility', 'PUBLIC')).upper()
+        published = None
+        try:
+            published = parse_datetime(str(payload.get('published') or ''))
+        except ValueError:
+            pass
+        if published and timezone.is_naive(published):
+            published = timezone.make_aware(published)
+
+        remote_posts[payload['id']] = RemotePost(
+            fqid=payload['id'],
+            author_fqid=(payload.get('author') or {}).get('id', ''),
+            host=(payload.get('author') or {}).get('host', ''),
+            visibility=visibility,
+            body=payload,
+            published=published or item.time,
+            status='deleted' if visibility == 'DELETED' or post_status == 'delete' else 'pending',
+        )
+
+    RemotePost.objects.bulk_create(remote_posts.values(), batch_size=500, ignore_conflicts=True)
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('azureDSN', '0018_remotepost'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_remote_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0019_backfill_remotepost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['visibility', '-modified_at', '-uuid'], name='post_stream_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-17 19:02
+
+from django.conf import settings
+from django.db import migrations
+from urllib.parse import urljoin
+
+def base_host(url):
+    return urljoin(url, '/').rstrip('/').strip().lower() if url else ''
+
+# Fill item_type and origin_host of the existing inbox items, same rules as inbox_item.describe_item
+def backfill_type_and_origin(apps, schema_editor):
+    InboxItem = apps.get_model('azureDSN', 'InboxItem')
+    FollowRequest = apps.get_model('azureDSN', 'FollowRequest')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    model_names = dict(ContentType.objects.values_list('id', 'model'))
+    item_types = {'post': 'post', 'comment': 'comment', 'like': 'like', 'followrequest': 'follow', 'share': 'share'}
+
+    items = list(InboxItem.objects.filter(item_type=''))
+    # Follow requests have integer ids, stored in the object_id UUID column as UUID(int=id)
+    follow_ids = [item.object_id.int for item in items if item.object_id and model_names.get(item.content_type_id) == 'followrequest']
+    actors = {follow.id: follow.actor for follow in FollowRequest.objects.filter(id__in=follow_ids)}
+
+    for item in items:
+        if item.content_type_id:
+            item.item_type = item_types.get(model_names.get(item.content_type_id), '')
+            if item.item_type == 'follow':
+                item.origin_host = base_host((actors.get(item.object_id.int if item.object_id else None) or {}).get('id'))
+            else:
+                item.origin_host = base_host(settings.BASE_URL)
+        elif isinstance(item.remote_payload, dict):
+            item.item_type = str(item.remote_payload.get('type', '')).lower()[:10]
+            if item.item_type == 'follow':
+                item.origin_host = base_host((item.remote_payload.get('actor') or {}).get('id'))
+            else:
+                item.origin_host = base_host(item.remote_payload.get('id'))
+
+    InboxItem.objects.bulk_update(items, ['item_type', 'origin_host'], batch_size=500)
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('azureDSN', '0021_inboxitem_type_origin'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_type_and_origin, migrations.RunPython.noop),
+    ]
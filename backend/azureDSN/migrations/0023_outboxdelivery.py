@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:24
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0022_backfill_inboxitem_type_origin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxDelivery',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('activity_type', models.CharField(max_length=10)),
+                ('method', models.CharField(default='POST', max_length=10)),
+                ('url', models.URLField(max_length=500)),
+                ('host', models.CharField(max_length=255)),
+                ('payload', models.JSONField(default=dict)),
+                ('precondition_url', models.URLField(blank=True, default='', max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('delivered', 'Delivered'), ('skipped', 'Skipped'), ('dead', 'Dead')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_status_code', models.PositiveIntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx')],
+            },
+        ),
+    ]
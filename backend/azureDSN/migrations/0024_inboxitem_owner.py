@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-17 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0023_outboxdelivery'),
+    ]
+
+    operations = [
+        # Temporary name while Inbox.items is still the many-to-many, renamed to inbox in 0026
+        migrations.AddField(
+            model_name='inboxitem',
+            name='owner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='azureDSN.inbox'),
+        ),
+    ]
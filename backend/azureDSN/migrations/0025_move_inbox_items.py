@@ -0,0 +1,58 @@
+# Generated by Django 5.1.1 on 2026-10-17 20:10
+
+from collections import defaultdict
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# Give every inbox item the inbox that links to it in the many-to-many table
+def move_items_to_owner(apps, schema_editor):
+    Inbox = apps.get_model('azureDSN', 'Inbox')
+    InboxItem = apps.get_model('azureDSN', 'InboxItem')
+    Link = Inbox.items.through
+
+    owners = {}
+    extra_links = []
+    for inbox_id, item_id in Link.objects.order_by('id').values_list('inbox_id', 'inboxitem_id').iterator():
+        if item_id in owners:
+            extra_links.append((inbox_id, item_id))
+        else:
+            owners[item_id] = inbox_id
+
+    items_by_inbox = defaultdict(list)
+    for item_id, inbox_id in owners.items():
+        items_by_inbox[inbox_id].append(item_id)
+    for inbox_id, item_ids in items_by_inbox.items():
+        for start in range(0, len(item_ids), BATCH_SIZE):
+            InboxItem.objects.filter(pk__in=item_ids[start:start + BATCH_SIZE]).update(owner_id=inbox_id)
+
+    # An item linked to several inboxes becomes one item per inbox
+    for inbox_id, item_id in extra_links:
+        item = InboxItem.objects.get(pk=item_id)
+        item.pk = None
+        item.owner_id = inbox_id
+        item.save()
+
+    # Items in no inbox were never shown to anyone
+    InboxItem.objects.filter(owner__isnull=True).delete()
+
+def move_items_to_links(apps, schema_editor):
+    Inbox = apps.get_model('azureDSN', 'Inbox')
+    InboxItem = apps.get_model('azureDSN', 'InboxItem')
+    Link = Inbox.items.through
+
+    Link.objects.bulk_create(
+        [Link(inbox_id=inbox_id, inboxitem_id=item_id) for item_id, inbox_id in InboxItem.objects.values_list('id', 'owner_id')],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0024_inboxitem_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_items_to_owner, move_items_to_links),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-17 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0025_move_inbox_items'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='inbox',
+            name='items',
+        ),
+        migrations.RemoveIndex(
+            model_name='inboxitem',
+            name='inboxitem_time_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='inboxitem',
+            name='inboxitem_type_time_idx',
+        ),
+        migrations.RenameField(
+            model_name='inboxitem',
+            old_name='owner',
+            new_name='inbox',
+        ),
+        migrations.AlterField(
+            model_name='inboxitem',
+            name='inbox',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='azureDSN.inbox'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxitem',
+            index=models.Index(fields=['inbox', '-time', '-id'], name='inboxitem_inbox_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxitem',
+            index=models.Index(fields=['inbox', 'item_type', '-time'], name='inboxitem_inbox_type_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2026-10-17 21:05
+
+from django.db import migrations, models
+from azureDSN.utils import url_parser
+
+
+# Fill the remote author keys and drop the follows made twice, keeping the oldest one
+def fill_follow_keys(apps, schema_editor):
+    Follow = apps.get_model('azureDSN', 'Follow')
+
+    seen = set()
+    duplicates = []
+    for follow in Follow.objects.order_by('created_at', 'id').iterator():
+        follow.remote_follower_key = url_parser.author_key(follow.remote_follower)
+        follow.remote_followee_key = url_parser.author_key(follow.remote_followee)
+        pairs = [
+            ('local', follow.local_follower_id, follow.local_followee_id),
+            ('followee', follow.local_follower_id, follow.remote_followee_key),
+            ('follower', follow.local_followee_id, follow.remote_follower_key),
+        ]
+        pairs = [pair for pair in pairs if pair[1] is not None and pair[2] is not None]
+        if any(pair in seen for pair in pairs):
+            duplicates.append(follow.id)
+            continue
+        seen.update(pairs)
+        follow.save(update_fields=['remote_follower_key', 'remote_followee_key'])
+
+    Follow.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0026_inboxitem_inbox_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow',
+            name='remote_followee_key',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='follow',
+            name='remote_follower_key',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(fill_follow_keys, migrations.RunPython.noop),
+    ]
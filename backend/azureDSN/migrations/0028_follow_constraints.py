@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0027_follow_keys'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('local_follower', 'local_followee'), name='unique_local_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('local_follower', 'remote_followee_key'), name='unique_remote_followee'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('local_followee', 'remote_follower_key'), name='unique_remote_follower'),
+        ),
+    ]
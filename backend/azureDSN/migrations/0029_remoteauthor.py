@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0028_follow_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemoteAuthor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fqid', models.CharField(max_length=500)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('body', models.JSONField(default=dict)),
+                ('last_fetched', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('failed', 'Failed')], default='ok', max_length=10)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_fetched'], name='remoteauthor_fetched_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0029_remoteauthor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nodeuser',
+            name='authors_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='remoteauthor',
+            name='listed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='remoteauthor',
+            name='listed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='remoteauthor',
+            name='node',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='remote_authors', to='azureDSN.nodeuser'),
+        ),
+        migrations.AddIndex(
+            model_name='remoteauthor',
+            index=models.Index(fields=['listed', 'id'], name='remoteauthor_directory_idx'),
+        ),
+    ]
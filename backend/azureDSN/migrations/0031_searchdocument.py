@@ -0,0 +1,89 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:48
+
+from django.db import migrations, models
+
+TEXT_CONTENT_TYPES = ('text/plain', 'text/markdown')
+
+# SQLite: an FTS5 index over the table, kept up to date by triggers
+SQLITE_CREATE = [
+    """CREATE VIRTUAL TABLE azureDSN_searchdocument_fts USING fts5(
+        title, body, content='azureDSN_searchdocument', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER azureDSN_searchdocument_ai AFTER INSERT ON azureDSN_searchdocument BEGIN
+        INSERT INTO azureDSN_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER azureDSN_searchdocument_ad AFTER DELETE ON azureDSN_searchdocument BEGIN
+        INSERT INTO azureDSN_searchdocument_fts(azureDSN_searchdocument_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER azureDSN_searchdocument_au AFTER UPDATE ON azureDSN_searchdocument BEGIN
+        INSERT INTO azureDSN_searchdocument_fts(azureDSN_searchdocument_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO azureDSN_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS azureDSN_searchdocument_au",
+    "DROP TRIGGER IF EXISTS azureDSN_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS azureDSN_searchdocument_ai",
+    "DROP TABLE IF EXISTS azureDSN_searchdocument_fts",
+]
+
+# Postgres: a tsvector computed by the database, titles weigh more than bodies
+POSTGRES_CREATE = [
+    """ALTER TABLE "azureDSN_searchdocument" ADD COLUMN document tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED""",
+    'CREATE INDEX searchdocument_document_idx ON "azureDSN_searchdocument" USING GIN (document)',
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS searchdocument_document_idx",
+    'ALTER TABLE "azureDSN_searchdocument" DROP COLUMN IF EXISTS document',
+]
+
+def run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+def create_index(apps, schema_editor):
+    run(schema_editor, {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE})
+
+def drop_index(apps, schema_editor):
+    run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+# Index the posts and authors that already exist, the signals take over from here
+def index_existing(apps, schema_editor):
+    Post = apps.get_model('azureDSN', 'Post')
+    User = apps.get_model('azureDSN', 'User')
+    SearchDocument = apps.get_model('azureDSN', 'SearchDocument')
+
+    documents = []
+    for uuid, title, description, content_type, content in Post.objects.values_list('uuid', 'title', 'description', 'content_type', 'content').iterator():
+        text = [description or '', content or ''] if content_type in TEXT_CONTENT_TYPES else [description or '']
+        documents.append(SearchDocument(kind='post', object_id=uuid, title=title or '', body='\n'.join(text).strip()))
+    for uuid, display_name, username, bio in User.objects.filter(type='author').values_list('uuid', 'display_name', 'username', 'bio').iterator():
+        documents.append(SearchDocument(kind='author', object_id=uuid, title=f"{display_name or ''} {username or ''}".strip(), body=bio or ''))
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0030_author_directory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('author', 'Author')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('title', models.TextField(blank=True, default='')),
+                ('body', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
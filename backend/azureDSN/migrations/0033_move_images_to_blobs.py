@@ -0,0 +1,54 @@
+import base64, binascii, hashlib
+from django.db import migrations
+
+BATCH_SIZE = 100
+IMAGE_CONTENT_TYPES = {
+    'image/png;base64': 'image/png',
+    'image/jpeg;base64': 'image/jpeg',
+    'application/base64': 'application/octet-stream',
+}
+
+def decode_base64(text):
+    try:
+        data = base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return data if base64.b64encode(data).decode('ascii') == text else None
+
+# Store the base64 content of every image post as bytes in an ImageBlob, a post whose content isn't valid base64 keeps it
+def move_images_to_blobs(apps, schema_editor):
+    Post = apps.get_model('azureDSN', 'Post')
+    ImageBlob = apps.get_model('azureDSN', 'ImageBlob')
+
+    image_posts = Post.objects.filter(content_type__in=IMAGE_CONTENT_TYPES, image__isnull=True).exclude(content__isnull=True).exclude(content='')
+    post_ids = list(image_posts.values_list('uuid', flat=True))
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        # One batch of contents in memory at a time, images can be large
+        for post in Post.objects.filter(uuid__in=post_ids[start:start + BATCH_SIZE]).only('uuid', 'content_type', 'content'):
+            data = decode_base64(post.content)
+            if data is None:
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            ImageBlob.objects.get_or_create(
+                sha256=digest, defaults={'data': data, 'content_type': IMAGE_CONTENT_TYPES[post.content_type], 'size': len(data)}
+            )
+            Post.objects.filter(uuid=post.uuid).update(image_id=digest, content='')
+
+def move_blobs_to_images(apps, schema_editor):
+    Post = apps.get_model('azureDSN', 'Post')
+    ImageBlob = apps.get_model('azureDSN', 'ImageBlob')
+
+    for blob in ImageBlob.objects.iterator(chunk_size=BATCH_SIZE):
+        Post.objects.filter(image_id=blob.sha256).update(content=base64.b64encode(bytes(blob.data)).decode('ascii'), image=None)
+    ImageBlob.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0032_imageblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_images_to_blobs, move_blobs_to_images),
+    ]
@@ -0,0 +1,56 @@
+import base64, binascii, hashlib
+from django.conf import settings
+from django.db import migrations
+
+AVATAR_CONTENT_TYPES = ('image/png', 'image/jpeg', 'image/webp', 'image/gif')
+
+def parse_data_url(url):
+    header, _, text = (url or '').partition(',')
+    if not header.startswith('data:') or not header.endswith(';base64'):
+        return None
+    try:
+        data = base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return header[len('data:'):-len(';base64')], data
+
+def blob_url(digest, width=None):
+    url = f"{settings.BASE_URL.strip().rstrip('/')}/api/images/{digest}/"
+    return f"{url}?w={width}" if width else url
+
+# Store the profile pictures sent as data URLs as ImageBlobs and link to a small variant instead
+def move_profile_images_to_blobs(apps, schema_editor):
+    User = apps.get_model('azureDSN', 'User')
+    ImageBlob = apps.get_model('azureDSN', 'ImageBlob')
+
+    for user_id in User.objects.filter(profile_image__startswith='data:').values_list('uuid', flat=True):
+        profile_image = User.objects.filter(uuid=user_id).values_list('profile_image', flat=True).first()
+        image = parse_data_url(profile_image)
+        if image is None or image[0] not in AVATAR_CONTENT_TYPES:
+            continue
+        content_type, data = image
+        digest = hashlib.sha256(data).hexdigest()
+        ImageBlob.objects.get_or_create(sha256=digest, defaults={'data': data, 'content_type': content_type, 'size': len(data)})
+        User.objects.filter(uuid=user_id).update(avatar_id=digest, profile_image=blob_url(digest, settings.IMAGE_AVATAR_WIDTH))
+
+def move_blobs_to_profile_images(apps, schema_editor):
+    User = apps.get_model('azureDSN', 'User')
+    ImageBlob = apps.get_model('azureDSN', 'ImageBlob')
+
+    for user in User.objects.filter(avatar__isnull=False).select_related('avatar'):
+        if (user.profile_image or '').startswith(blob_url(user.avatar_id)):
+            user.profile_image = f"data:{user.avatar.content_type};base64,{base64.b64encode(bytes(user.avatar.data)).decode('ascii')}"
+        user.avatar = None
+        user.save(update_fields=['profile_image', 'avatar'])
+    ImageBlob.objects.filter(posts__isnull=True, avatars__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azureDSN', '0034_imagevariant'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_profile_images_to_blobs, move_blobs_to_profile_images),
+    ]
@@ -3,6 +3,8 @@ Imports all the modules so it can be imported as a module
 """
 
 from .user import User, NodeUser
+from .image_blob import ImageBlob
+from .image_variant import ImageVariant
 from .post import Post
 from .comment import Comment
 from .like import Like
@@ -11,4 +13,8 @@ from .follow_request import FollowRequest
 from .inbox import Inbox
 from .inbox_item import InboxItem
 from .site_config import SiteConfiguration
-from .share import Share
\ No newline at end of file
+from .share import Share
+from .remote_post import RemotePost
+from .outbox_delivery import OutboxDelivery
+from .remote_author import RemoteAuthor
+from .search_document import SearchDocument
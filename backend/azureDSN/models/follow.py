@@ -1,6 +1,7 @@
 from datetime import datetime
 from django.db import models
 from .user import User
+from ..utils import url_parser
 
 class Follow(models.Model):
     # unique follow ID's are generated by the database
@@ -12,6 +13,23 @@ class Follow(models.Model):
     remote_followee = models.URLField(null=True, blank=True) # must use the full URL of the followed author, for both local or remote nodes
     created_at = models.DateTimeField("date followed", default=datetime.now)
 
+    # url_parser.author_key of the remote URLs, filled on save: look remote authors up with these (equality, indexed)
+    remote_follower_key = models.CharField(max_length=255, null=True, blank=True, editable=False)
+    remote_followee_key = models.CharField(max_length=255, null=True, blank=True, editable=False)
+
+    class Meta:
+        # Each pair follows once, the constraints are also the indexes of the follow checks
+        constraints = [
+            models.UniqueConstraint(fields=["local_follower", "local_followee"], name="unique_local_follow"),
+            models.UniqueConstraint(fields=["local_follower", "remote_followee_key"], name="unique_remote_followee"),
+            models.UniqueConstraint(fields=["local_followee", "remote_follower_key"], name="unique_remote_follower"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.remote_follower_key = url_parser.author_key(self.remote_follower)
+        self.remote_followee_key = url_parser.author_key(self.remote_followee)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         follower = self.local_follower.username if self.local_follower else self.remote_follower
         followee = self.local_followee.username if self.local_followee else self.remote_followee
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.db import models
+import base64, binascii, hashlib
+
+
+'''
+The bytes of an image post, stored once per distinct image under their SHA-256.
+Image posts used to keep their image as base64 text in Post.content, a third bigger than the image itself. Now
+Post.save() moves it here and the post points to its blob (Post.image). Posts are still serialized with base64 content,
+since that is what the other nodes expect. The raw bytes are served by ImageBlobView under their digest, so browsers
+can cache them forever. Profile images sent as data URLs are stored here too (User.avatar).
+'''
+class ImageBlob(models.Model):
+    AVATAR_CONTENT_TYPES = ("image/png", "image/jpeg", "image/webp", "image/gif")
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    content_type = models.CharField(max_length=50)  # MIME type, e.g. image/png
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """String representation for the image blob (useful for admin panels)."""
+        return f"{self.sha256} ({self.content_type}, {self.size} bytes)"
+
+    @classmethod
+    def store(cls, data, content_type):
+        """
+        The blob of `data`, created if no post used these bytes before
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        blob, _ = cls.objects.get_or_create(sha256=digest, defaults={"data": data, "content_type": content_type, "size": len(data)})
+        return blob
+
+    @classmethod
+    def discard_unused(cls, *digests):
+        """
+        Delete these blobs unless a post or an author still uses them
+        """
+        cls.objects.filter(sha256__in=[digest for digest in digests if digest], posts__isnull=True, avatars__isnull=True).delete()
+
+    @staticmethod
+    def url_of(digest, width=None):
+        """
+        URL of the bytes of the blob `digest`, of its variant `width` pixels wide if given
+        """
+        url = f"{settings.BASE_URL.strip().rstrip('/')}/api/images/{digest}/"
+        return f"{url}?w={width}" if width else url
+
+    def url(self, width=None):
+        return self.url_of(self.sha256, width)
+
+    def as_base64(self):
+        return base64.b64encode(bytes(self.data)).decode("ascii")
+
+
+def decode_base64(text):
+    """
+    The bytes of base64 `text`, or None if it isn't base64 that encodes back to exactly the same text
+    """
+    try:
+        data = base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return data if base64.b64encode(data).decode("ascii") == text else None
+
+
+def parse_data_url(url):
+    """
+    (MIME type, bytes) of a base64 data URL, or None
+    """
+    header, _, text = (url or "").partition(",")
+    if not header.startswith("data:") or not header.endswith(";base64"):
+        return None
+    data = decode_base64(text)
+    return (header[len("data:"):-len(";base64")], data) if data is not None else None
@@ -0,0 +1,37 @@
+from django.db import models
+from .image_blob import ImageBlob
+
+
+'''
+A resized copy of an image, made by utils/thumbnails.py the first time a client asks for the image at that width and
+format, so lists can show small images without sending the full ones. Variants go with their image.
+'''
+class ImageVariant(models.Model):
+    FORMAT_WEBP = "webp"
+    FORMAT_JPEG = "jpeg"
+    FORMAT_PNG = "png"  # images with transparency for clients that can't show WebP
+    FORMAT_CHOICES = [
+        (FORMAT_WEBP, "WebP"),
+        (FORMAT_JPEG, "JPEG"),
+        (FORMAT_PNG, "PNG"),
+    ]
+
+    source = models.ForeignKey(ImageBlob, on_delete=models.CASCADE, related_name="variants")
+    width = models.PositiveIntegerField()  # requested width, the image itself is never wider than its source
+    format = models.CharField(choices=FORMAT_CHOICES, max_length=10)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source", "width", "format"], name="unique_image_variant"),
+        ]
+
+    def __str__(self):
+        """String representation for the image variant (useful for admin panels)."""
+        return f"{self.source_id} at {self.width}px ({self.format}, {self.size} bytes)"
+
+    @property
+    def content_type(self):
+        return f"image/{self.format}"
@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models import Case, Q, Value, When
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+from ..utils import url_parser
 from datetime import datetime
+import uuid
 
 
 '''
@@ -10,16 +14,103 @@ in our project. Using it will allow the inbox to store a generic type of one of
 Reference: https://docs.djangoproject.com/en/5.1/ref/contrib/contenttypes/ 
 Date: 12/10/2024
 '''
+class InboxItemQuerySet(models.QuerySet):
+    '''
+    Set-based operations on the versions of a post kept in the inboxes, each one is a single query whatever the number
+    of inboxes holding the post. Call them on InboxItem.objects for every inbox or on inbox.items for a single one.
+    '''
+    def of_content(self, content):
+        """
+        Items holding the model instance `content` (post, comment, like, follow request or share)
+        """
+        content_id = getattr(content, "uuid", getattr(content, "id", None))
+        return self.filter(content_type=ContentType.objects.get_for_model(content), object_id=content_id)
+
+    def of_post(self, post_id):
+        """
+        Items holding any version of the post `post_id` (its FQID), a local post by reference or a remote one by payload
+        """
+        matches = Q(remote_payload__id=str(post_id))
+        try:
+            post_uuid = uuid.UUID(url_parser.extract_uuid(str(post_id)))
+        except ValueError:
+            pass  # not one of our posts, only remote payloads can hold it
+        else:
+            post_type = ContentType.objects.get_by_natural_key(self.model._meta.app_label, "post")
+            matches |= Q(content_type=post_type, object_id=post_uuid)
+        return self.filter(matches)
+
+    def tombstone_post(self, post_id, inbox=None):
+        """
+        Remove every version of the deleted post `post_id`, but the delete notices already received (except the one of
+        `inbox`, about to receive a new one), returns the number of items removed
+        """
+        tombstones = Q(post_status="delete") & ~Q(inbox=inbox) if inbox is not None else Q(post_status="delete")
+        return self.of_post(post_id).exclude(tombstones).delete()[0]
+
+    def supersede_post(self, post_id):
+        """
+        Mark the current versions of the edited post `post_id` as edited before its new version is added, the last
+        update of a remote post becomes update-old, returns the number of items marked
+        """
+        return self.of_post(post_id).exclude(post_status__in=["delete", "edited", "update-old"]).update(
+            post_status=Case(
+                When(post_status="update", remote_payload__isnull=False, then=Value("update-old")),
+                default=Value("edited"),
+            )
+        )
+
+
 class InboxItem(models.Model):
     '''
+    inbox is the inbox that owns the item, every item belongs to exactly one inbox
     content_type is a reference to a model instance whose id is object_id and actual object is content_object
     remote_payload is the JSON data sent with the request yet don't match any models, this usually causes by the object
     being sent belongs to a remote user ~ not in our database
     '''
+    inbox = models.ForeignKey("Inbox", on_delete=models.CASCADE, related_name="items")
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
     object_id = models.UUIDField(null=True, blank=True)
     content_object = GenericForeignKey("content_type", "object_id")
     remote_payload = models.JSONField(null=True, blank=True)
     time = models.DateTimeField(default=datetime.now)
     post_status = models.CharField(default=None, blank=True, null=True, max_length=10)
+
+    # Denormalized from the content so the inbox can be filtered in the database: post, comment, like, follow or share,
+    # and the base URL of the node the item comes from (e.g. http://nodebbbb)
+    item_type = models.CharField(max_length=10, blank=True, default="")
+    origin_host = models.CharField(max_length=255, blank=True, default="")
+
+    objects = InboxItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Reading an inbox newest first is a range scan of these indexes
+            models.Index(fields=["inbox", "-time", "-id"], name="inboxitem_inbox_time_idx"),
+            models.Index(fields=["inbox", "item_type", "-time"], name="inboxitem_inbox_type_idx"),
+            models.Index(fields=["origin_host"], name="inboxitem_origin_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.item_type:
+            self.item_type, self.origin_host = describe_item(self.content_object, self.remote_payload)
+        super().save(*args, **kwargs)
+
+
+def describe_item(content=None, remote_payload=None):
+    """
+    Returns (item_type, origin_host) of an inbox item holding `content` (a model instance) or `remote_payload` (JSON)
+    """
+    if content is not None:
+        item_type = str(getattr(content, "type", "") or content._meta.model_name).lower()
+        # Only follow requests can come from another node, posts, comments, likes and shares stored here are ours
+        origin = content.actor.get("id") if item_type == "follow" else settings.BASE_URL
+    elif isinstance(remote_payload, dict):
+        item_type = str(remote_payload.get("type", "")).lower()
+        origin = (remote_payload.get("actor") or {}).get("id") if item_type == "follow" else remote_payload.get("id")
+    else:
+        return "", ""
+
+    origin_host = url_parser.get_base_host(origin).strip().lower() if origin else ""
+    return item_type[:10], origin_host
     
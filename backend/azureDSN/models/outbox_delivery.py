@@ -0,0 +1,49 @@
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+'''
+An activity (post, follow request, like or comment) waiting to be sent to the inbox of a remote author.
+The inbox view used to send these to the remote node inside the request of our user, so a slow node made posting, liking
+and commenting slow. Now the view only stores a delivery and returns, the delivery is sent right after the request in
+the background or by the deliver_outbox worker, and retried with exponential backoff until it succeeds or is dead.
+'''
+class OutboxDelivery(models.Model):
+    STATUS_PENDING = "pending"  # waiting for its next attempt
+    STATUS_SENDING = "sending"  # claimed by a worker, back to pending if the worker dies before its lease ends
+    STATUS_DELIVERED = "delivered"  # the remote node accepted it
+    STATUS_SKIPPED = "skipped"  # not sent because its precondition failed, e.g. the receiver does not follow the author
+    STATUS_DEAD = "dead"  # refused by the remote node or out of attempts, kept for inspection
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_DELIVERED, "Delivered"),
+        (STATUS_SKIPPED, "Skipped"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    activity_type = models.CharField(max_length=10)
+    method = models.CharField(max_length=10, default="POST")
+    url = models.URLField(max_length=500)  # the remote inbox
+    host = models.CharField(max_length=255)  # base URL of the remote node, to limit the calls sent to a node at once
+    payload = models.JSONField(default=dict)
+    # Only sent if a GET on this URL does not answer 404, e.g. the followers endpoint for a friends-only post
+    precondition_url = models.URLField(max_length=500, blank=True, default="")
+    status = models.CharField(choices=STATUS_CHOICES, default=STATUS_PENDING, max_length=10)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        """String representation for the delivery object (useful for admin panels)."""
+        return f"{self.activity_type} to {self.url} [{self.status}]"
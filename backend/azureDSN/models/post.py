@@ -2,8 +2,16 @@ import uuid
 from django.db import models
 from datetime import datetime
 from .user import User
+from .image_blob import ImageBlob, decode_base64
 
 class Post(models.Model):
+    # Content types of image posts and the MIME type of their bytes
+    IMAGE_CONTENT_TYPES = {
+        'image/png;base64': 'image/png',
+        'image/jpeg;base64': 'image/jpeg',
+        'application/base64': 'application/octet-stream',
+    }
+
     # unique post ID's are generated by the database
     type = models.TextField(default="post", editable=False)
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
@@ -24,7 +32,8 @@ class Post(models.Model):
         default='text/plain',
         max_length=20
     )
-    content = models.TextField(null=True, blank=True) # base64-encoded image or just normal text
+    content = models.TextField(null=True, blank=True) # normal text, image posts keep their image in `image` instead
+    image = models.ForeignKey(ImageBlob, on_delete=models.PROTECT, related_name="posts", null=True, blank=True, editable=False)
     
     VISIBILITY_CHOICES = [
         (1, 'PUBLIC'),
@@ -35,7 +44,39 @@ class Post(models.Model):
     visibility = models.IntegerField(choices=VISIBILITY_CHOICES, default=1)
     created_at = models.DateTimeField("date posted", default=datetime.now)
     modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The streams list posts by visibility, newest first
+            models.Index(fields=["visibility", "-modified_at", "-uuid"], name="post_stream_idx"),
+        ]
     
     def __str__(self):
         """String representation for the post object (useful for admin panels)."""
         return f"{self.title} ({self.uuid}) by ({self.user.display_name})"
+
+    def save(self, *args, **kwargs):
+        """
+        Move the base64 content of an image post to its ImageBlob, see models/image_blob.py
+        """
+        update_fields = kwargs.get("update_fields")
+        previous_image = self.image_id
+        if update_fields is None or "content" in update_fields:
+            if self.content_type not in self.IMAGE_CONTENT_TYPES:
+                self.image = None
+            elif self.content:
+                data = decode_base64(self.content)
+                if data is not None:  # anything else stays as it was sent
+                    self.image = ImageBlob.store(data, self.IMAGE_CONTENT_TYPES[self.content_type])
+                    self.content = ""
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "image"}
+        super().save(*args, **kwargs)
+        if previous_image and previous_image != self.image_id:
+            ImageBlob.discard_unused(previous_image)
+
+    def get_content(self):
+        """
+        The content as sent by its author: the base64 of the image for image posts
+        """
+        return self.image.as_base64() if self.image_id else self.content
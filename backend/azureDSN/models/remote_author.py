@@ -0,0 +1,38 @@
+from django.db import models
+from .user import NodeUser
+
+
+'''
+A cached copy of the profile of an author who lives on a remote node, as returned by GET /api/authors/{serial}/ on
+their node. Follower, followee and friend lists read the profiles from here instead of calling every node on every
+request; stale profiles are refetched in the background, see utils/remote_authors.py.
+Rows are looked up by url_parser.author_key, so every way a node writes the FQID of an author finds the same row.
+The authors a node lists on its /api/authors/ are also the federated author directory (listed), synced from every node
+by utils/author_directory.py.
+'''
+class RemoteAuthor(models.Model):
+    STATUS_OK = "ok"  # body is the latest profile the remote node gave us, kept when a later fetch fails
+    STATUS_FAILED = "failed"  # never fetched successfully, body is empty
+    STATUS_CHOICES = [
+        (STATUS_OK, "OK"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    fqid = models.CharField(max_length=500)
+    key = models.CharField(max_length=255, unique=True)
+    body = models.JSONField(default=dict)
+    last_fetched = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(choices=STATUS_CHOICES, default=STATUS_OK, max_length=10)
+    node = models.ForeignKey(NodeUser, on_delete=models.CASCADE, related_name="remote_authors", null=True, blank=True)
+    listed = models.BooleanField(default=False)  # in the directory: the node listed the author on its last full sync
+    listed_at = models.DateTimeField(null=True, blank=True)  # start of the last sync that listed the author
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["last_fetched"], name="remoteauthor_fetched_idx"),
+            models.Index(fields=["listed", "id"], name="remoteauthor_directory_idx"),
+        ]
+
+    def __str__(self):
+        """String representation for the remote author object (useful for admin panels)."""
+        return f"{self.body.get('displayName')} ({self.fqid}) [{self.status}]"
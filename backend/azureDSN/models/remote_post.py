@@ -0,0 +1,87 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+'''
+A cached copy of a post that lives on a remote node. The inbox write path upserts a row whenever a remote post
+(or an update/delete of one) reaches any local inbox, so the public stream can read remote posts with one indexed query
+instead of scanning every inbox. The body is refreshed in the background from the origin node with a conditional GET.
+'''
+class RemotePost(models.Model):
+    STATUS_PENDING = "pending"  # received through an inbox, never fetched from the origin node
+    STATUS_OK = "ok"  # body is the latest version the origin node gave us
+    STATUS_FAILED = "failed"  # origin node refused to give us the post (e.g. 403)
+    STATUS_DELETED = "deleted"  # post was deleted on the origin node
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_OK, "OK"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_DELETED, "Deleted"),
+    ]
+
+    fqid = models.CharField(max_length=500, unique=True)
+    author_fqid = models.CharField(max_length=500, blank=True)
+    host = models.CharField(max_length=255, blank=True)
+    visibility = models.CharField(max_length=10, default="PUBLIC")
+    body = models.JSONField(default=dict)
+    published = models.DateTimeField(null=True, blank=True, db_index=True)
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_fetched = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(choices=STATUS_CHOICES, default=STATUS_PENDING, max_length=10)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["visibility", "status", "-published"], name="remotepost_stream_idx"),
+            models.Index(fields=["last_fetched"], name="remotepost_fetched_idx"),
+        ]
+
+    def __str__(self):
+        """String representation for the remote post object (useful for admin panels)."""
+        return f"{self.body.get('title')} ({self.fqid}) [{self.status}]"
+
+    @classmethod
+    def upsert_from_payload(cls, payload, post_status=None):
+        """
+        Create or update the cached post from a post object received through an inbox
+        """
+        fqid = payload.get("id")
+        if not fqid:
+            return None
+
+        visibility = str(payload.get("visibility", "PUBLIC")).upper()
+        author = payload.get("author") or {}
+        deleted = visibility == "DELETED" or (post_status or "").lower() == "delete"
+
+        remote_post, created = cls.objects.get_or_create(fqid=fqid, defaults={"body": payload})
+        if not created and remote_post.status == cls.STATUS_DELETED and not deleted:
+            return remote_post  # a late copy of a post we already know is gone
+
+        remote_post.author_fqid = author.get("id", remote_post.author_fqid)
+        remote_post.host = author.get("host", remote_post.host)
+        remote_post.visibility = visibility
+        remote_post.published = parse_published(payload.get("published")) or remote_post.published or timezone.now()
+
+        if deleted:
+            remote_post.status = cls.STATUS_DELETED
+        elif created or (post_status or "").lower() == "update":
+            # The payload is newer than what we have, refetch it from the origin node on the next refresh
+            remote_post.body = payload
+            remote_post.etag = ""
+            remote_post.last_fetched = None
+            remote_post.status = cls.STATUS_PENDING
+
+        remote_post.save()
+        return remote_post
+
+
+def parse_published(value):
+    if not value:
+        return None
+    try:
+        published = parse_datetime(str(value))
+    except ValueError:
+        return None
+    if published and timezone.is_naive(published):
+        published = timezone.make_aware(published)
+    return published
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+'''
+The searchable text of a local post or author, kept in sync with them by utils/signal.py.
+The table is only the source of the full-text index, which the database maintains next to it: an FTS5 table filled by
+triggers on SQLite, a weighted tsvector column with a GIN index on Postgres (see migrations/0031_searchdocument.py).
+Queries go through utils/search.py.
+'''
+class SearchDocument(models.Model):
+    KIND_POST = "post"
+    KIND_AUTHOR = "author"
+    KIND_CHOICES = [
+        (KIND_POST, "Post"),
+        (KIND_AUTHOR, "Author"),
+    ]
+
+    kind = models.CharField(choices=KIND_CHOICES, max_length=10)
+    object_id = models.UUIDField()  # uuid of the Post or User
+    title = models.TextField(blank=True, default="")  # title of a post, display name and username of an author
+    body = models.TextField(blank=True, default="")  # description and text content of a post, bio of an author
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="unique_search_document"),
+        ]
+
+    def __str__(self):
+        """String representation for the search document (useful for admin panels)."""
+        return f"{self.kind} {self.object_id}: {self.title}"
@@ -1,5 +1,7 @@
 from datetime import datetime
+from django.conf import settings
 from django.db import models
+from .image_blob import ImageBlob, parse_data_url
 import uuid
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
@@ -42,7 +44,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     bio = models.TextField(null=True, blank=True)
     github = models.URLField(null=True, blank=True) # e.g. "http://github.com/gjohnson"
     page = models.URLField(null=True, blank=True) # e.g. "http://nodebbbb/authors/222"
-    profile_image = models.TextField(null=True, blank=True) # to store data-url of image for profile pictures
+    profile_image = models.TextField(null=True, blank=True) # URL of the profile picture, data URLs are moved to `avatar`
+    avatar = models.ForeignKey(ImageBlob, on_delete=models.PROTECT, related_name="avatars", null=True, blank=True, editable=False)
     created_at = models.DateTimeField(default=datetime.now)
     modified_at = models.DateTimeField(auto_now=True) # Auto-update on every save
 
@@ -57,6 +60,25 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         """String representation for the author object (useful for admin panels)."""
         return f"{self.display_name}: ({self.uuid})"
+
+    def save(self, *args, **kwargs):
+        """
+        Store a profile picture sent as a data URL as an ImageBlob, and link to a small variant of it instead,
+        so author objects don't carry the whole picture
+        """
+        previous_avatar = self.avatar_id
+        image = parse_data_url(self.profile_image)
+        if image is not None and image[0] in ImageBlob.AVATAR_CONTENT_TYPES:
+            self.avatar = ImageBlob.store(image[1], image[0])
+            self.profile_image = self.avatar.url(width=settings.IMAGE_AVATAR_WIDTH)
+        elif self.avatar_id and not (self.profile_image or "").startswith(ImageBlob.url_of(self.avatar_id)):
+            self.avatar = None  # replaced by another picture
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "profile_image" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "avatar"}
+        super().save(*args, **kwargs)
+        if previous_avatar and previous_avatar != self.avatar_id:
+            ImageBlob.discard_unused(previous_avatar)
     
     def get_full_url(self):
         """
@@ -82,6 +104,8 @@ class NodeUser(User):
     # keep created_at and modified_at for consistency with other models
     # Add one more Boolean field that says if the node is authenticated or not (is_authenticated)
     is_authenticated = models.BooleanField(default=True)
+    # Last time the authors of the node were copied into the author directory, see utils/author_directory.py
+    authors_synced_at = models.DateTimeField(null=True, blank=True)
 
     def save(self, *args, **kwargs):
         # Explicitly set profile_image to None to avoid file processing attempts
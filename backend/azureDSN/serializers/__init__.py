@@ -8,4 +8,5 @@ from .follow_serializer import FollowSerializer
 from .follow_request_serializer import FollowRequestSerializer
 from .share_serializer import ShareSerializer
 from .site_config_serializer import SiteConfigSerializer
-from .node_serializer import NodeSerializer, NodeWithAuthenticationSerializer
\ No newline at end of file
+from .node_serializer import NodeSerializer, NodeWithAuthenticationSerializer
+from .outbox_delivery_serializer import OutboxDeliverySerializer
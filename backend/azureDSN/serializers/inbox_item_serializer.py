@@ -6,11 +6,34 @@ from .comment_serializer import CommentSerializer
 from .like_serializer import LikeSerializer
 from .follow_request_serializer import FollowRequestSerializer
 from .share_serializer import ShareSerializer
+from ..utils.inbox_content import load_content_objects
+from ..utils.post_summary import PostSummaryProvider
+
+
+class InboxItemListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Load the content of every item with one query per content type instead of one per item,
+        # and the likes and comments of all their posts at once
+        items = load_content_objects(list(data.all() if hasattr(data, "all") else data), self.context.get("projection"))
+        posts = [item.content_object for item in items if isinstance(item.content_object, Post)]
+        self.child._post_summaries = PostSummaryProvider(posts)
+        return super().to_representation(items)
+
 
 class InboxItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = InboxItem
         fields = "__all__"
+        list_serializer_class = InboxItemListSerializer
+
+    def get_content_context(self):
+        """
+        Context of the nested serializers, with the likes and comments loaded by InboxItemListSerializer if any
+        """
+        summaries = getattr(self, "_post_summaries", None)
+        if summaries is None:
+            return self.context
+        return {**self.context, "post_summaries": summaries}
     
     # Reference on how to achive polymorphic pattern in Django with serializer - Syas Jun 23, 2017
     # https://stackoverflow.com/questions/19976202/django-rest-framework-django-polymorphic-modelserialization
@@ -18,7 +41,7 @@ class InboxItemSerializer(serializers.ModelSerializer):
         if isinstance(obj.content_object, FollowRequest):
             return FollowRequestSerializer(instance=obj.content_object, context=self.context).data
         elif isinstance(obj.content_object, Post):
-            post_data = PostSerializer(instance=obj.content_object, context=self.context).data
+            post_data = PostSerializer(instance=obj.content_object, context=self.get_content_context()).data
             if obj.post_status is not None:
                 post_data['post_status'] = obj.post_status # this is to help add status for updated and deleted post
             return post_data
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+from ..models import OutboxDelivery
+
+class OutboxDeliverySerializer(serializers.ModelSerializer):
+    type = serializers.CharField(default="delivery", read_only=True)
+    id = serializers.UUIDField(source="uuid", read_only=True)
+    activity = serializers.CharField(source="activity_type", read_only=True)
+
+    class Meta:
+        model = OutboxDelivery
+        fields = [
+            "type",
+            "id",
+            "activity",
+            "url",
+            "status",
+            "attempts",
+            "last_status_code",
+            "last_error",
+            "next_attempt_at",
+            "created_at",
+            "delivered_at",
+        ]
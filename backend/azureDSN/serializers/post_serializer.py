@@ -1,10 +1,23 @@
 from rest_framework import serializers
+from django.db.models import prefetch_related_objects
 from ..models import Post, User
 from .user_serializer import UserSerializer
 from rest_framework.response import Response
 from django.conf import settings
+from ..utils.post_summary import PostSummaryProvider
+from ..utils import post_projection
 from urllib.parse import urljoin
-import requests, base64
+import base64
+
+
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Load likes and comments of all posts at once instead of once per post
+        posts = list(data.all() if hasattr(data, "all") else data)
+        self.child._post_summaries = PostSummaryProvider(posts)
+        if not self.child.is_list_projection:  # the list projection only needs the id of the image
+            prefetch_related_objects([post for post in posts if post.image_id], "image")
+        return super().to_representation(posts)
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -32,6 +45,26 @@ class PostSerializer(serializers.ModelSerializer):
             "modified_at",
             "visibility",
         )
+        list_serializer_class = PostListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.is_list_projection:
+            # The posts come from post_projection.for_list, reading their content would load it one post at a time
+            self.fields.pop("content")
+
+    @property
+    def is_list_projection(self):
+        return self.context.get("projection") == post_projection.LIST
+
+    def get_post_summaries(self, instance):
+        """
+        Use the provider passed in the context or set by PostListSerializer, otherwise load this post alone
+        """
+        summaries = self.context.get("post_summaries") or getattr(self, "_post_summaries", None)
+        if summaries is None:
+            summaries = PostSummaryProvider([instance])
+        return summaries
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -51,66 +84,16 @@ class PostSerializer(serializers.ModelSerializer):
         post_url = f"/api/authors/{author_uuid}/posts/{post_uuid}"
         representation["id"] = urljoin(base_url, post_url)
 
-        # Fetch all likes of the post
-        like_url = (
-            f"{base_url}/api/authors/{instance.user.uuid}/posts/{instance.uuid}/likes"
-        )
-        headers = {
-            "Internal-Auth": settings.INTERNAL_API_SECRET
-        }  # To get through the auth layer
-
-        try:
-            response = requests.get(like_url, headers=headers)
-            if response.status_code == 200:
-                representation["likes"] = response.json()
-            else:
-                representation["likes"] = {
-                    "type": "likes",
-                    "page": f"{representation['id']}",
-                    "id": f"{representation['id']}/likes",
-                    "page_number": 1,
-                    "size": 5,
-                    "count": 0,
-                    "src": [],
-                }
-        except requests.RequestException as e:
-            representation["likes"] = {
-                "type": "likes",
-                "page": f"{representation['id']}",
-                "id": f"{representation['id']}/likes",
-                "page_number": 1,
-                "size": 5,
-                "count": 0,
-                "src": [],
-            }
-
-        # Fetch all comments of the post
-        comment_url = f"{base_url}/api/authors/{instance.user.uuid}/posts/{instance.uuid}/comments"
-
-        try:
-            response = requests.get(comment_url, headers=headers)
-            if response.status_code == 200:
-                representation["comments"] = response.json()
-            else:
-                representation["comments"] = {
-                    "type": "comments",
-                    "page": f"{representation['id']}",
-                    "id": f"{representation['id']}/comments",
-                    "page_number": 1,
-                    "size": 5,
-                    "count": 0,
-                    "src": [],
-                }
-        except requests.RequestException as e:
-            representation["comments"] = {
-                "type": "comments",
-                "page": f"{representation['id']}",
-                "id": f"{representation['id']}/comments",
-                "page_number": 1,
-                "size": 5,
-                "count": 0,
-                "src": [],
-            }
+        if self.is_list_projection:
+            representation.update(post_projection.list_content(instance, representation["id"]))
+        else:
+            # Image posts are sent with their image in base64, as other nodes expect
+            representation["content"] = instance.get_content()
+
+        # First page of likes and comments, shared by every post of the list being serialized
+        summaries = self.get_post_summaries(instance)
+        representation["likes"] = summaries.likes(instance)
+        representation["comments"] = summaries.comments(instance)
 
         return representation
 
@@ -216,6 +199,7 @@ class CreatePostSerializer(serializers.ModelSerializer):
 
         visibility_str = dict(Post.VISIBILITY_CHOICES).get(instance.visibility)
         representation["visibility"] = visibility_str
+        representation["content"] = instance.get_content()
 
         # settings.BASE_URL will always work as long as you have .env file now
         base_url = settings.BASE_URL.strip()
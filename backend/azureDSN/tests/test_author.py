@@ -3,8 +3,10 @@ from django.conf import settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from ..models import User
-from unittest.mock import patch
+from django.test import override_settings
+from ..models import User, NodeUser, RemoteAuthor, Follow
+from ..utils import author_directory
+from unittest.mock import Mock, patch
 
 class AuthorTests(APITestCase):
     patch('azureDSN.utils.auth.TokenOrBasicAuthPermission.has_permission', return_value=True).start()
@@ -110,6 +112,60 @@ class AuthorTests(APITestCase):
         
         payload = response.data
         self.assertEqual(len(payload), 7)
+
+    @override_settings(AUTHOR_DIRECTORY_PAGE_SIZE=2, AUTHOR_DIRECTORY_BACKGROUND_SYNC=False)
+    def test_retrieve_authors_all_directory(self):
+        """Test that remote authors are synced page by page and listed without calling their node."""
+        node = NodeUser.objects.create(username="nodebbbb", password="nodebbbb", host="http://nodebbbb.com/api/")
+        remote_authors = [
+            {"type": "author", "id": f"http://nodebbbb.com/api/authors/{uuid4()}", "displayName": f"Remote Author{number}"}
+            for number in range(3)
+        ]
+
+        def remote_get(url, params=None, **kwargs):
+            start = (params["page"] - 1) * params["size"]
+            return Mock(status_code=200, json=Mock(return_value={"type": "authors", "authors": remote_authors[start:start + params["size"]]}))
+
+        with patch('azureDSN.utils.federation.get', side_effect=remote_get) as mock_get:
+            self.assertEqual(author_directory.sync_node(node), 3)
+        self.assertEqual(mock_get.call_count, 2)
+
+        url = reverse('authors_all')
+        with patch('azureDSN.utils.federation.get') as mock_get:
+            response = self.client.get(url, {"user": str(self.test_author.uuid)})
+            paginated = self.client.get(url, {"user": str(self.test_author.uuid), "page": 2, "size": 4})
+            anonymous = self.client.get(url, {"user": "anonymous"})
+        mock_get.assert_not_called()
+        self.assertEqual(len(response.data), 9)
+        self.assertEqual([author["displayName"] for author in response.data[6:]], ["Remote Author0", "Remote Author1", "Remote Author2"])
+        self.assertEqual(len(paginated.data), 4)  # 2 of the 6 local authors, then the directory
+        self.assertEqual([author["displayName"] for author in paginated.data[2:]], ["Remote Author0", "Remote Author1"])
+        self.assertEqual(len(anonymous.data), 7)
+
+        # The node stopped listing two of its authors
+        remote_authors = remote_authors[:1]
+        with patch('azureDSN.utils.federation.get', side_effect=remote_get):
+            self.assertEqual(author_directory.sync_node(node), 1)
+        response = self.client.get(url, {"user": str(self.test_author.uuid)})
+        self.assertEqual([author["displayName"] for author in response.data[6:]], ["Remote Author0"])
+
+    @override_settings(AUTHOR_DIRECTORY_BACKGROUND_SYNC=False)
+    def test_recommended_authors(self):
+        """Test that recommendations come from the directory in one query and leave out followed authors."""
+        node = NodeUser.objects.create(username="nodebbbb", password="nodebbbb", host="http://nodebbbb.com/api/")
+        for number in range(8):
+            fqid = f"http://nodebbbb.com/api/authors/{uuid4()}"
+            RemoteAuthor.objects.create(fqid=fqid, key=f"nodebbbb.com/{fqid.split('/')[-1]}", node=node, listed=True, body={"id": fqid, "displayName": f"Remote Author{number}"})
+        followed = RemoteAuthor.objects.order_by("id")[:4]
+        for remote_author in followed:
+            Follow.objects.create(local_follower=self.test_author, remote_followee=remote_author.fqid)
+
+        self.client.force_authenticate(user=self.test_author)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_recommended_authors'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recommended = {author["displayName"] for author in response.data["recommended_authors"]}
+        self.assertEqual(recommended, {f"Remote Author{number}" for number in range(4, 8)})
           
     # test getting all authors paginated  
     def test_retrieve_authors_paginated(self):
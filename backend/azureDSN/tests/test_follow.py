@@ -1,10 +1,13 @@
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from ..models import Follow, User
+from ..models import Follow, User, RemoteAuthor
+from ..utils import friendship, remote_authors
+from django.db import IntegrityError
 from urllib.parse import quote
 from django.conf import settings
-from unittest.mock import patch
+from django.test import override_settings
+from unittest.mock import Mock, patch
 import uuid
 
 class FollowTests(APITestCase):
@@ -159,4 +162,107 @@ class FollowTests(APITestCase):
         url = reverse('followers_handler', args=[self.user1.uuid, encoded_url])  
         response = self.client.get(f"{url}")
         self.assertEqual(response.data["is_follower"], False)
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_remote_follower_key(self):
+        """Remote followers are found however their node writes the URL, and follow only once."""
+        remote_serial = uuid.uuid4()
+        Follow.objects.create(remote_follower=f"https://NodeBBBB.com/api/authors/{remote_serial}/", local_followee=self.user1)
+
+        follower_url = quote(f"http://nodebbbb.com/authors/{remote_serial}", safe="")
+        response = self.client.get(reverse('followers_handler', args=[self.user1.uuid, follower_url]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.put(reverse('followers_handler', args=[self.user1.uuid, follower_url]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(remote_follower=f"http://nodebbbb.com/api/authors/{remote_serial}", local_followee=self.user1)
+
+    def test_delete_remote_follows(self):
+        """Remote follows are deleted by the canonical key of their author, never one on another node."""
+        remote_serial = uuid.uuid4()
+        Follow.objects.create(local_follower=self.user1, remote_followee=f"http://nodebbbb.com/api/authors/{remote_serial}")
+        Follow.objects.create(local_follower=self.user1, remote_followee=f"http://nodecccc.com/api/authors/{remote_serial}")
+        Follow.objects.create(remote_follower=f"http://nodebbbb.com/api/authors/{remote_serial}", local_followee=self.user1)
+
+        local_url = quote(f"{settings.BASE_URL}/api/authors/{self.user1.uuid}", safe="")
+        url = reverse('followers_handler', args=[remote_serial, local_url])
+        response = self.client.delete(f"{url}?followee={quote(f'https://NodeBBBB.com/authors/{remote_serial}/', safe='')}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Follow.objects.filter(local_follower=self.user1).exclude(remote_followee=None).values_list("remote_followee_key", flat=True)), [f"nodecccc.com/{remote_serial}"])
+
+        response = self.client.delete(f"{url}?followee={quote(f'http://nodebbbb.com/api/authors/{uuid.uuid4()}', safe='')}")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        remote_url = quote(f"https://nodebbbb.com/authors/{remote_serial}/", safe="")
+        response = self.client.delete(reverse('followers_handler', args=[self.user1.uuid, remote_url]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Follow.objects.filter(local_followee=self.user1).exclude(remote_follower=None).exists())
+
+    def test_friendship_cache(self):
+        """Friendships are answered from memory and follow the changes of the Follow table."""
+        self.assertEqual(friendship.friends_of(self.user1), {self.user2.uuid})
+        with self.assertNumQueries(0):
+            self.assertEqual(friendship.friends_of(self.user1.uuid), {self.user2.uuid})
+            self.assertEqual(friendship.followees_of(self.user1), {self.user2.uuid})
+        self.assertNotIn(self.user3.uuid, friendship.friends_of(self.user1))
+
+        Follow.objects.create(local_follower=self.user1, local_followee=self.user3)
+        Follow.objects.create(local_follower=self.user3, local_followee=self.user1)
+        self.assertEqual(friendship.friends_of(self.user1), {self.user2.uuid, self.user3.uuid})
+
+        Follow.objects.filter(local_follower=self.user2, local_followee=self.user1).delete()
+        self.assertEqual(friendship.friends_of(self.user1), {self.user3.uuid})
+        self.assertEqual(friendship.followees_of(self.user1), {self.user2.uuid, self.user3.uuid})
+
+    @override_settings(REMOTE_AUTHOR_BACKGROUND_REFRESH=False)
+    def test_remote_followers_cached(self):
+        """Remote profiles are fetched once, then served from the cache even when their node is down."""
+        remote_serials = [uuid.uuid4() for _ in range(3)]
+        for remote_serial in remote_serials:
+            Follow.objects.create(remote_follower=f"http://nodebbbb.com/api/authors/{remote_serial}", local_followee=self.user1)
+
+        def remote_get(url, **kwargs):
+            return Mock(status_code=200, json=Mock(return_value={"type": "author", "id": url, "displayName": url.split("/")[-2]}))
+
+        url = reverse('get_followers', args=[self.user1.uuid])
+        with patch('azureDSN.utils.federation.get', side_effect=remote_get) as mock_get:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual({follower["displayName"] for follower in response.data["followers"]}, {"TestUser2", *(str(serial) for serial in remote_serials)})
+        self.assertEqual(RemoteAuthor.objects.count(), 3)
+
+        with patch('azureDSN.utils.federation.get', return_value=Mock(status_code=503)) as mock_get:
+            response = self.client.get(url)
+        mock_get.assert_not_called()
+        self.assertEqual(len(response.data["followers"]), 4)
+
+    @override_settings(REMOTE_AUTHOR_BACKGROUND_REFRESH=False, REMOTE_AUTHOR_RETRY_AFTER=0, RESPONSE_CACHE_ENABLED=False)
+    def test_remote_follower_fetch_failed(self):
+        """A failed fetch keeps the last profile and is retried soon, an author never fetched shows up once it is."""
+        known, unknown = (f"http://nodebbbb.com/api/authors/{uuid.uuid4()}" for _ in range(2))
+        for remote_follower in (known, unknown):
+            Follow.objects.create(remote_follower=remote_follower, local_followee=self.user1)
+
+        def remote_get(url, **kwargs):
+            return Mock(status_code=200, json=Mock(return_value={"type": "author", "id": url, "displayName": url.split("/")[-2]}))
+
+        with patch('azureDSN.utils.federation.get', side_effect=remote_get):
+            remote_authors.fetch_profiles([known])
+        self.assertEqual(remote_authors.stale_remote_authors().count(), 0)
+        RemoteAuthor.objects.update(last_fetched=None)
+
+        with patch('azureDSN.utils.federation.get', return_value=Mock(status_code=500)):
+            response = self.client.get(reverse('get_followers', args=[self.user1.uuid]))
+            self.assertEqual(len(response.data["followers"]), 2)
+            self.assertEqual(remote_authors.refresh_stale_remote_authors(), 2)
+        self.assertEqual(RemoteAuthor.objects.get(fqid=known).status, RemoteAuthor.STATUS_OK)
+        self.assertEqual(RemoteAuthor.objects.get(fqid=known).body["displayName"], known.split("/")[-1])
+        self.assertEqual(RemoteAuthor.objects.get(fqid=unknown).status, RemoteAuthor.STATUS_FAILED)
+
+        with patch('azureDSN.utils.federation.get', side_effect=remote_get):
+            self.assertEqual(remote_authors.refresh_stale_remote_authors(), 2)
+        response = self.client.get(reverse('get_followers', args=[self.user1.uuid]))
+        self.assertEqual(len(response.data["followers"]), 3)
+        self.assertEqual(RemoteAuthor.objects.get(fqid=unknown).status, RemoteAuthor.STATUS_OK)
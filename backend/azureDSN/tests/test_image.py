@@ -1,10 +1,13 @@
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 from django.conf import settings
+from django.test import override_settings
 from rest_framework.test import APITestCase, APIClient
-from ..models import User, Post
+from ..models import User, Post, ImageBlob, ImageVariant
+from ..utils import remote_images
 from django.urls import reverse
 from rest_framework import status
-import uuid
+from PIL import Image
+import base64, hashlib, io, tempfile, uuid
 
 class ImageAPITest(APITestCase):
     patch('azureDSN.utils.auth.TokenOrBasicAuthPermission.has_permission', return_value=True).start()
@@ -19,9 +22,10 @@ class ImageAPITest(APITestCase):
             profile_image=None
         )
 
+        self.image_content = "iVBORw0KGgoAAAANSUhEUgAAAAUAAAAFCAYAAACNbyblAAAAHElEQVQI12P4//8/w38GIAXDIBKE0DHxgljNBAAO9TXL0Y4OHwAAAABJRU5ErkJggg=="
         self.post = Post.objects.create(
             title="A post with image",
-            content="iVBORw0KGgoAAAANSUhEUgAAAAUAAAAFCAYAAACNbyblAAAAHElEQVQI12P4//8/w38GIAXDIBKE0DHxgljNBAAO9TXL0Y4OHwAAAABJRU5ErkJggg==",
+            content=self.image_content,
             has_image=True,
             content_type="image/png;base64",
             user=self.user
@@ -38,7 +42,7 @@ class ImageAPITest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        self.assertEqual(response.data, f"data:{self.post.content_type},{self.post.content}")
+        self.assertEqual(response.data, f"data:{self.post.content_type},{self.image_content}")
 
     def test_invalid_serials(self):
         # Test invalid author serial and invalid post serial, should return 404
@@ -68,7 +72,7 @@ class ImageAPITest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        self.assertEqual(response.data, f"data:{self.post.content_type},{self.post.content}")
+        self.assertEqual(response.data, f"data:{self.post.content_type},{self.image_content}")
 
     def test_invalid_fqid(self):
         # Test error state using invalid post uuid that invalidates the fqid
@@ -77,4 +81,135 @@ class ImageAPITest(APITestCase):
         })
 
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    def test_image_stored_as_bytes(self):
+        # The image is stored once as raw bytes under its SHA-256, and still served as base64 in the post
+        data = base64.b64decode(self.image_content)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.content, "")
+        self.assertEqual(self.post.image_id, hashlib.sha256(data).hexdigest())
+        self.assertEqual(bytes(self.post.image.data), data)
+
+        copy = Post.objects.create(title="Same image", content=self.image_content, has_image=True, content_type="image/png;base64", user=self.user)
+        self.assertEqual(copy.image_id, self.post.image_id)
+        self.assertEqual(ImageBlob.objects.count(), 1)
+
+        url = reverse('author_post', args=[self.user.uuid, self.post.uuid])
+        self.assertEqual(self.client.get(url).data["content"], self.image_content)
+
+        copy.delete()
+        self.post.delete()
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_get_image_raw(self):
+        # Raw bytes with their type, a strong ETag, immutable caching and ranges
+        data = base64.b64decode(self.image_content)
+        response = self.client.get(reverse('get_image_raw', kwargs={'author_serial': self.user.uuid, 'post_serial': self.post.uuid}))
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        url = response["Location"]
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, data)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["ETag"], f'"{hashlib.sha256(data).hexdigest()}"')
+        self.assertIn("immutable", response["Cache-Control"])
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response.content, data[:10])
+        self.assertEqual(response["Content-Range"], f"bytes 0-9/{len(data)}")
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=-5").content, data[-5:])
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f"bytes={len(data)}-").status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        # Friends-only images are not sent to strangers
+        self.post.visibility = 2
+        self.post.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_image_resized(self):
+        # ?w= returns a variant at most that wide, made once, in WebP for clients that accept it
+        picture = io.BytesIO()
+        Image.new("RGB", (2000, 1000), "red").save(picture, format="PNG")
+        post = Post.objects.create(
+            title="A large image", content=base64.b64encode(picture.getvalue()).decode(), has_image=True,
+            content_type="image/png;base64", user=self.user
+        )
+        url = reverse('get_image_blob', kwargs={'digest': post.image_id})
+
+        response = self.client.get(url, {"w": 300}, HTTP_ACCEPT="image/webp,image/*")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("Accept", response["Vary"])
+        with Image.open(io.BytesIO(response.content)) as image:
+            self.assertEqual(image.size, (320, 160))
+
+        with self.assertNumQueries(5):
+            again = self.client.get(url, {"w": 300}, HTTP_ACCEPT="image/webp")
+        self.assertEqual(again.content, response.content)
+
+        response = self.client.get(url, {"w": 64})
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(ImageVariant.objects.filter(source=post.image).count(), 2)
+
+        # Never made wider than the original
+        with Image.open(io.BytesIO(self.client.get(reverse('get_image_blob', kwargs={'digest': self.post.image_id}), {"w": 1080}).content)) as image:
+            self.assertEqual(image.size, (5, 5))
+
+        self.assertEqual(self.client.get(url, {"w": "wide"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('get_image_by_serial', kwargs={'author_serial': self.user.uuid, 'post_serial': post.uuid}), {"w": 64})
+        self.assertTrue(response.data.startswith("data:image/jpeg;base64,"))
+
+    def test_profile_image_stored_as_blob(self):
+        # A data URL profile image is stored once and replaced by the URL of its resized variant, readable by anyone
+        self.user.profile_image = f"data:image/png;base64,{self.image_content}"
+        self.user.save()
+        self.user.refresh_from_db()
+        digest = hashlib.sha256(base64.b64decode(self.image_content)).hexdigest()
+        self.assertEqual(self.user.avatar_id, digest)
+        self.assertEqual(self.user.profile_image, ImageBlob.url_of(digest, width=settings.IMAGE_AVATAR_WIDTH))
+
+        response = self.client.get(reverse('get_image_blob', kwargs={'digest': digest}), {"w": settings.IMAGE_AVATAR_WIDTH})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Cache-Control"].startswith("public"))
+
+        self.user.profile_image = "https://example.com/picture.png"
+        self.user.save()
+        self.assertIsNone(User.objects.get(pk=self.user.pk).avatar_id)
+        # Still the image of self.post, so kept until that post goes too
+        self.assertTrue(ImageBlob.objects.filter(sha256=digest).exists())
+        self.post.delete()
+        self.assertFalse(ImageBlob.objects.filter(sha256=digest).exists())
+
+    def test_remote_image_cached(self):
+        # A remote image is downloaded once, then served from disk and only revalidated once its entry is old
+        fqid = "http://remotenode/api/authors/111/posts/b1a8b7a4-8c5a-4d41-bd1d-4f1bb6a3f2c1"
+        url = reverse('get_image_by_fqid', kwargs={'post_fqid': fqid})
+        remote_post = Mock(status_code=200, headers={"ETag": '"v1"'})
+        remote_post.json.return_value = {"type": "post", "contentType": "image/png;base64", "content": self.image_content}
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(REMOTE_IMAGE_CACHE_DIR=directory):
+            remote_images.metrics.reset()
+            with patch('azureDSN.utils.federation.get', return_value=remote_post) as get:
+                self.assertEqual(self.client.get(url).data, f"data:image/png;base64,{self.image_content}")
+                self.assertEqual(self.client.get(url).data, f"data:image/png;base64,{self.image_content}")
+            self.assertEqual(get.call_count, 1)
+
+            with override_settings(REMOTE_IMAGE_CACHE_TTL=0), patch('azureDSN.utils.federation.get', return_value=Mock(status_code=304)) as get:
+                self.assertEqual(self.client.get(url).data, f"data:image/png;base64,{self.image_content}")
+            self.assertEqual(get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+            self.assertEqual(
+                {key: value for key, value in remote_images.metrics.snapshot().items() if key != "hit_ratio"},
+                {"hits": 1, "revalidated": 1, "misses": 1, "stale": 0, "evictions": 0}
+            )
+
+            # Least recently served entries go first once the cache is full
+            remote_images.store("http://remotenode/other", "image/png;base64", "x" * 10)
+            remote_images.touch(fqid)
+            with override_settings(REMOTE_IMAGE_CACHE_MAX_BYTES=len(self.image_content)):
+                self.assertEqual(remote_images.evict(), 1)
+            self.assertIsNone(remote_images.read("http://remotenode/other"))
+            self.assertIsNotNone(remote_images.read(fqid))
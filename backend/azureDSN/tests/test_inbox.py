@@ -1,15 +1,19 @@
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from ..models import User, Inbox, InboxItem, Post, FollowRequest, Share
+from ..models import User, Inbox, InboxItem, Post, FollowRequest, Share, Like, Comment, Follow, OutboxDelivery, NodeUser
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
+from base64 import b64encode
 import uuid
 from rest_framework.response import Response
 from ..views import InboxView
+from ..utils import node_health
 
 
 class InboxViewTestCase(TestCase):
@@ -51,6 +55,142 @@ class InboxViewTestCase(TestCase):
         self.assertEqual(response.data["items"][0]["type"], "follow")
         self.assertEqual(response.data['type'], 'inbox')
 
+    # Items from a node that refuses us are hidden, without probing the node while rendering
+    def test_get_inbox_items_node_health(self):
+        inbox_obj = Inbox.objects.get(user=self.user.uuid)
+        payload = {
+            "type": "post",
+            "id": "http://localhost:8001/api/authors/e09c9fff-c5dc-4d9d-9fb1-667a564cd3dd/posts/a2d00814-ec38-4ea0-a297-7aa64b24a262",
+            "visibility": "PUBLIC",
+        }
+        create_inbox_remote_post(payload, inbox_obj)
+
+        node_health.set_status("http://localhost:8001", node_health.FORBIDDEN)
+        with patch('azureDSN.utils.federation.request') as mock_request:
+            response = self.client.get(self.inbox_url)
+        mock_request.assert_not_called()
+        self.assertEqual(len(response.data["items"]), 0)
+
+        node_health.set_status("http://localhost:8001", node_health.UP)
+        response = self.client.get(self.inbox_url)
+        self.assertEqual(len(response.data["items"]), 1)
+
+        # A status older than the TTL no longer hides the node, which is probed again
+        node_health.set_status("http://localhost:8001", node_health.DOWN)
+        with override_settings(NODE_HEALTH_TTL=-1), patch('azureDSN.utils.node_health.schedule_probe') as schedule_probe:
+            response = self.client.get(self.inbox_url)
+        self.assertEqual(len(response.data["items"]), 1)
+        schedule_probe.assert_any_call("http://localhost:8001")
+
+    # A 5xx answer to an ordinary call doesn't mark the node down, only a failed probe does
+    def test_node_health_server_error(self):
+        node_health.set_status("http://localhost:8001", node_health.UP)
+        node_health.record_response("http://localhost:8001", 500, 0.1)
+        node_health.record_response("http://localhost:8001", None, 5.0)
+        self.assertEqual(node_health.get_status("http://localhost:8001")[0], node_health.UP)
+
+        with patch('azureDSN.utils.federation.get', return_value=Mock(status_code=503)):
+            node_health.probe("http://localhost:8001")
+        self.assertEqual(node_health.get_status("http://localhost:8001")[0], node_health.DOWN)
+
+    # Filter the inbox by type and date, and page through it with a cursor
+    def test_get_paginated_inbox_filters(self):
+        inbox_obj = Inbox.objects.get(user=self.user.uuid)
+        follow_obj = create_follow(create_user_givenID(user_id=self.follower.uuid), self.user)
+        follow_item = create_inbox_item(follow_obj, inbox_obj)
+        post_items = [create_inbox_item(create_post(self.follower), inbox_obj) for _ in range(3)]
+        self.assertEqual(follow_item.item_type, "follow")
+        self.assertEqual(post_items[0].item_type, "post")
+        self.assertEqual(post_items[0].origin_host, settings.BASE_URL.lower())
+
+        paginated_url = reverse('paginated_inbox', kwargs={'author_serial': self.user.uuid})
+        response = self.client.get(paginated_url, {"type": "post", "size": 2})
+        self.assertEqual(response.data["total_items"], 3)
+        self.assertEqual(len(response.data["items"]), 2)
+        self.assertTrue(all(item["type"] == "post" for item in response.data["items"]))
+
+        response = self.client.get(paginated_url, {"type": "post", "size": 2, "cursor": response.data["next_cursor"]})
+        self.assertEqual(len(response.data["items"]), 1)
+        self.assertIsNone(response.data["next_cursor"])
+
+        # Poll only the items received after the newest one we have
+        response = self.client.get(self.inbox_url, {"since": post_items[1].time.isoformat()})
+        self.assertEqual(len(response.data["items"]), 1)
+
+        response = self.client.get(self.inbox_url, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Serializing the inbox costs the same number of queries whatever its size
+    def test_get_inbox_query_count(self):
+        inbox_obj = Inbox.objects.get(user=self.user.uuid)
+
+        def add_items():
+            post = create_post(self.follower)
+            create_inbox_item(post, inbox_obj)
+            create_inbox_item(Like.objects.create(user=create_user_givenID(user_id=self.follower.uuid), post=post), inbox_obj)
+            create_inbox_item(Comment.objects.create(user=create_user_givenID(user_id=self.follower.uuid), post=post, comment="Nice post!"), inbox_obj)
+            create_inbox_item(create_follow(create_user_givenID(user_id=self.follower.uuid), self.user), inbox_obj)
+            # The bytes of image posts live in their ImageBlob
+            create_inbox_item(Post.objects.create(user=self.follower, title="Test Image", content=IMAGE_CONTENT,
+                                                  content_type="image/png;base64", visibility=1, has_image=True), inbox_obj)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.inbox_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries), len(response.data["items"])
+
+        add_items()
+        few_queries, few_items = count_queries()
+        for _ in range(5):
+            add_items()
+        many_queries, many_items = count_queries()
+
+        self.assertEqual(few_items, 5)
+        self.assertEqual(many_items, 30)
+        self.assertEqual(few_queries, many_queries)
+
+    # Posts reach their audience from the server when they are created, edited and deleted
+    def test_post_fan_out(self):
+        follower, friend = self.follower, create_user()
+        remote_follower = f"http://nodebbbb.com/api/authors/{uuid.uuid4()}"
+        remote_friend = f"http://nodebbbb.com/api/authors/{uuid.uuid4()}"
+        Follow.objects.create(local_follower=follower, local_followee=self.user)
+        Follow.objects.create(local_follower=friend, local_followee=self.user)
+        Follow.objects.create(local_follower=self.user, local_followee=friend)
+        Follow.objects.create(remote_follower=remote_follower, local_followee=self.user)
+        Follow.objects.create(remote_follower=remote_friend, local_followee=self.user)
+        Follow.objects.create(local_follower=self.user, remote_followee=remote_friend)
+
+        def inbox_statuses(user):
+            return sorted(str(item.post_status) for item in Inbox.objects.get(user=user).items.all())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(user=self.user, title="Fan out", content="Hello", visibility=1)
+        self.assertEqual(inbox_statuses(follower), ["None"])
+        self.assertEqual(inbox_statuses(friend), ["None"])
+        self.assertEqual(InboxItem.objects.filter(object_id=post.uuid).first().item_type, "post")
+        deliveries = OutboxDelivery.objects.order_by("url")
+        self.assertEqual(sorted(delivery.url for delivery in deliveries), sorted(
+            f"http://nodebbbb.com/api/authors/{author.split('/')[-1]}/inbox" for author in [remote_follower, remote_friend]
+        ))
+        self.assertTrue(all(delivery.payload["title"] == "Fan out" for delivery in deliveries))
+
+        # Friends-only now: the follower who is not a friend is told the post is gone
+        OutboxDelivery.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.visibility = 2
+            post.save()
+        self.assertEqual(inbox_statuses(follower), ["delete"])
+        self.assertEqual(inbox_statuses(friend), ["edited", "update"])
+        visibilities = {delivery.url.split("/")[-2]: delivery.payload["visibility"] for delivery in OutboxDelivery.objects.all()}
+        self.assertEqual(visibilities, {remote_follower.split("/")[-1]: "DELETED", remote_friend.split("/")[-1]: "FRIENDS"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.visibility = 4
+            post.save()
+        self.assertEqual(inbox_statuses(friend), ["delete"])
+
     # Send a DELETE request to delete follow request
     def test_delete_follow_request(self):
         # Add follow request into inbox
@@ -269,8 +409,52 @@ class InboxViewTestCase(TestCase):
         self.assertIsNotNone(inbox_obj.items.last().remote_payload)
         self.assertIsNone(inbox_obj.items.first().post_status)
         self.assertEqual(inbox_obj.items.last().post_status,"delete")
-    
-    # Test update existing post 
+
+    # A remote post deleted by its node leaves every local inbox in a fixed number of queries, the delete notices stay
+    def test_delete_remote_post_from_every_inbox(self):
+        post_id = f"http://nodebbbb.com/api/authors/{uuid.uuid4()}/posts/{uuid.uuid4()}"
+        remote_payload = {"type": "post", "id": post_id, "title": "remote post", "visibility": "PUBLIC"}
+        NodeUser.objects.create(username="nodebbbb", password="secret", host="http://nodebbbb.com/api/")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {b64encode(b'nodebbbb:secret').decode()}")
+
+        def delete_from(user, inbox_count):
+            for _ in range(inbox_count):
+                reader = User.objects.create(username=f"reader{User.objects.count()}", display_name="Reader")
+                inbox_obj = Inbox.objects.get(user=reader)
+                create_inbox_remote_post(remote_payload, inbox_obj)
+                create_inbox_remote_post(remote_payload, inbox_obj, post_status="update")
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.delete(reverse('inbox', kwargs={'author_serial': user.uuid}), data=remote_payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        delete_from(self.user, 1)  # fills the content type and remote post caches
+        self.assertEqual(list(InboxItem.objects.of_post(post_id).values_list("post_status", flat=True)), ["delete"])
+        few_queries = delete_from(self.follower, 2)
+        many_queries = delete_from(User.objects.create(username="deleter", display_name="Deleter"), 20)
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(list(InboxItem.objects.of_post(post_id).values_list("post_status", flat=True)), ["delete"] * 3)
+
+    # A node deleting a post it does not own only reaches the inbox it sent the delete to
+    def test_delete_post_from_another_node(self):
+        post_id = f"http://nodebbbb.com/api/authors/{uuid.uuid4()}/posts/{uuid.uuid4()}"
+        remote_payload = {"type": "post", "id": post_id, "title": "remote post", "visibility": "PUBLIC"}
+        create_inbox_remote_post(remote_payload, Inbox.objects.get(user=self.user))
+        create_inbox_remote_post(remote_payload, Inbox.objects.get(user=self.follower))
+        other_inbox = Inbox.objects.get(user=self.follower)
+        create_inbox_item(self.post, other_inbox)
+
+        NodeUser.objects.create(username="nodecccc", password="secret", host="http://nodecccc.com/api/")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {b64encode(b'nodecccc:secret').decode()}")
+        local_post_id = f"{settings.BASE_URL}/api/authors/{self.user.uuid}/posts/{self.post.uuid}"
+        for payload in (remote_payload, {"type": "post", "id": local_post_id, "title": "local post", "visibility": "PUBLIC"}):
+            response = self.client.delete(self.inbox_url, data=payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(list(other_inbox.items.values_list("post_status", flat=True)), [None, None])
+        self.assertEqual(list(Inbox.objects.get(user=self.user).items.values_list("post_status", flat=True)), ["delete", "delete"])
+
+    # Test update existing post
     def test_update_local_post_from_local_user(self):
         inbox_obj = Inbox.objects.get(user=self.user.uuid)
         # add post into inbox
@@ -856,6 +1040,8 @@ def create_user():
 
     return user_obj
         
+IMAGE_CONTENT = "iVBORw0KGgoAAAANSUhEUgAAAAUAAAAFCAYAAACNbyblAAAAHElEQVQI12P4//8/w38GIAXDIBKE0DHxgljNBAAO9TXL0Y4OHwAAAABJRU5ErkJggg=="
+
 def create_post(user_obj):        
     post_obj = Post.objects.create(user=user_obj,
                                     title="Test Post",
@@ -887,15 +1073,14 @@ def create_follow(actor, object):
 def create_inbox_item(object, inbox_obj):
     content_type = ContentType.objects.get_for_model(object)
     id = getattr(object, 'uuid', getattr(object, 'id', None))
-    inbox_item_obj = InboxItem.objects.create(content_type=content_type,
+    inbox_item_obj = InboxItem.objects.create(inbox=inbox_obj,
+                                                 content_type=content_type,
                                                  object_id=id,
                                                  content_object=object)
-    inbox_obj.items.add(inbox_item_obj)
 
     return inbox_item_obj
 
 def create_inbox_remote_post(remote_payload, inbox_obj, post_status=None):
-    inbox_item_obj = InboxItem.objects.create(remote_payload=remote_payload, post_status=post_status)
-    inbox_obj.items.add(inbox_item_obj)
+    inbox_item_obj = InboxItem.objects.create(inbox=inbox_obj, remote_payload=remote_payload, post_status=post_status)
 
     return inbox_item_obj
@@ -0,0 +1,28 @@
+from unittest.mock import patch
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..utils import federation
+
+class NodeMetricsTest(APITestCase):
+    patch('azureDSN.utils.auth.TokenOrBasicAuthPermission.has_permission', return_value=True).start()
+
+    def setUp(self):
+        federation.metrics.reset()
+
+    def test_session_per_node(self):
+        # Calls to the same node share one pooled session
+        self.assertIs(federation.session_for("http://nodeaaaa/api/authors/"), federation.session_for("http://NODEAAAA/api/posts/"))
+        self.assertIsNot(federation.session_for("http://nodeaaaa/api/"), federation.session_for("http://nodebbbb/api/"))
+
+    def test_node_metrics(self):
+        federation.metrics.record("http://nodeaaaa", 0.1, 200)
+        federation.metrics.record("http://nodeaaaa", 0.3, None)
+
+        response = self.client.get(reverse('node_metrics'))
+        self.assertEqual(response.status_code, 200)
+
+        node = response.data["nodes"]["http://nodeaaaa"]
+        self.assertEqual(node["requests"], 2)
+        self.assertEqual(node["errors"], 1)
+        self.assertEqual(node["avg_latency_ms"], 200.0)
+        self.assertEqual(node["max_latency_ms"], 300.0)
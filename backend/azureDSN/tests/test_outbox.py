@@ -0,0 +1,123 @@
+from unittest.mock import patch, Mock
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APITestCase
+from ..models import User, OutboxDelivery, Follow
+from ..utils import outbox
+import uuid
+
+class OutboxTest(APITestCase):
+    patch('azureDSN.utils.auth.TokenOrBasicAuthPermission.has_permission', return_value=True).start()
+
+    def setUp(self):
+        self.user = User.objects.create(
+            display_name="Local Follower",
+            username="localfollower",
+            host=f"{settings.BASE_URL}/api/",
+            github="http://github.com/testuser",
+            page=f"{settings.BASE_URL}/authors/localfollower",
+        )
+        self.remote_serial = uuid.uuid4()
+        self.remote_inbox = f"http://nodebbbb.com/api/authors/{self.remote_serial}/inbox"
+        self.follow_payload = {
+            "type": "follow",
+            "summary": "Local Follower wants to follow Lara Croft",
+            "actor": {
+                "type": "author",
+                "id": f"{settings.BASE_URL}/api/authors/{self.user.uuid}",
+                "host": f"{settings.BASE_URL}/api/",
+                "displayName": "Local Follower",
+            },
+            "object": {
+                "type": "author",
+                "id": f"http://nodebbbb.com/api/authors/{self.remote_serial}",
+                "host": "http://nodebbbb.com/api/",
+                "displayName": "Lara Croft",
+            },
+        }
+
+    def test_follow_request_is_queued(self):
+        # The request returns without calling the remote node
+        with patch('azureDSN.utils.federation.request') as mock_request:
+            response = self.client.post(f"/api/authors/{self.remote_serial}/inbox/", self.follow_payload, format="json")
+        mock_request.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Follow.objects.filter(local_follower=self.user, remote_followee=self.follow_payload["object"]["id"]).exists())
+
+        delivery = OutboxDelivery.objects.get(uuid=response.data["delivery"])
+        self.assertEqual(delivery.status, OutboxDelivery.STATUS_PENDING)
+        self.assertEqual(delivery.url, self.remote_inbox)
+        self.assertEqual(delivery.host, "http://nodebbbb.com")
+        self.assertEqual(response["Location"], reverse("outbox_delivery", kwargs={"delivery_id": delivery.uuid}))
+
+        with patch('azureDSN.utils.federation.request', return_value=Mock(status_code=201)) as mock_request:
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_DELIVERED)
+        mock_request.assert_called_once()
+        self.assertEqual(mock_request.call_args.kwargs["json"], self.follow_payload)
+
+        response = self.client.get(response["Location"])
+        self.assertEqual(response.data["status"], OutboxDelivery.STATUS_DELIVERED)
+        self.assertEqual(response.data["attempts"], 1)
+        self.assertEqual(response.data["last_status_code"], 201)
+
+    def test_retry_with_backoff(self):
+        delivery = outbox.enqueue("follow", self.remote_inbox, self.follow_payload)
+
+        with patch('azureDSN.utils.federation.request', return_value=Mock(status_code=503, text="busy")):
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_PENDING)
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.attempts, 1)
+        self.assertGreater(delivery.next_attempt_at, timezone.now() + timedelta(seconds=settings.OUTBOX_RETRY_BASE - 5))
+        self.assertEqual(outbox.claim_due_deliveries(), [])  # not due before its backoff ends
+        self.assertEqual(outbox.retry_delay(3), min(settings.OUTBOX_RETRY_BASE * 4, settings.OUTBOX_RETRY_MAX))
+
+    def test_dead_letter(self):
+        refused = outbox.enqueue("like", self.remote_inbox, {"type": "like"})
+        with patch('azureDSN.utils.federation.request', return_value=Mock(status_code=403, text="forbidden")):
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_DEAD)
+
+        last_attempt = outbox.enqueue("like", self.remote_inbox, {"type": "like"})
+        OutboxDelivery.objects.filter(pk=last_attempt.pk).update(attempts=settings.OUTBOX_MAX_ATTEMPTS - 1)
+        with patch('azureDSN.utils.federation.request', return_value=Mock(status_code=500, text="error")):
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_DEAD)
+
+        self.assertEqual(outbox.requeue_dead("http://nodebbbb.com/"), 2)
+        refused.refresh_from_db()
+        self.assertEqual(refused.status, OutboxDelivery.STATUS_PENDING)
+        self.assertEqual(refused.attempts, 0)
+
+    def test_dead_follow_request_withdraws_follow(self):
+        # A follow the remote node never received is not shown
+        self.client.post(f"/api/authors/{self.remote_serial}/inbox/", self.follow_payload, format="json")
+        with patch('azureDSN.utils.federation.request', return_value=Mock(status_code=400, text="bad request")):
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_DEAD)
+        self.assertFalse(Follow.objects.filter(local_follower=self.user).exists())
+
+        # Asking again for a follow the node already accepted keeps it
+        self.client.post(f"/api/authors/{self.remote_serial}/inbox/", self.follow_payload, format="json")
+        with patch('azureDSN.utils.federation.request', return_value=Mock(status_code=201)):
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_DELIVERED)
+        self.client.post(f"/api/authors/{self.remote_serial}/inbox/", self.follow_payload, format="json")
+        with patch('azureDSN.utils.federation.request', return_value=Mock(status_code=400, text="bad request")):
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_DEAD)
+        self.assertTrue(Follow.objects.filter(local_follower=self.user).exists())
+
+    def test_precondition_skips_delivery(self):
+        # A friends-only post is not sent to a remote author who does not follow its author
+        outbox.enqueue("post", self.remote_inbox, {"type": "post"}, method="PUT", precondition_url=f"{self.remote_inbox}/followers/x")
+        with patch('azureDSN.utils.federation.get', return_value=Mock(status_code=404)), \
+             patch('azureDSN.utils.federation.request') as mock_request:
+            [claimed] = outbox.claim_due_deliveries()
+            self.assertEqual(outbox.deliver(claimed), OutboxDelivery.STATUS_SKIPPED)
+        mock_request.assert_not_called()
+
@@ -4,9 +4,11 @@ from django.conf import settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from ..models import User, Post, Follow
+from ..models import User, NodeUser, Post, Follow, Like, Comment
 from rest_framework.authtoken.models import Token
 from django.utils import timezone
+from django.utils.http import http_date
+from base64 import b64encode
 
 class PostTests(APITestCase):
     patch('azureDSN.utils.auth.TokenOrBasicAuthPermission.has_permission', return_value=True).start()
@@ -99,6 +101,78 @@ class PostTests(APITestCase):
         self.assertEqual(response.data['title'], self.test_post1.title)
         self.assertEqual(response.data['content'], self.test_post1.content)
     
+    # likes and comments of the post are embedded without calling our own API
+    def test_get_post_embeds_likes_and_comments(self):
+        """Test the first page of likes and comments is embedded in the post."""
+        liker = {"type": "author", "id": f"{settings.BASE_URL}/api/authors/{self.test_author2.uuid}"}
+        for _ in range(12):
+            Like.objects.create(user=liker, post=self.test_post1)
+        Comment.objects.create(user=liker, post=self.test_post1, comment="Nice post")
+
+        url = reverse('author_post', kwargs={
+            'author_serial': self.test_author.uuid,
+            'post_serial': self.test_post1.uuid
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['likes']['count'], 12)
+        self.assertEqual(len(response.data['likes']['src']), 10)
+        self.assertEqual(response.data['comments']['count'], 1)
+        self.assertEqual(response.data['comments']['src'][0]['comment'], "Nice post")
+
+    # a client that already has the post gets a 304 until the post, its author, likes or comments change
+    def test_get_post_conditional(self):
+        """Test the post is sent with validators and not sent again while it is unchanged."""
+        url = reverse('author_post', kwargs={
+            'author_serial': self.test_author.uuid,
+            'post_serial': self.test_post1.uuid
+        })
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertNotIn('Last-Modified', response)  # its likes and comments can be removed
+
+        with self.assertNumQueries(5):  # author exists, author, post, likes and comments summaries
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        Comment.objects.create(user={"type": "author"}, post=self.test_post1, comment="New comment")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Same for the author, the likes and the comments
+        url = reverse('author_serial', kwargs={'author_serial': self.test_author.uuid})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.test_author.display_name = 'Renamed Author'
+        self.test_author.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        for name in ('get_likes_by_serial', 'comments_by_serial'):
+            url = reverse(name, kwargs={'author_serial': self.test_author.uuid, 'post_serial': self.test_post1.uuid})
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @patch('azureDSN.views.posts.AuthorPostsAllView.fetch_github_activity')
+    def test_get_posts_if_modified_since_after_delete(self, _):
+        """Deleting the newest post changes the list for a client that only sends If-Modified-Since."""
+        newest = Post.objects.create(user=self.test_author, title="Newest Post", content="The newest post.", visibility=1)
+        url = reverse('create_post', kwargs={'author_serial': self.test_author.uuid})
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        # What a client that saw the newest post would send
+        if_modified_since = http_date(newest.modified_at.timestamp())
+
+        newest.visibility = 4  # Deleted
+        newest.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=if_modified_since)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Newest Post', [post['title'] for post in response.data['src']])
+
     # get friends-only post
     def test_get_friends_only_post(self):
         """Test getting a friends-only post by author and post serial."""
@@ -213,6 +287,29 @@ class PostTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
     
     # ------------------------403 Forbidden------------------------
+    # friends-only posts are for friends, following the author is not enough, and for the nodes of remote friends
+    def test_get_friends_only_post_visibility(self):
+        url = reverse('author_post', kwargs={
+            'author_serial': self.test_author.uuid,
+            'post_serial': self.test_post2.uuid
+        })
+        Follow.objects.create(local_follower=self.test_author2, local_followee=self.test_author)
+        self.client.force_authenticate(user=self.test_author2)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        Follow.objects.create(local_follower=self.test_author, local_followee=self.test_author2)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+
+        NodeUser.objects.create(username="nodebbbb", password="secret", host="http://nodebbbb.com/api/")
+        credentials = {"HTTP_AUTHORIZATION": f"Basic {b64encode(b'nodebbbb:secret').decode()}"}
+        self.assertEqual(self.client.get(url, **credentials).status_code, status.HTTP_403_FORBIDDEN)
+
+        remote_friend = f"http://nodebbbb.com/api/authors/{uuid4()}"
+        Follow.objects.create(remote_follower=remote_friend, local_followee=self.test_author)
+        Follow.objects.create(local_follower=self.test_author, remote_followee=remote_friend)
+        self.assertEqual(self.client.get(url, **credentials).status_code, status.HTTP_200_OK)
+
     # get a friends-only post without authentication
     def test_get_friends_only_post_not_authenticated(self):
         """Test getting a friends-only post without authentication."""
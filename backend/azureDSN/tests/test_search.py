@@ -0,0 +1,85 @@
+from unittest.mock import patch
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.urls import reverse
+from ..models import Post, User, Follow, SearchDocument
+
+class SearchViewTest(APITestCase):
+    patch('azureDSN.utils.auth.TokenOrBasicAuthPermission.has_permission', return_value=True).start()
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('search')
+
+        self.author = User.objects.create_user(
+            display_name="Hedgehog Fan",
+            username="hedgehogfan",
+            password="azure404",
+            host="http://localhost:8000/",
+            bio="Writes about small animals",
+        )
+        self.friend = User.objects.create_user(
+            display_name="Friend User",
+            username="frienduser",
+            password="azure404",
+            host="http://localhost:8000/",
+        )
+        Follow.objects.create(local_follower=self.author, local_followee=self.friend)
+        Follow.objects.create(local_follower=self.friend, local_followee=self.author)
+
+        self.public_post = Post.objects.create(
+            title="Hedgehogs in winter",
+            content="Where do they sleep?",
+            user=self.author,
+            visibility=1
+        )
+        self.friends_post = Post.objects.create(
+            title="A secret",
+            description="Only for friends",
+            content="I adopted a hedgehog.",
+            user=self.author,
+            visibility=2
+        )
+        self.image_post = Post.objects.create(
+            title="A picture",
+            content_type="image/png;base64",
+            content="hedgehog",
+            user=self.author,
+            visibility=1
+        )
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_search_respects_visibility(self):
+        """Anonymous viewers only find public posts, friends also find friends-only posts, title matches come first."""
+        results = self.search(q="hedgehog", type="posts")
+        self.assertEqual([post["title"] for post in results["src"]], ["Hedgehogs in winter"])
+
+        self.client.force_authenticate(user=self.friend)
+        results = self.search(q="hedgehog", type="posts")
+        self.assertEqual(results["count"], 2)
+        self.assertEqual([post["title"] for post in results["src"]], ["Hedgehogs in winter", "A secret"])
+
+    def test_search_authors(self):
+        """Authors are found by name, username and bio, mixed with posts when searching everything."""
+        self.assertEqual([author["displayName"] for author in self.search(q="small anim", type="authors")["src"]], ["Hedgehog Fan"])
+        self.assertEqual({result["type"] for result in self.search(q="hedgehog")["src"]}, {"author", "post"})
+        self.assertEqual(self.search(q="nobody", type="authors")["count"], 0)
+
+    def test_search_index_follows_changes(self):
+        """Edited and deleted posts and authors are reindexed at once."""
+        self.public_post.title = "Foxes in winter"
+        self.public_post.save()
+        self.assertEqual([post["title"] for post in self.search(q="fox", type="posts")["src"]], ["Foxes in winter"])
+        self.assertEqual(self.search(q="hedgehog", type="posts")["count"], 0)
+
+        self.public_post.delete()
+        self.author.delete()
+        self.assertEqual(self.search(q="winter")["count"], 0)
+        self.assertEqual(list(SearchDocument.objects.values_list("object_id", flat=True)), [self.friend.uuid])
+
+    def test_search_bad_request(self):
+        self.assertEqual(self.client.get(self.url, {"q": "  !! "}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"q": "hedgehog", "type": "comments"}).status_code, status.HTTP_400_BAD_REQUEST)
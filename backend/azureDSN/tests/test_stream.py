@@ -1,7 +1,11 @@
 from unittest.mock import patch
+from django.test import override_settings
+import time
 from rest_framework.test import APITestCase, APIClient
 from django.urls import reverse
-from ..models import Post, User, Follow
+from ..models import Post, User, Follow, Inbox, RemotePost, Share, Like
+from ..utils import response_cache
+from ..views.inbox import create_inbox_item
 
 class StreamViewTest(APITestCase):
     patch('azureDSN.utils.auth.TokenOrBasicAuthPermission.has_permission', return_value=True).start()
@@ -108,6 +112,94 @@ class StreamViewTest(APITestCase):
         self.assertEqual(returned_posts[1]['title'], "Test Post 2")
         self.assertEqual(returned_posts[2]['title'], "Test Post 1")
 
+    def test_public_stream_remote_posts(self):
+        remote_post = {
+            "type": "post",
+            "title": "Remote Public Post",
+            "id": "http://remotenode/api/authors/111/posts/222",
+            "visibility": "PUBLIC",
+            "published": "2099-01-01T00:00:00+00:00",
+            "author": {"type": "author", "id": "http://remotenode/api/authors/111", "host": "http://remotenode/api/"},
+        }
+        inbox = Inbox.objects.get(user=self.user)
+        create_inbox_item(inbox, remote_payload=remote_post)
+        create_inbox_item(Inbox.objects.get(user=self.friend_user), remote_payload=remote_post)
+        self.assertEqual(RemotePost.objects.count(), 1) # cached once no matter how many inboxes received it
+
+        response = self.client.get(reverse('stream'))
+        returned_posts = response.data["src"]
+        self.assertEqual(len(returned_posts), 4)
+        self.assertEqual(returned_posts[0]['title'], "Remote Public Post")
+
+        # Deleting the remote post removes it from the stream
+        create_inbox_item(inbox, remote_payload={**remote_post, "visibility": "DELETED"}, post_status="delete")
+        response = self.client.get(reverse('stream'))
+        self.assertEqual(len(response.data["src"]), 3)
+
+    def test_public_stream_cursor(self):
+        url = reverse('stream')
+        response = self.client.get(url, {"size": 2})
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual([post['title'] for post in response.data["src"]], ["Other Public Post", "Test Post 2"])
+
+        # The cursor continues where the previous page stopped, even if a newer post was created in between
+        Post.objects.create(title="Newest Post", content="Created after the first page.", user=self.user, visibility=1)
+        response = self.client.get(url, {"size": 2, "cursor": response.data["next_cursor"]})
+        self.assertEqual([post['title'] for post in response.data["src"]], ["Test Post 1"])
+        self.assertIsNone(response.data["next_cursor"])
+
+        response = self.client.get(url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(POST_LIST_PREVIEW_LENGTH=10)
+    def test_public_stream_list_projection(self):
+        # Without the content column: a preview of text posts, the URL and size of the image of image posts
+        image_content = "iVBORw0KGgoAAAANSUhEUgAAAAUAAAAFCAYAAACNbyblAAAAHElEQVQI12P4//8/w38GIAXDIBKE0DHxgljNBAAO9TXL0Y4OHwAAAABJRU5ErkJggg=="
+        image_post = Post.objects.create(title="Image Post", content=image_content, has_image=True, content_type="image/png;base64", user=self.user)
+
+        # No query per post: the content of none of them is loaded
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('stream'), {"projection": "list"})
+        returned_posts = {post['title']: post for post in response.data["src"]}
+
+        self.assertEqual(returned_posts["Image Post"]["content"], "")
+        self.assertEqual(returned_posts["Image Post"]["contentSize"], image_post.image.size)
+        self.assertTrue(returned_posts["Image Post"]["contentUrl"].endswith(f"/api/images/{image_post.image_id}/"))
+        self.assertEqual(returned_posts["Test Post 1"]["content"], "This is a ")
+        self.assertEqual(returned_posts["Test Post 1"]["contentSize"], len(self.post_public.content))
+        self.assertEqual(returned_posts["Test Post 1"]["contentUrl"], returned_posts["Test Post 1"]["id"])
+
+        # The full content otherwise
+        response = self.client.get(reverse('stream'))
+        self.assertEqual(response.data["src"][0]["content"], image_content)
+        self.assertNotIn("contentUrl", response.data["src"][0])
+
+    def test_public_stream_cached(self):
+        # Viewers who are not logged in share the cached page until a post, like or author it shows changes
+        url = reverse('stream')
+        response_cache.metrics.reset()
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["src"]), 3)
+        self.assertEqual(response_cache.metrics.snapshot()["public_stream"], {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+
+        Like.objects.create(user={"type": "author"}, post=self.other_post_public)
+        response = self.client.get(url)
+        self.assertEqual(response.data["src"][0]["likes"]["count"], 1)
+
+        self.friend_user.display_name = "Renamed Friend"
+        self.friend_user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data["src"][0]["author"]["displayName"], "Renamed Friend")
+
+        Post.objects.filter(pk=self.post_unlisted.pk).update(visibility=1)  # no signal, only the TTL would notice
+        self.assertEqual(len(self.client.get(url).data["src"]), 3)
+
+        # Logged in viewers are never served from the cache
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(len(self.client.get(url).data["src"]), 4)
+
     def test_auth_stream_view(self):
         url = reverse('auth_stream')
 
@@ -175,4 +267,30 @@ class StreamViewTest(APITestCase):
         
         # In the frontend, you can't view the auth stream because the button is hidden, so instead of returning error code, it returns empty array
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(returned_posts), 0) # empty, because user is unauthenticated, can't fetch non-public posts as that is specific to user
\ No newline at end of file
+        self.assertEqual(len(returned_posts), 0) # empty, because user is unauthenticated, can't fetch non-public posts as that is specific to user
+
+    @override_settings(FANOUT_DEADLINE=0.5)
+    def test_auth_stream_slow_node(self):
+        Follow.objects.create(local_follower_id=self.user.uuid, local_followee_id=self.friend_user.uuid)
+        Share.objects.create(user=self.friend_user, post="http://fastnode/api/authors/1/posts/1")
+        Share.objects.create(user=self.friend_user, post="http://slownode/api/authors/2/posts/2")
+
+        def remote_get(url, **kwargs):
+            if "slownode" in url:
+                time.sleep(2)
+            response = type("Response", (), {})()
+            response.status_code = 200
+            response.json = lambda: {"type": "post", "id": url, "title": url, "published": "2099-01-01T00:00:00+00:00"}
+            return response
+
+        self.client.force_authenticate(user=self.user)
+        started = time.monotonic()
+        with patch('azureDSN.utils.federation.request', side_effect=lambda method, url, **kwargs: remote_get(url, **kwargs)):
+            response = self.client.get(reverse('auth_stream'))
+
+        # The slow node is dropped at the deadline instead of holding up the whole stream
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual(response.status_code, 200)
+        shared = [post for post in response.data["src"] if post["type"] == "shared"]
+        self.assertEqual([post["id"] for post in shared], ["http://fastnode/api/authors/1/posts/1"])
+        self.assertEqual(shared[0]["shared_by"], "Friend User")
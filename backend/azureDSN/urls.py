@@ -22,6 +22,10 @@ urlpatterns = [
     path("api/authors/<int:author_serial>/inbox/", InboxView.as_view(), name="inbox_integer"), # To connect with other groups with integer id
     path("api/authors/<uuid:author_serial>/inbox", InboxView.as_view(), name="inbox_no_slash"), # Other groups might call this
     path("api/authors/<uuid:author_serial>/inbox/paginated/", PaginatedInboxView.as_view(), name="paginated_inbox"),
+    path("api/outbox/<uuid:delivery_id>/", OutboxDeliveryView.as_view(), name="outbox_delivery"),
+
+    # Search API
+    path("api/search/", SearchView.as_view(), name="search"),
 
     # Remote API
     path("api/authors/recommended/", RemoteAuthorsView.as_view(), name="get_recommended_authors"),
@@ -42,6 +46,8 @@ urlpatterns = [
     # Image API
     path('api/authors/<uuid:author_serial>/posts/<uuid:post_serial>/image/', ImageView.as_view(), name="get_image_by_serial"),
     path('api/posts/<path:post_fqid>/image/', ImageView.as_view(), name="get_image_by_fqid"),
+    path('api/authors/<uuid:author_serial>/posts/<uuid:post_serial>/image/raw/', ImageRawView.as_view(), name="get_image_raw"),
+    path('api/images/<str:digest>/', ImageBlobView.as_view(), name="get_image_blob"),
 
     # Posts API
     path("api/authors/<uuid:author_serial>/posts/<uuid:post_serial>/", AuthorPostView.as_view(), name="author_post"),
@@ -78,6 +84,7 @@ urlpatterns = [
     path('api/nodes/add/', AddNodeView.as_view(), name="add_node"),
     path('api/nodes/update/', UpdateNodeView.as_view(), name="edit_node"),
     path('api/nodes/delete/', DeleteNodeView.as_view(), name="remove_node"),
+    path('api/nodes/metrics/', NodeMetricsView.as_view(), name="node_metrics"),
 
     # Front end injection
     path('', TemplateView.as_view(template_name='index.html')),
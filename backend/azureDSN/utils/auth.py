@@ -9,6 +9,12 @@ def is_valid_basic_auth(auth_value):
     """
         Validate Basic Auth credentials (for remote requests)
     """
+    return get_basic_auth_node(auth_value) is not None
+
+def get_basic_auth_node(auth_value):
+    """
+        Returns the NodeUser of valid Basic Auth credentials, None otherwise
+    """
     try:
         # Decode Basic Auth credentials
         decoded_credentials = b64decode(auth_value).decode('utf-8')
@@ -17,10 +23,19 @@ def is_valid_basic_auth(auth_value):
         # Validate credentials with data stored in database
         node = NodeUser.objects.get(username=username)
         if node.password == password and node.is_authenticated:
-            return True
-        return False
+            return node
+        return None
     except Exception as e:
-        return False
+        return None
+
+def get_request_node(request):
+    """
+        Returns the NodeUser a remote request authenticated as with Basic Auth, None otherwise
+    """
+    auth_header = get_authorization_header(request).split()
+    if len(auth_header) == 2 and auth_header[0].lower() == b"basic":
+        return get_basic_auth_node(auth_header[1].decode())
+    return None
 
 class TokenOrBasicAuthPermission(BasePermission):
     def has_permission(self, request, view):
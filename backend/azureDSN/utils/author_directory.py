@@ -0,0 +1,155 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from ..models import Follow, NodeUser, RemoteAuthor
+from . import url_parser, federation, node_health
+import requests, threading
+
+'''
+The federated author directory: a local copy of the authors every node lists on its /api/authors/, so listing all the
+authors we know is a query on our own database whatever the number of nodes we federate with.
+A node is synced again once its last sync is older than AUTHOR_DIRECTORY_SYNC_INTERVAL seconds: its author list is read
+page by page and upserted into RemoteAuthor by author key, and the authors it no longer lists leave the directory.
+Syncs run in the background, started by the requests that read the directory, and in the sync_author_directory command.
+'''
+
+_sync_lock = threading.Lock()
+
+
+def directory():
+    """
+    The profiles of the listed remote authors, in the order they joined the directory
+    """
+    return RemoteAuthor.objects.filter(listed=True).order_by("id").values_list("body", flat=True)
+
+
+def recommended_for(user, count):
+    """
+    `count` random authors of the directory that `user` does not follow yet, in a single query
+    """
+    followed = Follow.objects.filter(local_follower=user, remote_followee_key=OuterRef("key"))
+    return list(directory().filter(~Exists(followed)).order_by("?")[:count])
+
+
+def fetch_page(base_host, page):
+    """
+    One page of the authors of a node, returns the list of authors or None if the node did not give it
+    """
+    response = federation.get(
+        f"{base_host}/api/authors/",
+        params={"page": page, "size": settings.AUTHOR_DIRECTORY_PAGE_SIZE},
+        timeout=settings.AUTHOR_DIRECTORY_FETCH_TIMEOUT,
+    )
+    if response.status_code != 200:
+        print(f"Failed to fetch authors from {base_host}: {response.status_code}")
+        return None
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    authors = data.get("authors") if isinstance(data, dict) else data
+    return [author for author in authors or [] if isinstance(author, dict)]
+
+
+def upsert_authors(node, authors, listed_at):
+    """
+    Store the authors of one page in the directory, returns their keys
+    """
+    authors = {url_parser.author_key(author.get("id")): author for author in authors if author.get("id")}
+    authors.pop(None, None)
+    existing = RemoteAuthor.objects.in_bulk(list(authors), field_name="key")
+
+    now = timezone.now()
+    created, updated = [], []
+    for key, author in authors.items():
+        remote_author = existing.get(key) or RemoteAuthor(key=key)
+        remote_author.fqid = author["id"]
+        remote_author.body = author
+        remote_author.last_fetched = now
+        remote_author.status = RemoteAuthor.STATUS_OK
+        remote_author.node = node
+        remote_author.listed = True
+        remote_author.listed_at = listed_at
+        (updated if remote_author.pk else created).append(remote_author)
+
+    RemoteAuthor.objects.bulk_create(created)
+    RemoteAuthor.objects.bulk_update(updated, ["fqid", "body", "last_fetched", "status", "node", "listed", "listed_at"])
+    return set(authors)
+
+
+def sync_node(node):
+    """
+    Copy the author list of `node` into the directory, returns how many authors it lists or None if the sync failed.
+    The authors of a failed or truncated sync stay as they were.
+    """
+    started = timezone.now()
+    base_host = url_parser.get_base_host(node.host or "")
+    if not base_host or node_health.is_local(base_host):
+        return None
+
+    seen = set()
+    complete = False
+    try:
+        for page in range(1, settings.AUTHOR_DIRECTORY_MAX_PAGES + 1):
+            authors = fetch_page(base_host, page)
+            if authors is None:
+                break
+            keys = upsert_authors(node, authors, started)
+            if not keys - seen or len(authors) < settings.AUTHOR_DIRECTORY_PAGE_SIZE:
+                # An empty or short page is the last one, a page of authors we already have means the node ignores paging
+                complete = True
+                seen |= keys
+                break
+            seen |= keys
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching authors from node {node.host}: {e}")
+
+    if complete:
+        node.remote_authors.filter(listed=True, listed_at__lt=started).update(listed=False)
+    # Also after a failure, so a node that is down is not asked again on every request
+    NodeUser.objects.filter(pk=node.pk).update(authors_synced_at=timezone.now())
+    return len(seen) if complete else None
+
+
+def stale_nodes(max_age=None):
+    """
+    Nodes never synced or synced more than `max_age` seconds ago
+    """
+    if max_age is None:
+        max_age = settings.AUTHOR_DIRECTORY_SYNC_INTERVAL
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return NodeUser.objects.filter(Q(authors_synced_at__isnull=True) | Q(authors_synced_at__lt=cutoff)).order_by("authors_synced_at")
+
+
+def sync_stale_nodes(max_age=None):
+    """
+    Sync every stale node, returns {node: number of authors listed or None if its sync failed}
+    """
+    return {node: sync_node(node) for node in stale_nodes(max_age)}
+
+
+def _sync_in_background():
+    try:
+        sync_stale_nodes()
+    except Exception as e:
+        print(f"Error syncing the author directory: {e}")
+    finally:
+        close_old_connections()
+        _sync_lock.release()
+
+
+def schedule_sync():
+    """
+    Start a background sync after the current transaction commits if a node is stale and no sync is already running
+    """
+    if not settings.AUTHOR_DIRECTORY_BACKGROUND_SYNC or not stale_nodes().exists():
+        return
+
+    def start():
+        if not _sync_lock.acquire(blocking=False):
+            return  # another request already started one
+        threading.Thread(target=_sync_in_background, daemon=True).start()
+
+    transaction.on_commit(start)
@@ -0,0 +1,54 @@
+from collections import namedtuple
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+import hashlib
+
+'''
+Conditional GET for the read endpoints of local objects (posts, authors, likes, comments).
+A view describes the version of what it would send with values it can read cheaply: the modified_at of the objects,
+and the count and latest date of the lists they embed, each list in one aggregate query. Those values make a weak ETag.
+A Last-Modified is only sent for a single object, from its modified_at: the latest date of a list goes back in time when
+its newest item is removed or hidden, so a client asking If-Modified-Since would keep a list that changed. A client that
+sends a validator back (If-None-Match, If-Modified-Since) and still has that version gets a 304 before anything is loaded
+or serialized; otherwise the validators are added to the 200.
+Likes and comments are never edited, a list of them changes only when one is added or removed, which changes its count.
+'''
+
+Validators = namedtuple("Validators", ["etag", "last_modified"])
+
+
+def summary(queryset, date_field="created_at"):
+    """
+    (count, latest `date_field`) of `queryset`, with one aggregate query
+    """
+    totals = queryset.order_by().aggregate(count=Count("pk"), latest=Max(date_field))
+    return totals["count"], totals["latest"]
+
+
+def validators(*parts, dates=()):
+    """
+    Validators of a response made of `parts` (anything with a stable repr), last modified at the latest of `dates`,
+    which must never go back in time (no dates of lists)
+    """
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    dates = [date for date in dates if date is not None]
+    return Validators(f'W/"{digest}"', max(dates) if dates else None)
+
+
+def not_modified(request, version):
+    """
+    The 304 to send if the client of `request` already has `version`, otherwise None
+    """
+    last_modified = int(version.last_modified.timestamp()) if version.last_modified else None
+    response = get_conditional_response(request, etag=version.etag, last_modified=last_modified)
+    return with_validators(response, version) if response is not None else None
+
+
+def with_validators(response, version):
+    response["ETag"] = version.etag
+    if version.last_modified:
+        response["Last-Modified"] = http_date(version.last_modified.timestamp())
+    # What a viewer may see depends on who they are, and must be checked again before it is reused
+    response["Cache-Control"] = "private, no-cache"
+    return response
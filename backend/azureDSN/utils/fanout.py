@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import defaultdict
+from urllib.parse import urlparse
+from django.conf import settings
+import threading
+
+'''
+Runs many blocking remote calls at once so a request waits for the slowest node instead of the sum of all nodes.
+At most FANOUT_PER_HOST_LIMIT calls run against the same host at a time, so one busy node does not get flooded,
+and the whole batch is cut at a deadline: whatever finished by then is returned, the rest is dropped.
+'''
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def fan_out(tasks, deadline=None, max_workers=None, per_host_limit=None):
+    """
+    tasks: {key: (url, function)} where function() does the call for url
+    Returns {key: result} for every task that finished before the deadline without raising
+    """
+    if not tasks:
+        return {}
+
+    deadline = settings.FANOUT_DEADLINE if deadline is None else deadline
+    max_workers = max_workers or settings.FANOUT_MAX_WORKERS
+    per_host_limit = per_host_limit or settings.FANOUT_PER_HOST_LIMIT
+
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host_limit))
+    for url, _ in tasks.values():
+        host_slots[host_of(url)]  # create every semaphore before the threads start
+
+    def run(url, function):
+        with host_slots[host_of(url)]:
+            return function()
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)))
+    futures = {executor.submit(run, url, function): key for key, (url, function) in tasks.items()}
+    done, not_done = wait(futures, timeout=deadline)
+    # Don't wait for the late calls, they finish on their own within their request timeout
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    if not_done:
+        print(f"Fan-out deadline of {deadline}s reached, dropped {len(not_done)} of {len(futures)} remote call(s)")
+
+    results = {}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            print(f"Remote call to {tasks[futures[future]][0]} failed: {e}")
+    return results
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from urllib.parse import urlparse
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+import requests, os, threading, time
+
+'''
+One HTTP client for every call we make to other nodes.
+Each node gets its own requests.Session whose connection pool keeps the TCP/TLS connections alive between calls,
+instead of a new connection per call like the bare requests.get/post did. Every call gets a default timeout and
+idempotent calls are retried with backoff when the node is unreachable or answers 502/503/504.
+Our node credentials (NODE_USERNAME/NODE_PASSWORD) are read once and sent with every call unless auth=None is given.
+Usage is the same as requests: federation.get(url, params=...), federation.post(url, json=...)
+'''
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+NODE_AUTH = object()  # default value of auth: use our node credentials
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_node_auth = None
+_response_listeners = []
+
+
+def base_of(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+def node_auth():
+    """
+    Credentials we send to other nodes, resolved once per process
+    """
+    global _node_auth
+    if _node_auth is None:
+        _node_auth = HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
+    return _node_auth
+
+
+def session_for(url):
+    """
+    The pooled session of the node serving `url`, created on first use
+    """
+    base = base_of(url)
+    session = _sessions.get(base)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(base)
+            if session is None:
+                retry = Retry(
+                    total=settings.FEDERATION_RETRIES,
+                    backoff_factor=settings.FEDERATION_RETRY_BACKOFF,
+                    status_forcelist=[502, 503, 504],
+                    allowed_methods=IDEMPOTENT_METHODS,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.FEDERATION_POOL_SIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sessions[base] = session
+    return session
+
+
+def add_response_listener(listener):
+    """
+    listener(base_url, status_code or None if the node is unreachable, elapsed seconds) is called after every call
+    """
+    _response_listeners.append(listener)
+
+
+def request(method, url, auth=NODE_AUTH, timeout=None, **kwargs):
+    """
+    Same as requests.request, through the pooled session of the node
+    """
+    if auth is NODE_AUTH:
+        auth = node_auth()
+    if timeout is None:
+        timeout = settings.FEDERATION_TIMEOUT
+
+    base = base_of(url)
+    started = time.monotonic()
+    status_code = None
+    try:
+        response = session_for(url).request(method, url, auth=auth, timeout=timeout, **kwargs)
+        status_code = response.status_code
+        return response
+    finally:
+        elapsed = time.monotonic() - started
+        metrics.record(base, elapsed, status_code)
+        for listener in _response_listeners:
+            try:
+                listener(base, status_code, elapsed)
+            except Exception as e:
+                print(f"Federation response listener failed: {e}")
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+class FederationMetrics:
+    """
+    Per node counters: calls, failures, latency, and how many calls reused a pooled connection
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = defaultdict(lambda: {"requests": 0, "errors": 0, "total_latency": 0.0, "max_latency": 0.0})
+
+    def record(self, base, elapsed, status_code):
+        with self._lock:
+            host = self._hosts[base]
+            host["requests"] += 1
+            if status_code is None or status_code >= 500:
+                host["errors"] += 1
+            host["total_latency"] += elapsed
+            host["max_latency"] = max(host["max_latency"], elapsed)
+
+    def pool_stats(self, base):
+        """
+        Connections opened vs requests sent by the connection pools of a node, every request above the
+        number of connections opened went through an already open connection (a pool hit)
+        """
+        session = _sessions.get(base)
+        if session is None:
+            return {"connections_opened": 0, "pool_hits": 0}
+
+        opened, sent = 0, 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return {"connections_opened": opened, "pool_hits": max(sent - opened, 0)}
+
+    def snapshot(self):
+        with self._lock:
+            hosts = {base: dict(values) for base, values in self._hosts.items()}
+
+        snapshot = {}
+        for base, values in hosts.items():
+            snapshot[base] = {
+                "requests": values["requests"],
+                "errors": values["errors"],
+                "avg_latency_ms": round(values["total_latency"] / values["requests"] * 1000, 1),
+                "max_latency_ms": round(values["max_latency"] * 1000, 1),
+                **self.pool_stats(base),
+            }
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+metrics = FederationMetrics()
@@ -0,0 +1,103 @@
+from collections import namedtuple
+from django.conf import settings
+from django.db.models import Q
+from ..models import Follow
+import threading, time, uuid
+
+'''
+Answers who follows whom and who is friends with whom (two authors following each other) from memory.
+The relations of an author are loaded with one query the first time they are needed and kept until a Follow of that
+author is saved or deleted (see utils/signal.py). The cache is per process: another worker only learns about a change
+when its entry expires, after FRIENDSHIP_CACHE_TTL seconds.
+Local authors are identified by their uuid, remote authors by their url_parser.author_key.
+'''
+
+MAX_ENTRIES = 10000  # authors kept at once, the cache starts over when it is full
+
+Relations = namedtuple("Relations", ["followees", "followers", "remote_followees", "remote_followers", "loaded_at"])
+
+_relations = {}  # user uuid -> Relations
+_generation = 0  # number of invalidations, an entry loaded while one happened is not kept
+_lock = threading.Lock()
+
+
+def _user_id(user):
+    user_id = getattr(user, "uuid", user)
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+
+def relations_of(user):
+    """
+    Returns the Relations of the local author `user` (a User or its uuid)
+    """
+    user_id = _user_id(user)
+    entry = _relations.get(user_id)
+    if entry is not None and time.monotonic() - entry.loaded_at < settings.FRIENDSHIP_CACHE_TTL:
+        return entry
+
+    generation = _generation
+    followees, followers, remote_followees, remote_followers = set(), set(), {}, {}
+    follows = Follow.objects.filter(Q(local_follower=user_id) | Q(local_followee=user_id)).values_list(
+        "local_follower_id", "local_followee_id", "remote_follower_key", "remote_follower", "remote_followee_key", "remote_followee"
+    )
+    for follower_id, followee_id, follower_key, follower_url, followee_key, followee_url in follows:
+        if follower_id == user_id:
+            if followee_id is not None:
+                followees.add(followee_id)
+            elif followee_key:
+                remote_followees[followee_key] = followee_url
+        if followee_id == user_id:
+            if follower_id is not None:
+                followers.add(follower_id)
+            elif follower_key:
+                remote_followers[follower_key] = follower_url
+
+    entry = Relations(frozenset(followees), frozenset(followers), remote_followees, remote_followers, time.monotonic())
+    with _lock:
+        if _generation == generation:
+            if len(_relations) >= MAX_ENTRIES:
+                _relations.clear()
+            _relations[user_id] = entry
+    return entry
+
+
+def followees_of(user):
+    """
+    The local authors `user` follows
+    """
+    return relations_of(user).followees
+
+
+def friends_of(user):
+    """
+    The local authors `user` follows and who follow `user` back
+    """
+    relations = relations_of(user)
+    return relations.followees & relations.followers
+
+
+def remote_friends_of(user):
+    """
+    The URLs of the remote authors `user` follows and who follow `user` back
+    """
+    relations = relations_of(user)
+    return [url for key, url in relations.remote_followers.items() if key in relations.remote_followees]
+
+
+def invalidate(*users):
+    """
+    Forget the relations of these authors, called when one of their follows changes
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        for user in users:
+            if user is not None:
+                _relations.pop(_user_id(user), None)
+
+
+def clear():
+    global _generation
+    with _lock:
+        _generation += 1
+        _relations.clear()
@@ -0,0 +1,51 @@
+from django.contrib.contenttypes.models import ContentType
+from ..models import InboxItem, FollowRequest, Post, Comment, Like, Share
+from collections import defaultdict
+from . import post_projection
+
+'''
+Loads the content of many inbox items at once. Reading item.content_object one item at a time costs one query per item,
+plus one more per item for the author of the post its serializer needs. Here the items are grouped by content type and
+each group is loaded with one in_bulk query that also joins what its serializer reads, so a page of items costs one
+query per content type whatever its size. Posts can be loaded in their list projection, see utils/post_projection.py.
+'''
+
+# What the serializer of each content type reads besides the object itself
+CONTENT_QUERYSETS = {
+    FollowRequest: lambda: FollowRequest.objects.select_related("object"),
+    Post: lambda: Post.objects.select_related("user", "image"),
+    Comment: lambda: Comment.objects.select_related("post__user"),
+    Like: lambda: Like.objects.select_related("post__user"),
+    Share: lambda: Share.objects.select_related("user", "receiver"),
+}
+
+_content_object = InboxItem._meta.get_field("content_object")
+
+
+def load_content_objects(inbox_items, projection=None):
+    """
+    Fill item.content_object of every item with one query per content type, items whose content was deleted get None
+    """
+    object_ids = defaultdict(set)
+    for item in inbox_items:
+        if item.content_type_id is not None and item.object_id is not None and not _content_object.is_cached(item):
+            object_ids[item.content_type_id].add(item.object_id)
+
+    objects = {}
+    for content_type_id, ids in object_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        queryset = CONTENT_QUERYSETS[model]() if model in CONTENT_QUERYSETS else model._default_manager.all()
+        if model is Post and projection == post_projection.LIST:
+            # The list projection reads only the size and digest of the image, not its bytes
+            queryset = post_projection.for_list(Post.objects.select_related("user"))
+        # Follow requests and shares have integer keys, stored in object_id as UUID(int=id)
+        to_pk = model._meta.pk.to_python
+        loaded = queryset.in_bulk([to_pk(object_id) for object_id in ids])
+        for object_id in ids:
+            objects[(content_type_id, object_id)] = loaded.get(to_pk(object_id))
+
+    for item in inbox_items:
+        key = (item.content_type_id, item.object_id)
+        if key in objects:
+            _content_object.set_cached_value(item, objects[key])
+    return inbox_items
@@ -0,0 +1,120 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from uuid import UUID
+import base64, heapq, json
+
+'''
+Merges several querysets into one stream ordered by publication date, newest first, without loading them in memory.
+Every source is ordered by (published, key) in the database, the sources are then merged with a k-way merge that stops
+as soon as one page is filled, so a page costs at most `limit` rows per source whatever the size of the tables.
+Ties on the publication date are broken by the rank of the source then by the key, which makes the order total and lets
+a page be resumed from a cursor: the (published, rank, key) of the last item of the previous page.
+'''
+class StreamSource:
+    def __init__(self, queryset, rank, published_field, key_field, serialize):
+        """
+        queryset: the rows of this source, already filtered (e.g. by visibility)
+        rank: tie breaker between sources, must be different for every source of a stream
+        published_field, key_field: the fields the source is ordered by, key_field must be a unique integer or UUID
+        serialize: function turning a list of rows of this source into a list of JSON objects
+        """
+        self.queryset = queryset.filter(**{f"{published_field}__isnull": False})
+        self.rank = rank
+        self.published_field = published_field
+        self.key_field = key_field
+        self.serialize = serialize
+
+    def sort_key(self, row):
+        key = getattr(row, self.key_field)
+        if isinstance(key, UUID):
+            key = str(key)  # same order as the database, and can be stored in a cursor
+        return (getattr(row, self.published_field), self.rank, key)
+
+    def after(self, cursor):
+        """
+        Rows that come after the cursor in the stream order
+        """
+        if cursor is None:
+            return self.queryset
+
+        published, rank, key = cursor
+        older = Q(**{f"{self.published_field}__lt": published})
+        same_date = Q(**{self.published_field: published})
+        if self.rank < rank:
+            return self.queryset.filter(older | same_date)
+        if self.rank == rank:
+            return self.queryset.filter(older | (same_date & Q(**{f"{self.key_field}__lt": key})))
+        return self.queryset.filter(older)
+
+    def rows(self, cursor, limit):
+        queryset = self.after(cursor).order_by(f"-{self.published_field}", f"-{self.key_field}")
+        for row in queryset[:limit]:
+            yield (self.sort_key(row), self.rank, row)
+
+    def count(self):
+        return self.queryset.count()
+
+
+class MergedStream:
+    def __init__(self, sources):
+        self.sources = sources
+
+    def count(self):
+        return sum(source.count() for source in self.sources)
+
+    def page(self, size, offset=0, cursor=None):
+        """
+        Returns (items, next_cursor) for `size` items after skipping `offset` items following the cursor
+        next_cursor is None when there is nothing after this page
+        """
+        limit = offset + size + 1  # one extra row tells us whether there is a next page
+        merged = heapq.merge(
+            *(source.rows(cursor, limit) for source in self.sources),
+            key=lambda entry: entry[0],
+            reverse=True,
+        )
+
+        entries = []
+        for index, entry in enumerate(merged):
+            if index >= limit:
+                break
+            if index >= offset:
+                entries.append(entry)
+
+        has_next = len(entries) > size
+        entries = entries[:size]
+        next_cursor = encode_cursor(entries[-1][0]) if has_next and entries else None
+        return self.serialize(entries), next_cursor
+
+    def serialize(self, entries):
+        """
+        Serialize the rows of each source in one batch, then put them back in stream order
+        """
+        sources = {source.rank: source for source in self.sources}
+        serialized = {}
+        for rank, source in sources.items():
+            rows = [row for _, row_rank, row in entries if row_rank == rank]
+            if rows:
+                serialized[rank] = iter(source.serialize(rows))
+        return [next(serialized[rank]) for _, rank, _ in entries]
+
+
+def encode_cursor(sort_key):
+    published, rank, key = sort_key
+    data = json.dumps({"p": published.isoformat(), "r": rank, "k": key})
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (published, rank, key) encoded in the cursor, raises ValueError if the cursor is malformed
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        published = parse_datetime(data["p"])
+        rank, key = int(data["r"]), data["k"]
+    except (TypeError, KeyError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if published is None or not isinstance(key, (int, str)):
+        raise ValueError("Invalid cursor")
+    return (published, rank, key)
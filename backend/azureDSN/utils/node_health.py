@@ -0,0 +1,133 @@
+from django.conf import settings
+from . import federation, url_parser
+import threading, time
+
+'''
+Remembers which remote nodes we can currently talk to, so views can hide the items of an unreachable node without
+probing it on every request. A successful federation call marks its node up, only a failed background probe marks it
+down: a node may well answer 5xx for one resource (e.g. Whitesmoke for friends-only posts) while being fine.
+Nodes are probed in the background when their status is unknown or older than NODE_HEALTH_TTL seconds. Looking a node
+up never does network I/O: an unknown node, or one whose bad status has expired, is assumed reachable until probed.
+The registry is per process, every worker learns the status of the nodes it talks to.
+'''
+
+UP = "up"
+FORBIDDEN = "forbidden"  # the node answers but does not let us in (401/403)
+DOWN = "down"  # the probe could not reach it, timed out or got a 5xx
+
+_statuses = {}  # base url -> (status, time.monotonic() of the last update)
+_probing = set()
+_lock = threading.Lock()
+
+
+def set_status(base, status):
+    with _lock:
+        _statuses[base.rstrip("/").lower()] = (status, time.monotonic())
+
+
+def get_status(base):
+    """
+    Returns (status, age in seconds) or (None, None) if we know nothing about the node
+    """
+    entry = _statuses.get(base.rstrip("/").lower())
+    if entry is None:
+        return None, None
+    status, updated_at = entry
+    return status, time.monotonic() - updated_at
+
+
+def is_local(base):
+    return base.strip().rstrip("/").lower() == settings.BASE_URL.strip().rstrip("/").lower()
+
+
+def is_reachable(base):
+    """
+    O(1) check used when rendering, schedules a probe in the background if the status is unknown or expired
+    """
+    if not base or is_local(base):
+        return True
+
+    status, age = get_status(base)
+    if status is None or age > settings.NODE_HEALTH_TTL:
+        schedule_probe(base)
+        return True
+    return status == UP
+
+
+def unreachable_hosts():
+    """
+    Nodes we know we cannot reach right now, to exclude their items in a query. A status older than NODE_HEALTH_TTL
+    doesn't count: the items of the node are shown again while it is probed in the background.
+    """
+    unreachable = []
+    now = time.monotonic()
+    for base, (status, updated_at) in list(_statuses.items()):
+        if status == UP:
+            continue
+        if now - updated_at > settings.NODE_HEALTH_TTL:
+            schedule_probe(base)
+        else:
+            unreachable.append(base)
+    return unreachable
+
+
+def is_reachable_url(url):
+    return is_reachable(url_parser.get_base_host(url)) if url else True
+
+
+def probe(base):
+    """
+    Any endpoint is fine to check that the node answers us, the authors list is the cheapest one
+    """
+    try:
+        response = federation.get(f"{base}/api/authors/?page=1&size=1", timeout=settings.NODE_HEALTH_PROBE_TIMEOUT)
+        if response.status_code == 200:
+            set_status(base, UP)
+        elif response.status_code in (401, 403):
+            set_status(base, FORBIDDEN)
+        else:
+            set_status(base, DOWN)
+    except Exception as e:
+        print(f"Error occurred while probing {base}: {e}")
+        set_status(base, DOWN)
+
+
+def _probe_in_background(base):
+    try:
+        probe(base)
+    finally:
+        with _lock:
+            _probing.discard(base)
+
+
+def schedule_probe(base):
+    base = base.rstrip("/").lower()
+    with _lock:
+        if base in _probing:
+            return  # already being probed
+        _probing.add(base)
+    threading.Thread(target=_probe_in_background, args=(base,), daemon=True).start()
+
+
+def record_response(base, status_code, elapsed):
+    """
+    Passive update from a real federation call. An answer proves the node is up, a failure on a specific resource
+    (401/403, 5xx, timeout) does not tell us much about the node: only the probe decides that it is down or refuses us.
+    """
+    if status_code is not None and status_code < 500 and status_code not in (401, 403):
+        set_status(base, UP)
+
+
+def snapshot():
+    return {
+        base: {"status": status, "age_seconds": round(time.monotonic() - updated_at, 1)}
+        for base, (status, updated_at) in list(_statuses.items())
+    }
+
+
+def reset():
+    with _lock:
+        _statuses.clear()
+
+
+federation.add_response_listener(record_response)
@@ -0,0 +1,228 @@
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from ..models import Follow, OutboxDelivery
+from . import federation, url_parser
+import requests, threading
+
+'''
+Sends the activities queued in OutboxDelivery to the remote inboxes, out of the request of the user who created them.
+A run claims the due deliveries, sends them with at most OUTBOX_PER_HOST_LIMIT calls at a time to the same node, and
+reschedules the failed ones with exponential backoff (OUTBOX_RETRY_BASE seconds, doubled after every attempt).
+A delivery refused by the remote node (4xx) or out of attempts is dead: it stays in the table with its last error.
+The Follow saved when one of our authors asked to follow a remote author is deleted when that request dies, so we don't
+show a follow the remote node never heard of.
+Deliveries are sent at least once, a node that accepted a delivery but timed out answering may receive it twice.
+Runs happen right after the request that queued an activity (OUTBOX_BACKGROUND_DELIVERY) and in the deliver_outbox worker,
+which is also what sends the retries.
+'''
+
+_delivery_lock = threading.Lock()
+DUE_STATUSES = [OutboxDelivery.STATUS_PENDING, OutboxDelivery.STATUS_SENDING]
+
+
+def enqueue(activity_type, url, payload, method="POST", precondition_url=""):
+    """
+    Queue `payload` to be sent to the remote inbox at `url`, returns the delivery
+    """
+    delivery = OutboxDelivery.objects.create(
+        activity_type=activity_type.lower(),
+        method=method.upper(),
+        url=url,
+        host=federation.base_of(url),
+        payload=payload,
+        precondition_url=precondition_url or "",
+    )
+    schedule_delivery()
+    return delivery
+
+
+def enqueue_many(activities):
+    """
+    Queue many (activity_type, url, payload, method) with a single insert, returns the deliveries
+    """
+    deliveries = OutboxDelivery.objects.bulk_create([
+        OutboxDelivery(
+            activity_type=activity_type.lower(),
+            method=method.upper(),
+            url=url,
+            host=federation.base_of(url),
+            payload=payload,
+        )
+        for activity_type, url, payload, method in activities
+    ])
+    if deliveries:
+        schedule_delivery()
+    return deliveries
+
+
+def retry_delay(attempts):
+    """
+    Seconds to wait after the `attempts`th failed attempt
+    """
+    return min(settings.OUTBOX_RETRY_BASE * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX)
+
+
+def is_permanent_failure(status_code):
+    # The node understood us and refused, sending the same activity again won't change its mind
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (408, 425, 429)
+
+
+def claim_due_deliveries(limit=None):
+    """
+    Mark up to `limit` due deliveries as sending and return them. A sending delivery whose lease ended belongs to a
+    worker that died, it is due again. Each delivery is claimed by a single worker even if several run at once.
+    """
+    now = timezone.now()
+    due = (
+        OutboxDelivery.objects.filter(status__in=DUE_STATUSES, next_attempt_at__lte=now)
+        .order_by("next_attempt_at")
+        .values_list("pk", flat=True)[:limit]
+    )
+
+    lease_end = now + timedelta(seconds=settings.OUTBOX_LEASE)
+    claimed = []
+    for pk in list(due):
+        # Only one of two racing workers matches the row, the other one sees the new next_attempt_at
+        if OutboxDelivery.objects.filter(pk=pk, status__in=DUE_STATUSES, next_attempt_at__lte=now).update(
+            status=OutboxDelivery.STATUS_SENDING, next_attempt_at=lease_end
+        ):
+            claimed.append(pk)
+    return list(OutboxDelivery.objects.filter(pk__in=claimed).order_by("created_at"))
+
+
+def deliver(delivery):
+    """
+    Send one claimed delivery and record the outcome, returns its new status
+    """
+    delivery.attempts += 1
+    try:
+        if delivery.precondition_url:
+            check = federation.get(delivery.precondition_url, timeout=settings.OUTBOX_DELIVERY_TIMEOUT)
+            if check.status_code == 404:
+                return finish(delivery, OutboxDelivery.STATUS_SKIPPED, check.status_code)
+
+        response = federation.request(
+            delivery.method,
+            delivery.url,
+            json=delivery.payload,
+            timeout=settings.OUTBOX_DELIVERY_TIMEOUT,
+        )
+    except requests.exceptions.RequestException as e:
+        return fail(delivery, None, str(e))
+
+    if 200 <= response.status_code < 300:
+        return finish(delivery, OutboxDelivery.STATUS_DELIVERED, response.status_code)
+    return fail(delivery, response.status_code, response.text[:1000])
+
+
+def finish(delivery, delivery_status, status_code):
+    delivery.status = delivery_status
+    delivery.last_status_code = status_code
+    delivery.last_error = ""
+    delivery.delivered_at = timezone.now() if delivery_status == OutboxDelivery.STATUS_DELIVERED else None
+    delivery.save(update_fields=["status", "attempts", "last_status_code", "last_error", "delivered_at"])
+    return delivery.status
+
+
+def fail(delivery, status_code, error):
+    print(f"Delivery of {delivery.activity_type} to {delivery.url} failed ({status_code}): {error}")
+    delivery.last_status_code = status_code
+    delivery.last_error = error
+    if is_permanent_failure(status_code) or delivery.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        delivery.status = OutboxDelivery.STATUS_DEAD
+    else:
+        delivery.status = OutboxDelivery.STATUS_PENDING
+        delivery.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(delivery.attempts))
+    delivery.save(update_fields=["status", "attempts", "last_status_code", "last_error", "next_attempt_at"])
+    if delivery.status == OutboxDelivery.STATUS_DEAD and delivery.activity_type == "follow":
+        withdraw_follow(delivery)
+    return delivery.status
+
+
+def withdraw_follow(delivery):
+    """
+    Delete the Follow of the dead follow request `delivery`, unless an earlier request of the same follow got through
+    """
+    try:
+        actor_id, object_id = delivery.payload["actor"]["id"], delivery.payload["object"]["id"]
+    except (KeyError, TypeError):
+        return
+    if OutboxDelivery.objects.filter(
+        activity_type="follow",
+        status=OutboxDelivery.STATUS_DELIVERED,
+        payload__actor__id=actor_id,
+        payload__object__id=object_id,
+    ).exists():
+        return
+    Follow.objects.filter(
+        local_follower_id=url_parser.extract_uuid(actor_id),
+        remote_followee_key=url_parser.author_key(object_id),
+    ).delete()
+
+
+def deliver_due(limit=None):
+    """
+    Send the due deliveries, returns how many ended up in each status
+    """
+    deliveries = claim_due_deliveries(limit or settings.OUTBOX_BATCH)
+    if not deliveries:
+        return Counter()
+
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(settings.OUTBOX_PER_HOST_LIMIT))
+    for delivery in deliveries:
+        host_slots[delivery.host]  # create every semaphore before the threads start
+
+    def run(delivery):
+        try:
+            with host_slots[delivery.host]:
+                return deliver(delivery)
+        except Exception as e:
+            # Leave it claimed, it is due again once its lease ends
+            print(f"Delivery of {delivery.activity_type} to {delivery.url} crashed: {e}")
+            return OutboxDelivery.STATUS_SENDING
+        finally:
+            connection.close()  # every thread has its own database connection
+
+    with ThreadPoolExecutor(max_workers=min(settings.OUTBOX_MAX_WORKERS, len(deliveries))) as executor:
+        return Counter(executor.map(run, deliveries))
+
+
+def requeue_dead(host=None):
+    """
+    Give the dead deliveries (to `host` only if given) a new set of attempts, returns how many were requeued
+    """
+    dead = OutboxDelivery.objects.filter(status=OutboxDelivery.STATUS_DEAD)
+    if host:
+        dead = dead.filter(host=federation.base_of(host))
+    return dead.update(status=OutboxDelivery.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now())
+
+
+def _deliver_in_background():
+    try:
+        while deliver_due():
+            pass  # deliveries queued while this run was sending are picked up by the next one
+    except Exception as e:
+        print(f"Error delivering the outbox: {e}")
+    finally:
+        close_old_connections()
+        _delivery_lock.release()
+
+
+def schedule_delivery():
+    """
+    Start a background run after the current transaction commits so it sees the queued delivery,
+    unless a run is already going on
+    """
+    if not settings.OUTBOX_BACKGROUND_DELIVERY:
+        return
+
+    def start():
+        if not _delivery_lock.acquire(blocking=False):
+            return
+        threading.Thread(target=_deliver_in_background, daemon=True).start()
+
+    transaction.on_commit(start)
@@ -0,0 +1,114 @@
+from django.contrib.contenttypes.models import ContentType
+from ..models import Follow, Inbox, InboxItem, Post
+from ..models.inbox_item import describe_item
+from ..serializers import PostSerializer
+from . import outbox, url_parser
+
+'''
+Sends a post of a local author to the inboxes of the authors who can see it when the post is created, edited or deleted.
+This used to be done by the browser with one inbox call per follower, so publishing to 500 followers was 500 API calls.
+Now the recipients come from the Follow table: every follower for public and unlisted posts, only friends (followers the
+author follows back) for friends-only posts. Local inboxes are written with a few bulk queries, remote inboxes get
+one delivery each in the outbox, queued with a single insert and sent in the background per node.
+'''
+
+FOLLOWERS_VISIBILITIES = (1, 3)  # PUBLIC and UNLISTED
+FRIENDS_VISIBILITY = 2
+DELETED_VISIBILITY = 4
+
+
+def audience(author, visibility):
+    """
+    Returns (local user ids, remote author FQIDs) a post of `author` with `visibility` is sent to
+    """
+    if visibility not in FOLLOWERS_VISIBILITIES and visibility != FRIENDS_VISIBILITY:
+        return set(), set()
+
+    followers = Follow.objects.filter(local_followee=author)
+    local_ids = set(followers.exclude(local_follower=None).values_list("local_follower_id", flat=True))
+    remote_ids = dict(followers.exclude(remote_follower_key=None).values_list("remote_follower_key", "remote_follower"))
+
+    if visibility == FRIENDS_VISIBILITY:
+        following = Follow.objects.filter(local_follower=author)
+        local_ids &= set(following.exclude(local_followee=None).values_list("local_followee_id", flat=True))
+        # Remote friends are matched by key, the two follows may spell the author's URL differently
+        friend_keys = set(following.exclude(remote_followee_key=None).values_list("remote_followee_key", flat=True))
+        remote_ids = {key: url for key, url in remote_ids.items() if key in friend_keys}
+
+    local_ids.discard(author.uuid)
+    return local_ids, set(remote_ids.values())
+
+
+def fan_out_post(post, previous_visibility=None, created=False):
+    """
+    Send the new version of `post` to its audience. A deleted post goes to everyone who could see it, and an edit that
+    narrows the visibility (e.g. public to friends-only) is sent as a delete to the followers who can't see it anymore.
+    """
+    if post.github_id:
+        return  # GitHub activity is imported in bulk, it is only shown on the profile and in the streams
+
+    if created:
+        post_status, (local_ids, remote_ids) = None, audience(post.user, post.visibility)
+        removed_local, removed_remote = set(), set()
+    elif post.visibility == DELETED_VISIBILITY:
+        if previous_visibility == DELETED_VISIBILITY:
+            return
+        post_status, (local_ids, remote_ids) = "delete", audience(post.user, previous_visibility)
+        removed_local, removed_remote = set(), set()
+    else:
+        post_status, (local_ids, remote_ids) = "update", audience(post.user, post.visibility)
+        previous_local, previous_remote = audience(post.user, previous_visibility)
+        removed_local, removed_remote = previous_local - local_ids, previous_remote - remote_ids
+
+    deliver_locally(post, local_ids, post_status)
+    deliver_locally(post, removed_local, "delete")
+
+    payload = dict(PostSerializer(post).data)
+    deleted_payload = {**payload, "visibility": "DELETED"}
+    deliver_remotely(remote_ids, payload, post_status)
+    deliver_remotely(removed_remote, deleted_payload, "delete")
+
+
+def deliver_locally(post, user_ids, post_status):
+    """
+    Add the post to the inbox of every local user in `user_ids`, with the same statuses as InboxView.put/delete_post:
+    the previous versions are marked edited on update and removed on delete
+    """
+    inboxes = list(Inbox.objects.filter(user_id__in=user_ids))
+    if not inboxes:
+        return
+
+    content_type = ContentType.objects.get_for_model(Post)
+    previous_items = InboxItem.objects.filter(inbox__in=inboxes)
+    if post_status == "delete":
+        previous_items.of_post(post.uuid).delete()  # every inbox here gets a new delete notice
+    elif post_status == "update":
+        previous_items.supersede_post(post.uuid)
+
+    # bulk_create skips InboxItem.save, so the type and origin are filled here
+    item_type, origin_host = describe_item(post)
+    InboxItem.objects.bulk_create([
+        InboxItem(
+            inbox=inbox,
+            content_type=content_type,
+            object_id=post.uuid,
+            post_status=post_status,
+            item_type=item_type,
+            origin_host=origin_host,
+        )
+        for inbox in inboxes
+    ])
+
+
+def deliver_remotely(author_fqids, payload, post_status):
+    """
+    Queue the post for the inbox of every remote author in `author_fqids`
+    """
+    activities = []
+    for author_fqid in sorted(author_fqids):
+        base_host = url_parser.get_base_host(author_fqid)
+        # Nodes sharing our code base take PUT/DELETE for edits and deletions, the other groups only take POST
+        method = {None: "POST", "update": "PUT", "delete": "DELETE"}[post_status] if "azure" in base_host else "POST"
+        inbox_url = f"{base_host}/api/authors/{url_parser.extract_uuid(author_fqid)}/inbox"
+        activities.append(("post", inbox_url, payload, method))
+    outbox.enqueue_many(activities)
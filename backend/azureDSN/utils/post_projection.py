@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Length, Substr
+from ..models import ImageBlob
+
+'''
+The list projection of posts, for clients that only show cards: `?projection=list` on the endpoints listing posts.
+The content column is left out of the query. Text posts come with the first POST_LIST_PREVIEW_LENGTH characters of their
+content, image posts with no content at all but the URL of their bytes (see ImageBlobView). Both have a contentSize
+(bytes of the image, characters of the text) and a contentUrl where the whole content can be read when it was cut.
+Without the parameter, and always for a single post, posts are sent whole as other nodes expect.
+'''
+
+PARAMETER = "projection"
+LIST = "list"
+
+
+def of(request):
+    """
+    The projection asked for by `request`, LIST or None
+    """
+    return LIST if request is not None and request.query_params.get(PARAMETER) == LIST else None
+
+
+def for_list(queryset):
+    """
+    `queryset` of posts without their content, with the preview and size of the content computed by the database
+    """
+    return queryset.defer("content").annotate(
+        content_preview=Substr(Coalesce("content", Value("")), 1, settings.POST_LIST_PREVIEW_LENGTH),
+        content_size=Coalesce(F("image__size"), Length("content"), Value(0)),
+    )
+
+
+def list_content(post, post_url):
+    """
+    The content fields of `post` in the list projection, `post` comes from for_list
+    """
+    if post.image_id:
+        return {"content": "", "contentUrl": ImageBlob.url_of(post.image_id), "contentSize": post.content_size}
+    cut = post.content_size > len(post.content_preview)
+    return {"content": post.content_preview, "contentUrl": post_url if cut else None, "contentSize": post.content_size}
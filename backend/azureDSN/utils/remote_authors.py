@@ -0,0 +1,152 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from functools import partial
+from ..models import RemoteAuthor
+from . import url_parser, federation
+from .fanout import fan_out
+import requests, threading
+
+'''
+Keeps the RemoteAuthor cache of remote profiles used by the follower, followee and friend lists.
+A list is answered from the cache: only the profiles never seen before are fetched while the request waits, all at
+once within REMOTE_AUTHOR_FETCH_DEADLINE seconds, and the ones older than REMOTE_AUTHOR_TTL are served as they are and
+refetched by a background refresh. A failed fetch keeps the last profile we got and is retried after
+REMOTE_AUTHOR_RETRY_AFTER seconds, so an unreachable node is not asked on every request but its authors come back soon
+after it does. A profile that missed the deadline of a request is retried by the refresh that runs right after it.
+'''
+
+_refresh_lock = threading.Lock()
+
+
+def profile_url(fqid):
+    """
+    The author endpoint of the node of `fqid`
+    """
+    fqid = url_parser.percent_decode(fqid)
+    return f"{url_parser.get_base_host(fqid)}/api/authors/{url_parser.extract_uuid(fqid)}/"
+
+
+def fetch_profile(fqid):
+    """
+    GET the profile of `fqid` from its node, returns the profile or None. Runs in the fan-out threads: no database access
+    """
+    url = profile_url(fqid)
+    try:
+        response = federation.get(url, timeout=settings.REMOTE_AUTHOR_FETCH_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching remote author {fqid}: {e}")
+        return None
+
+    if response.status_code != 200:
+        print(f"Failed to fetch author {url}. Status code: {response.status_code}")
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def fetch_profiles(fqids, deadline=None, retry_late=True):
+    """
+    Fetch the profiles of `fqids` from their nodes at once and store them, returns {key: RemoteAuthor}.
+    A profile that failed keeps its previous body (failed if there was none) and is stale after REMOTE_AUTHOR_RETRY_AFTER
+    seconds. One that missed the deadline is left stale for the next refresh, or handled as failed if not `retry_late`.
+    """
+    fqids = {url_parser.author_key(fqid): fqid for fqid in map(url_parser.percent_decode, fqids)}
+    fqids.pop(None, None)
+    if not fqids:
+        return {}
+
+    if deadline is None:
+        deadline = settings.REMOTE_AUTHOR_FETCH_DEADLINE
+    tasks = {key: (profile_url(fqid), partial(fetch_profile, fqid)) for key, fqid in fqids.items()}
+    profiles = fan_out(tasks, deadline=deadline)
+
+    now = timezone.now()
+    # Backdated so the entry turns stale REMOTE_AUTHOR_RETRY_AFTER seconds from now instead of REMOTE_AUTHOR_TTL
+    retry_at = now - timedelta(seconds=max(settings.REMOTE_AUTHOR_TTL - settings.REMOTE_AUTHOR_RETRY_AFTER, 0))
+    remote_authors = {}
+    for key, fqid in fqids.items():
+        body = profiles.get(key)
+        if body is not None:
+            fields = {"fqid": fqid, "body": body, "last_fetched": now, "status": RemoteAuthor.STATUS_OK}
+            create_defaults = fields
+        else:
+            late = key not in profiles and retry_late
+            fields = {"last_fetched": None if late else retry_at}
+            create_defaults = {"fqid": fqid, "status": RemoteAuthor.STATUS_FAILED, **fields}
+        remote_authors[key], _ = RemoteAuthor.objects.update_or_create(key=key, defaults=fields, create_defaults=create_defaults)
+    return remote_authors
+
+
+def get_profiles(fqids):
+    """
+    The profiles of the remote authors `fqids`, in the same order, leaving out the ones we could never fetch
+    """
+    keys = [url_parser.author_key(url_parser.percent_decode(fqid)) for fqid in fqids]
+    remote_authors = RemoteAuthor.objects.in_bulk([key for key in keys if key], field_name="key")
+
+    missing = [fqid for fqid, key in zip(fqids, keys) if key and key not in remote_authors]
+    remote_authors.update(fetch_profiles(missing))
+
+    cutoff = timezone.now() - timedelta(seconds=settings.REMOTE_AUTHOR_TTL)
+    if any(remote_author.last_fetched is None or remote_author.last_fetched < cutoff for remote_author in remote_authors.values()):
+        schedule_refresh()
+
+    profiles = []
+    for key in dict.fromkeys(keys):
+        remote_author = remote_authors.get(key)
+        if remote_author is not None and remote_author.body:
+            profiles.append(remote_author.body)
+    return profiles
+
+
+def stale_remote_authors(max_age=None):
+    """
+    Profiles that were never fetched or were fetched more than `max_age` seconds ago
+    """
+    if max_age is None:
+        max_age = settings.REMOTE_AUTHOR_TTL
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return RemoteAuthor.objects.filter(Q(last_fetched__isnull=True) | Q(last_fetched__lt=cutoff)).order_by("last_fetched")
+
+
+def refresh_stale_remote_authors(max_age=None, limit=None):
+    """
+    Refetch the stale profiles, returns how many profiles were refreshed
+    """
+    remote_authors = stale_remote_authors(max_age)
+    if limit:
+        remote_authors = remote_authors[:limit]
+    # Missing the deadline here is a failure too, or a slow node would be refetched over and over
+    return len(fetch_profiles([remote_author.fqid for remote_author in remote_authors], retry_late=False))
+
+
+def _refresh_in_background():
+    try:
+        refresh_stale_remote_authors(limit=settings.REMOTE_AUTHOR_REFRESH_BATCH)
+    except Exception as e:
+        print(f"Error refreshing remote authors: {e}")
+    finally:
+        close_old_connections()
+        _refresh_lock.release()
+
+
+def schedule_refresh():
+    """
+    Start a background refresh of the stale profiles after the current transaction commits,
+    unless a refresh is already running
+    """
+    if not settings.REMOTE_AUTHOR_BACKGROUND_REFRESH:
+        return
+
+    def start():
+        if not _refresh_lock.acquire(blocking=False):
+            return  # another request already started one
+        threading.Thread(target=_refresh_in_background, daemon=True).start()
+
+    transaction.on_commit(start)
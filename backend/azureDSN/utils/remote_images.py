@@ -0,0 +1,198 @@
+from django.conf import settings
+from ..models import Post
+from . import federation
+import hashlib, json, os, threading, time, requests
+
+'''
+Keeps the images of remote image posts on disk, so an image shown to many of our authors is downloaded from its node once.
+An entry is keyed by the FQID of the post: <key>.data holds the content as the node sent it (base64), <key>.json its
+contentType, the ETag and Last-Modified of the response and when it was last checked with the node.
+An entry checked less than REMOTE_IMAGE_CACHE_TTL seconds ago is served as is, an older one is revalidated with a
+conditional GET, which costs a 304 and no body while the post is unchanged. If the node can't be reached the old entry is
+served. The files of all entries are kept under REMOTE_IMAGE_CACHE_MAX_BYTES by deleting the least recently used ones:
+the data file of an entry is touched every time it is served, so every worker process sees the same order.
+'''
+
+
+class RemoteImageMetrics:
+    """
+    Counters of the cache since the server started: served from disk, revalidated, fetched, evicted
+    """
+    FIELDS = ("hits", "revalidated", "misses", "stale", "evictions")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def record(self, field, count=1):
+        with self._lock:
+            self._counts[field] += count
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        served = counts["hits"] + counts["revalidated"] + counts["stale"] + counts["misses"]
+        counts["hit_ratio"] = round((served - counts["misses"]) / served, 3) if served else None
+        return counts
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+metrics = RemoteImageMetrics()
+
+
+def _paths(fqid):
+    key = hashlib.sha256(fqid.encode()).hexdigest()
+    directory = settings.REMOTE_IMAGE_CACHE_DIR
+    return os.path.join(directory, f"{key}.json"), os.path.join(directory, f"{key}.data")
+
+
+def _write(path, data):
+    # Readers in other processes see the old file or the new one, never half of it
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+    os.replace(temporary, path)
+
+
+def read(fqid):
+    """
+    The cached entry of the post `fqid`: dict with content_type, content, etag, last_modified and checked_at, or None
+    """
+    meta_path, data_path = _paths(fqid)
+    try:
+        with open(meta_path) as file:
+            entry = json.load(file)
+        with open(data_path) as file:
+            entry["content"] = file.read()
+    except (OSError, ValueError):
+        return None
+    return entry
+
+
+def store(fqid, content_type, content, etag="", last_modified=""):
+    os.makedirs(settings.REMOTE_IMAGE_CACHE_DIR, exist_ok=True)
+    meta_path, data_path = _paths(fqid)
+    _write(data_path, content.encode())
+    _write(meta_path, json.dumps({
+        "fqid": fqid,
+        "content_type": content_type,
+        "etag": etag,
+        "last_modified": last_modified,
+        "checked_at": time.time(),
+    }).encode())
+    evict()
+
+
+def mark_checked(fqid, entry):
+    entry = {key: value for key, value in entry.items() if key != "content"}
+    entry["checked_at"] = time.time()
+    _write(_paths(fqid)[0], json.dumps(entry).encode())
+
+
+def touch(fqid):
+    try:
+        os.utime(_paths(fqid)[1])
+    except OSError:
+        pass  # evicted by another process in the meantime
+
+
+def discard(fqid):
+    for path in _paths(fqid):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def evict(max_bytes=None):
+    """
+    Delete the least recently served entries until the cache fits in `max_bytes`, returns how many were deleted
+    """
+    max_bytes = settings.REMOTE_IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries, total = [], 0
+    try:
+        with os.scandir(settings.REMOTE_IMAGE_CACHE_DIR) as files:
+            for file in files:
+                if file.name.endswith(".data"):
+                    stat = file.stat()
+                    entries.append((stat.st_mtime, stat.st_size, file.path))
+                    total += stat.st_size
+    except OSError:
+        return 0
+
+    evicted = 0
+    for _, size, data_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in (data_path, f"{data_path[:-len('.data')]}.json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        evicted += 1
+    if evicted:
+        metrics.record("evictions", evicted)
+    return evicted
+
+
+def clear():
+    evict(max_bytes=0)
+
+
+def get_image(fqid):
+    """
+    (status code, contentType, content) of the remote image post `fqid`, from the cache when it is still valid.
+    Posts that are not images are returned as the node sent them but not kept.
+    """
+    entry = read(fqid)
+    if entry is not None and time.time() - entry["checked_at"] < settings.REMOTE_IMAGE_CACHE_TTL:
+        metrics.record("hits")
+        touch(fqid)
+        return 200, entry["content_type"], entry["content"]
+
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = federation.get(fqid, headers=headers, timeout=settings.REMOTE_IMAGE_FETCH_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        if entry is None:
+            raise
+        # Better an image a few minutes old than none
+        print(f"Error revalidating remote image {fqid}: {e}")
+        metrics.record("stale")
+        touch(fqid)
+        return 200, entry["content_type"], entry["content"]
+
+    if response.status_code == 304 and entry is not None:
+        metrics.record("revalidated")
+        mark_checked(fqid, entry)
+        touch(fqid)
+        return 200, entry["content_type"], entry["content"]
+
+    if response.status_code != 200:
+        if response.status_code in (404, 410):
+            discard(fqid)
+        return response.status_code, None, None
+
+    metrics.record("misses")
+    post_data = response.json()
+    content_type = post_data.get("contentType")  # must be image/png;base64 or image/jpeg;base64 or application/base64
+    content = post_data.get("content")
+    if content_type in Post.IMAGE_CONTENT_TYPES and isinstance(content, str):
+        store(
+            fqid, content_type, content,
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+        )
+    else:
+        discard(fqid)
+    return 200, content_type, content
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import RemotePost
+from . import url_parser, federation
+import requests, threading
+
+'''
+Keeps the RemotePost cache in sync with the origin nodes.
+A refresh sends a conditional GET (If-None-Match) for each stale post, so unchanged posts cost a 304 and no body.
+The public stream never waits on these requests, it only schedules a background refresh when the cache is stale.
+'''
+
+_refresh_lock = threading.Lock()
+
+
+def get_post_url(remote_post):
+    """
+    The post endpoint of the origin node, built the same way the stream used to fetch it
+    """
+    body = remote_post.body or {}
+    author = body.get("author") or {}
+    base_host = url_parser.get_base_host(author.get("host") or remote_post.fqid)
+    author_serial = url_parser.extract_uuid(author.get("id") or remote_post.author_fqid)
+    post_serial = url_parser.extract_uuid(remote_post.fqid)
+    return f"{base_host}/api/authors/{author_serial}/posts/{post_serial}"
+
+
+def refresh_remote_post(remote_post):
+    """
+    Fetch one post from its origin node and store the result, returns the new status
+    """
+    headers = {}
+    if remote_post.etag and remote_post.status == RemotePost.STATUS_OK:
+        headers["If-None-Match"] = remote_post.etag
+
+    try:
+        response = federation.get(
+            get_post_url(remote_post),
+            headers=headers,
+            timeout=settings.REMOTE_POST_FETCH_TIMEOUT,
+        )
+    except requests.exceptions.RequestException as e:
+        # Node unreachable, keep what we have and try again on the next refresh
+        print(f"Error fetching remote post {remote_post.fqid}: {e}")
+        RemotePost.objects.filter(pk=remote_post.pk).update(last_fetched=timezone.now())
+        return remote_post.status
+
+    remote_post.last_fetched = timezone.now()
+    if response.status_code == 304:
+        remote_post.status = RemotePost.STATUS_OK
+    elif response.status_code == 200:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+
+        if isinstance(body, dict):
+            remote_post.body = body
+            remote_post.etag = response.headers.get("ETag", "")
+            remote_post.visibility = str(body.get("visibility", remote_post.visibility)).upper()
+            remote_post.status = RemotePost.STATUS_DELETED if remote_post.visibility == "DELETED" else RemotePost.STATUS_OK
+        else:
+            remote_post.status = RemotePost.STATUS_FAILED
+    elif response.status_code in (404, 410):
+        remote_post.status = RemotePost.STATUS_DELETED
+    else:
+        print(f"Failed to fetch post. Status code: {response.status_code}")
+        remote_post.status = RemotePost.STATUS_FAILED
+
+    remote_post.save(update_fields=["body", "etag", "visibility", "status", "last_fetched"])
+    return remote_post.status
+
+
+def stale_remote_posts(max_age=None):
+    """
+    Posts that were never fetched or were fetched more than `max_age` seconds ago
+    """
+    if max_age is None:
+        max_age = settings.REMOTE_POST_REFRESH_INTERVAL
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return (
+        RemotePost.objects.exclude(status=RemotePost.STATUS_DELETED)
+        .filter(Q(last_fetched__isnull=True) | Q(last_fetched__lt=cutoff))
+        .order_by("last_fetched")
+    )
+
+
+def refresh_stale_remote_posts(max_age=None, limit=None):
+    """
+    Refresh every stale post, returns how many posts were refreshed
+    """
+    remote_posts = stale_remote_posts(max_age)
+    if limit:
+        remote_posts = remote_posts[:limit]
+
+    refreshed = 0
+    for remote_post in remote_posts:
+        refresh_remote_post(remote_post)
+        refreshed += 1
+    return refreshed
+
+
+def _refresh_in_background():
+    try:
+        refresh_stale_remote_posts(limit=settings.REMOTE_POST_REFRESH_BATCH)
+    except Exception as e:
+        print(f"Error refreshing remote posts: {e}")
+    finally:
+        close_old_connections()
+        _refresh_lock.release()
+
+
+def schedule_refresh():
+    """
+    Start a background refresh if the cache is stale and no refresh is already running.
+    The thread starts after the current transaction commits so it sees the rows written by this request.
+    """
+    if not settings.REMOTE_POST_BACKGROUND_REFRESH or not stale_remote_posts().exists():
+        return
+
+    def start():
+        if not _refresh_lock.acquire(blocking=False):
+            return  # another request already started one
+        threading.Thread(target=_refresh_in_background, daemon=True).start()
+
+    transaction.on_commit(start)
@@ -0,0 +1,133 @@
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+import functools, hashlib, threading, uuid
+
+'''
+Caches the responses of the public endpoints (public stream, posts of an author, likes and comments of a post,
+followers of an author) sent to viewers who are not logged in, in Django's cache (CACHE_URL).
+These endpoints send the same thing to every such viewer, anonymous or remote node, so an entry is keyed by the URL and
+query string of the request. Every entry depends on tags, e.g. "author:<uuid>" for the posts of that author, and the
+signals of Post, Like, Comment, Follow, User and RemotePost invalidate the tags of what they changed (see
+utils/signal.py). A tag is invalidated by giving it a new version, the versions of its tags are part of the key of an
+entry, so an entry is never read again once one of its tags changed. Entries also expire after RESPONSE_CACHE_TTL
+seconds, which bounds how long the profiles of remote authors or the GitHub activity of an author can be out of date.
+With the default local memory cache every worker process has its own entries: use a shared cache (e.g. Redis) so the
+invalidation done by one process reaches the others.
+'''
+
+PREFIX = "response-cache"
+STREAM = "stream"
+
+
+def author_tag(author_id):
+    return f"author:{author_id}"
+
+
+def post_tag(post_id):
+    return f"post:{post_id}"
+
+
+def followers_tag(author_id):
+    return f"followers:{author_id}"
+
+
+class ResponseCacheMetrics:
+    """
+    Per endpoint counters since the server started: responses served from the cache and responses computed
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def record(self, endpoint, field):
+        with self._lock:
+            self._endpoints[endpoint][field] += 1
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {endpoint: dict(values) for endpoint, values in self._endpoints.items()}
+        for values in endpoints.values():
+            values["hit_ratio"] = round(values["hits"] / (values["hits"] + values["misses"]), 3)
+        return endpoints
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+metrics = ResponseCacheMetrics()
+
+
+def _tag_key(tag):
+    return f"{PREFIX}:tag:{tag}"
+
+
+def _new_version():
+    # Never a version used before, so an entry of a forgotten (evicted) version can't come back
+    return uuid.uuid4().hex[:12]
+
+
+def tag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*tags):
+    """
+    Forget every response that depends on one of `tags`
+    """
+    cache.set_many({_tag_key(tag): _new_version() for tag in tags if tag is not None}, None)
+
+
+def entry_key(endpoint, request, tags):
+    path = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return f"{PREFIX}:{endpoint}:{path}:{'.'.join(tag_versions(tags))}"
+
+
+def cached(endpoint, tags_of):
+    """
+    Decorator of the get method of a view, whose responses to viewers who are not logged in are cached under `endpoint`.
+    tags_of(**url kwargs) returns the tags the response depends on, or None if it must not be cached (e.g. remote data).
+    """
+    def decorator(get):
+        @functools.wraps(get)
+        def wrapper(view, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED or request.user.is_authenticated:
+                return get(view, request, *args, **kwargs)
+            tags = tags_of(**kwargs)
+            if tags is None:
+                return get(view, request, *args, **kwargs)
+
+            key = entry_key(endpoint, request, tags)
+            entry = cache.get(key)
+            if entry is not None:
+                metrics.record(endpoint, "hits")
+                # The validators of the cached response still answer conditional requests, see utils/conditional.py
+                not_modified = get_conditional_response(
+                    request,
+                    etag=entry["headers"].get("ETag"),
+                    last_modified=parse_http_date_safe(entry["headers"].get("Last-Modified", "")),
+                )
+                if not_modified is not None:
+                    for header, value in entry["headers"].items():
+                        not_modified[header] = value
+                    return not_modified
+                return Response(entry["data"], status=entry["status"], headers=entry["headers"])
+
+            metrics.record(endpoint, "misses")
+            response = get(view, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                headers = {header: response[header] for header in ("ETag", "Last-Modified", "Cache-Control") if header in response}
+                cache.set(key, {"data": response.data, "status": response.status_code, "headers": headers}, settings.RESPONSE_CACHE_TTL)
+            return response
+        return wrapper
+    return decorator
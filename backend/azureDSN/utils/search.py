@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from ..models import SearchDocument
+import re
+
+'''
+Full-text search over the local posts and authors.
+Each post and author has a SearchDocument, updated when it is saved or deleted (see utils/signal.py), and the database
+keeps the inverted index of these documents: FTS5 on SQLite, a tsvector with a GIN index on Postgres. Matches are ranked
+by relevance with titles (post titles, author names) weighing more than bodies. Every word of the query must match,
+as a prefix so results show up while the user is still typing. Other databases fall back to a substring scan.
+Posts are indexed whatever their visibility, the search view keeps the ones the viewer may see.
+'''
+
+TEXT_CONTENT_TYPES = ("text/plain", "text/markdown")
+MAX_TERMS = 10
+
+
+def terms_of(query):
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+def post_document(post):
+    text = [post.description or ""]
+    if post.content_type in TEXT_CONTENT_TYPES:
+        text.append(post.content or "")  # images and other base64 content have no words to search
+    return {"title": post.title or "", "body": "\n".join(text).strip()}
+
+
+def author_document(user):
+    return {"title": f"{user.display_name or ''} {user.username or ''}".strip(), "body": user.bio or ""}
+
+
+def index_post(post):
+    SearchDocument.objects.update_or_create(kind=SearchDocument.KIND_POST, object_id=post.uuid, defaults=post_document(post))
+
+
+def index_author(user):
+    if user.type != "author":
+        return unindex(SearchDocument.KIND_AUTHOR, user.uuid)
+    SearchDocument.objects.update_or_create(kind=SearchDocument.KIND_AUTHOR, object_id=user.uuid, defaults=author_document(user))
+
+
+def unindex(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def search(query, kinds=None, limit=None):
+    """
+    [(kind, object_id)] of the documents matching every term of `query`, most relevant first.
+    `kinds` restricts the kinds of documents, at most `limit` (SEARCH_MAX_RESULTS) are returned.
+    """
+    terms = terms_of(query)
+    if not terms:
+        return []
+    kinds = list(kinds or [SearchDocument.KIND_POST, SearchDocument.KIND_AUTHOR])
+    limit = limit or settings.SEARCH_MAX_RESULTS
+
+    table = connection.ops.quote_name(SearchDocument._meta.db_table)
+    kind_filter = ", ".join(["%s"] * len(kinds))
+    if connection.vendor == "sqlite":
+        sql = f"""
+            SELECT d.kind, d.object_id FROM azureDSN_searchdocument_fts f JOIN {table} d ON d.id = f.rowid
+            WHERE azureDSN_searchdocument_fts MATCH %s AND d.kind IN ({kind_filter})
+            ORDER BY bm25(azureDSN_searchdocument_fts, 10.0, 1.0), d.id LIMIT %s
+        """
+        params = [" ".join(f'"{term}"*' for term in terms), *kinds, limit]
+    elif connection.vendor == "postgresql":
+        sql = f"""
+            SELECT kind, object_id FROM {table}
+            WHERE document @@ to_tsquery('english', %s) AND kind IN ({kind_filter})
+            ORDER BY ts_rank(document, to_tsquery('english', %s)) DESC, id LIMIT %s
+        """
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        params = [tsquery, *kinds, tsquery, limit]
+    else:
+        matches = SearchDocument.objects.filter(kind__in=kinds)
+        for term in terms:
+            matches = matches.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        return [(kind, object_id) for kind, object_id in matches.order_by("id").values_list("kind", "object_id")[:limit]]
+
+    field = SearchDocument._meta.get_field("object_id")
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(kind, field.to_python(object_id)) for kind, object_id in cursor.fetchall()]
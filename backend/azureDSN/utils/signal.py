@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from ..models import User, Inbox
+from ..models import User, Inbox, Post, Follow, SearchDocument, ImageBlob, Like, Comment, RemotePost
+from .post_fanout import fan_out_post
+from . import friendship, search, response_cache
 
 '''
 This function automatically create an inbox for every new user added into the db
@@ -11,3 +14,122 @@ https://www.reddit.com/r/django/comments/rlar20/django_do_something_only_when_mo
 def create_inbox(sender, instance, created, **kwargs):
     if created:
         Inbox.objects.create(user=instance)
+
+'''
+Send every created, edited or deleted post to the inboxes of its audience, see utils/post_fanout.py
+The visibility before the save tells who could see the post, e.g. who must be told about its deletion
+'''
+@receiver(pre_save, sender=Post)
+def remember_post_visibility(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._previous_visibility = Post.objects.filter(pk=instance.pk).values_list("visibility", flat=True).first()
+
+@receiver(post_save, sender=Post)
+def fan_out_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_visibility = getattr(instance, "_previous_visibility", None)
+
+    def fan_out():
+        try:
+            fan_out_post(instance, previous_visibility=previous_visibility, created=created)
+        except Exception as e:
+            # The post is saved, failing the request would only make the author post it again
+            print(f"Error sending post {instance.uuid} to its audience: {e}")
+
+    # After the commit, so a failed request doesn't notify anyone
+    transaction.on_commit(fan_out)
+
+'''
+Forget the cached relations of both authors of a follow that changed, see utils/friendship.py
+Again after the commit, another request may have loaded them between the change and the commit
+'''
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_friendship(sender, instance, **kwargs):
+    users = (instance.local_follower_id, instance.local_followee_id)
+    friendship.invalidate(*users)
+    transaction.on_commit(lambda: friendship.invalidate(*users))
+
+'''
+Keep the full-text index of posts and authors up to date, see utils/search.py
+'''
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    search.unindex(SearchDocument.KIND_POST, instance.uuid)
+
+@receiver(post_save, sender=User)
+def index_saved_author(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_author(instance)
+
+@receiver(post_delete, sender=User)
+def unindex_deleted_author(sender, instance, **kwargs):
+    search.unindex(SearchDocument.KIND_AUTHOR, instance.uuid)
+
+'''
+Delete the bytes of an image with the last post that used them, see models/image_blob.py
+'''
+@receiver(post_delete, sender=Post)
+def discard_post_image(sender, instance, **kwargs):
+    ImageBlob.discard_unused(instance.image_id)
+
+'''
+Forget the cached responses that show what changed, see utils/response_cache.py
+Again after the commit, another request may have cached the old version between the change and the commit
+'''
+def invalidate_responses(*tags):
+    response_cache.invalidate(*tags)
+    transaction.on_commit(lambda: response_cache.invalidate(*tags))
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_responses(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_responses(response_cache.STREAM, response_cache.author_tag(instance.user_id), response_cache.post_tag(instance.uuid))
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_reaction_responses(sender, instance, raw=False, **kwargs):
+    # Posts embed the first page of their likes and comments
+    if raw or instance.post_id is None:
+        return
+    author_id = Post.objects.filter(pk=instance.post_id).values_list("user_id", flat=True).first()
+    invalidate_responses(
+        response_cache.STREAM,
+        response_cache.post_tag(instance.post_id),
+        response_cache.author_tag(author_id) if author_id else None,
+    )
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_responses(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Posts and followers lists embed their authors, a login only changes last_login which none of them shows
+    if raw or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    followees = Follow.objects.filter(local_follower_id=instance.uuid, local_followee__isnull=False).values_list("local_followee_id", flat=True)
+    invalidate_responses(
+        response_cache.STREAM,
+        response_cache.author_tag(instance.uuid),
+        *[response_cache.followers_tag(followee) for followee in followees],
+    )
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_responses(sender, instance, raw=False, **kwargs):
+    if not raw and instance.local_followee_id:
+        invalidate_responses(response_cache.followers_tag(instance.local_followee_id))
+
+@receiver(post_save, sender=RemotePost)
+@receiver(post_delete, sender=RemotePost)
+def invalidate_remote_post_responses(sender, instance, raw=False, **kwargs):
+    # The public stream shows the cached remote posts
+    if not raw:
+        invalidate_responses(response_cache.STREAM)
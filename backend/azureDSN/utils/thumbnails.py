@@ -0,0 +1,72 @@
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+from ..models import ImageVariant
+import io
+
+'''
+Makes the resized variants of the stored images (ImageBlob): `?w=` on the image endpoints asks for an image at most that
+many pixels wide. Widths are rounded up to one of IMAGE_VARIANT_WIDTHS so a client can't make us store every width, and
+a variant is made once, on its first request, then read from ImageVariant. Images are never made wider than they are.
+Clients that accept WebP get WebP, the others get JPEG, or PNG for images with transparency.
+'''
+
+
+def snap_width(width):
+    """
+    The smallest allowed width at least `width` wide, the largest one for wider requests
+    """
+    widths = sorted(settings.IMAGE_VARIANT_WIDTHS)
+    return next((allowed for allowed in widths if allowed >= width), widths[-1])
+
+
+def format_for(accept, has_alpha=True):
+    if "image/webp" in (accept or ""):
+        return ImageVariant.FORMAT_WEBP
+    return ImageVariant.FORMAT_PNG if has_alpha else ImageVariant.FORMAT_JPEG
+
+
+def resize(data, width, accept):
+    """
+    (format, bytes) of the image `data` at most `width` pixels wide, or None if `data` is not an image Pillow can open
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                image = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+            image_format = format_for(accept, has_alpha)
+            if image_format == ImageVariant.FORMAT_JPEG:
+                image = image.convert("RGB")
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if has_alpha else "RGB")
+
+            output = io.BytesIO()
+            image.save(output, format=image_format.upper(), quality=settings.IMAGE_VARIANT_QUALITY, optimize=True)
+            return image_format, output.getvalue()
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f"Cannot resize image: {e}")
+        return None
+
+
+def get_variant(blob, width, accept=None):
+    """
+    The variant of `blob` for a `?w=width` request of a client sending `accept`, made if it doesn't exist yet.
+    None if the blob is not an image.
+    """
+    width = snap_width(width)
+    if "image/webp" in (accept or ""):
+        variant = ImageVariant.objects.filter(source=blob, width=width, format=ImageVariant.FORMAT_WEBP).first()
+    else:
+        variant = ImageVariant.objects.filter(source=blob, width=width).exclude(format=ImageVariant.FORMAT_WEBP).first()
+    if variant is not None:
+        return variant
+
+    resized = resize(bytes(blob.data), width, accept)
+    if resized is None:
+        return None
+    image_format, data = resized
+    # Another request may have made it in the meantime, then its copy is kept
+    variant, _ = ImageVariant.objects.get_or_create(source=blob, width=width, format=image_format, defaults={"data": data, "size": len(data)})
+    return variant
@@ -19,4 +19,13 @@ def is_valid_url(value):
     if not value:
         return False
     parsed_url = urlparse(value)
-    return all([parsed_url.scheme, parsed_url.netloc])
\ No newline at end of file
+    return all([parsed_url.scheme, parsed_url.netloc])
+def author_key(url):
+    """
+    Canonical key of an author URL, the same for every way a node writes it: http or https, with or without /api/,
+    trailing slash, letter case. e.g. http://NodeBBBB.com/api/authors/111/ -> nodebbbb.com/111
+    """
+    if not url:
+        return None
+    parsed = urlparse(url.strip())
+    return f"{parsed.netloc.lower()}/{extract_uuid(parsed.path).lower()}"
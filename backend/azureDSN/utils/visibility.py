@@ -0,0 +1,136 @@
+from django.db.models import Exists, OuterRef, Q
+from urllib.parse import urlparse
+from ..models import Follow, Post
+from .auth import get_request_node
+
+'''
+The visibility rules of posts (Post.VISIBILITY_CHOICES) for every kind of viewer, as filters of Post querysets.
+The relations they depend on (follows, friendships) are EXISTS subqueries over Follow, so listing the posts a viewer
+can see is one query whatever the number of authors, followees and friends. A post is:
+    PUBLIC: readable by everyone, listed on the page of its author and in the public stream
+    UNLISTED: readable by any local author or node, listed in the stream of the followers of its author
+    FRIENDS: readable by its author, their friends (authors following each other) and the nodes of their remote friends,
+             listed on the page of its author and in the stream of their friends
+    DELETED: readable and listed in the public stream by staff only
+'''
+
+PUBLIC, FRIENDS, UNLISTED, DELETED = 1, 2, 3, 4
+LABELS = dict(Post.VISIBILITY_CHOICES)
+
+
+class Viewer:
+    """
+    Who is looking at the posts: nobody we know, a local author (staff or not) or a remote node using Basic Auth
+    """
+    def __init__(self, user=None, node=None):
+        self.user = user if user is not None and user.is_authenticated else None
+        self.node = node if self.user is None else None
+
+    @classmethod
+    def of(cls, request):
+        if request.user.is_authenticated:
+            return cls(user=request.user)
+        return cls(node=get_request_node(request))
+
+    @property
+    def is_anonymous(self):
+        return self.user is None and self.node is None
+
+    @property
+    def is_staff(self):
+        return self.user is not None and self.user.is_staff
+
+
+def follows_author(user):
+    # `user` follows the author of the post
+    return Exists(Follow.objects.filter(local_follower=user, local_followee=OuterRef("user")))
+
+
+def friend_of_author(user):
+    # `user` and the author of the post follow each other
+    return follows_author(user) & Exists(Follow.objects.filter(local_follower=OuterRef("user"), local_followee=user))
+
+
+def node_friend_of_author(node):
+    # An author of `node` and the author of the post follow each other, remote authors are matched by their key
+    host = urlparse(node.host or "").netloc.lower()
+    if not host:
+        return Q(pk__in=[])
+    followed_back = Follow.objects.filter(local_follower=OuterRef(OuterRef("user")), remote_followee_key=OuterRef("remote_follower_key"))
+    return Exists(
+        Follow.objects.filter(local_followee=OuterRef("user"), remote_follower_key__startswith=f"{host}/").filter(Exists(followed_back))
+    )
+
+
+def own_posts(viewer):
+    return Q(user=viewer.user, visibility__in=[PUBLIC, FRIENDS, UNLISTED]) if viewer.user else Q(pk__in=[])
+
+
+def readable_by(viewer):
+    """
+    Posts `viewer` may read, e.g. by their URL
+    """
+    rule = Q(visibility=PUBLIC)
+    if viewer.user:
+        rule |= own_posts(viewer) | Q(visibility=UNLISTED) | Q(visibility=FRIENDS) & friend_of_author(viewer.user)
+        if viewer.is_staff:
+            rule |= Q(visibility=DELETED)
+    elif viewer.node:
+        rule |= Q(visibility=UNLISTED) | Q(visibility=FRIENDS) & node_friend_of_author(viewer.node)
+    return rule
+
+
+def on_author_page(viewer):
+    """
+    Posts listed to `viewer` on the page of their author
+    """
+    rule = Q(visibility=PUBLIC)
+    if viewer.user:
+        rule |= own_posts(viewer) | Q(visibility=FRIENDS) & friend_of_author(viewer.user)
+    return rule
+
+
+def in_stream(viewer):
+    """
+    Posts of the stream of `viewer` besides the public ones: their own, the unlisted posts of their followees and the
+    friends-only posts of their friends
+    """
+    if not viewer.user:
+        return Q(pk__in=[])
+    return (
+        Q(user=viewer.user, visibility__in=[FRIENDS, UNLISTED])
+        | Q(visibility=UNLISTED) & follows_author(viewer.user)
+        | Q(visibility=FRIENDS) & friend_of_author(viewer.user)
+    )
+
+
+def in_public_stream(viewer):
+    """
+    Posts of the public stream, with the deleted ones for staff
+    """
+    return Q(visibility__in=[PUBLIC, DELETED]) if viewer.is_staff else Q(visibility=PUBLIC)
+
+
+def in_search(viewer):
+    """
+    Posts `viewer` may find by searching: the ones listed to them on an author page or in their stream
+    """
+    return on_author_page(viewer) | in_stream(viewer)
+
+
+def can_read(viewer, post):
+    if post.visibility == PUBLIC:
+        return True
+    return Post.objects.filter(pk=post.pk).filter(readable_by(viewer)).exists()
+
+
+def refusal(viewer, post):
+    """
+    (message, status code) of the response refusing `post` to `viewer`, a deleted post does not exist for them
+    """
+    if post.visibility == DELETED:
+        return "This post does not exist.", 404
+    if viewer.is_anonymous:
+        label = "Friends-only" if post.visibility == FRIENDS else LABELS[post.visibility].capitalize()
+        return f"{label} posts must be authenticated to view.", 403
+    return "You do not have permission to view this friend's post.", 403
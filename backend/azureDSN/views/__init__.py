@@ -7,8 +7,10 @@ from .comments import MultipleCommentsView, SingleCommentView
 from .likes import LikeView, AuthorLikesView, LikesView
 from .auth import LoginView, LogoutView, RegisterView, CheckAuthView
 from .stream import PublicStreamView, AuthStreamView
-from .image import ImageView
+from .image import ImageView, ImageBlobView, ImageRawView
 from .share import ShareView
 from .site_config import SiteConfigView
-from .node import GetNodesView, AddNodeView, UpdateNodeView, DeleteNodeView
-from .remote import RemoteAuthorsView, RemoteFolloweeView
\ No newline at end of file
+from .node import GetNodesView, AddNodeView, UpdateNodeView, DeleteNodeView, NodeMetricsView
+from .remote import RemoteAuthorsView, RemoteFolloweeView
+from .outbox import OutboxDeliveryView
+from .search import SearchView
@@ -1,16 +1,14 @@
-from requests.auth import HTTPBasicAuth
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
-from ..models import User
+from ..models import User, RemoteAuthor
 from ..serializers import UserSerializer
-from ..utils import url_parser
-from urllib.parse import urlparse
+from ..utils import url_parser, federation, author_directory, conditional
 from uuid import UUID
-import requests, os
+import os
 
 class AuthorsPagination(PageNumberPagination):
     page_size = 5
@@ -111,8 +109,7 @@ class AuthorsSpecificView(APIView):
 
         if (author_serial):
             author = get_object_or_404(User, uuid=author_serial)
-            serializer = UserSerializer(author)
-            return Response(serializer.data, status=200)
+            return self.author_response(request, author)
         
         elif (author_fqid):
             author_serial = url_parser.extract_uuid(author_fqid) # cornflowerblue uses integer, so don't check for UUID
@@ -120,15 +117,13 @@ class AuthorsSpecificView(APIView):
 
             if base_host.strip().lower() == os.getenv('BASE_URL', 'http://localhost:8000').strip().lower():
                 local_user = get_object_or_404(User, uuid=author_serial)
-                serializer = UserSerializer(local_user)
-                return Response(serializer.data, status=200)
+                return self.author_response(request, local_user)
 
             try:
                 # Send request to remote server to get remote author's info
                 remote_author_url = f"{base_host}/api/authors/{author_serial}/"
-                response = requests.get(
+                response = federation.get(
                     remote_author_url,
-                    auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD')),
                 )
                 if response.status_code == 200:
                     return Response(response.json(), status=status.HTTP_200_OK)
@@ -138,6 +133,14 @@ class AuthorsSpecificView(APIView):
             except Exception as e:
                 return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def author_response(self, request, author):
+        # The author object is made of the user row only, its modified_at is its version, see utils/conditional.py
+        version = conditional.validators(author.uuid, author.modified_at, dates=[author.modified_at])
+        not_modified = conditional.not_modified(request, version)
+        if not_modified:
+            return not_modified
+        return conditional.with_validators(Response(UserSerializer(author).data, status=200), version)
+
     @extend_schema(
         summary="Update Author Profile",
         description="Update the profile of a specific author identified by `author_serial`. You must provide the full author data in the request body.",
@@ -211,8 +214,17 @@ class AuthorsSpecificView(APIView):
 
 class AuthorsCompleteView(APIView):
     @extend_schema(
-        summary="Retrieve all local authors",
-        description="This endpoint returns a list of all authors present in the local node.",
+        summary="Retrieve all local and remote authors",
+        description=(
+            "This endpoint returns a list of all authors present in the local node, followed by the authors of the "
+            "remote nodes from the federated author directory unless `user` is `anonymous`. "
+            "The list is paginated when `page` or `size` is given."
+        ),
+        parameters=[
+            OpenApiParameter(name="user", description="UUID of the current user (left out of the list) or 'anonymous'", required=False, type=str),
+            OpenApiParameter(name="page", description="Page number", required=False, type=int),
+            OpenApiParameter(name="size", description="Number of authors per page", required=False, type=int),
+        ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
                 description="A list of all local authors.",
@@ -267,44 +279,34 @@ class AuthorsCompleteView(APIView):
     )
     def get(self, request):
         """
-        Gets all the author in our local node.
+        Gets all the authors in our local node, and the remote authors of the author directory for logged in users
         """
         user_uuid = request.query_params.get('user')
 
-        users = []
+        local_users = User.objects.filter(type="author").order_by('-created_at')
         if user_uuid == 'anonymous':
-            local_users = User.objects.filter(type="author")
-            local_serializer = UserSerializer(local_users, many=True)
-            users.extend(local_serializer.data)
+            remote_authors = RemoteAuthor.objects.none().values_list("body", flat=True)
         else:
-            # Query all users of type 'author' and exclude the current user
-            local_users = User.objects.exclude(uuid=user_uuid).filter(type="author")
-            local_serializer = UserSerializer(local_users, many=True)
-            users.extend(local_serializer.data)
-
-            remote_node = User.objects.filter(type="node")
-            for node in remote_node:
-                parsed_url = urlparse(node.host)
-                base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                api_url = f"{base_url}/api/authors/"
+            # Exclude the current user, remote authors come from the directory synced in the background
+            local_users = local_users.exclude(uuid=user_uuid)
+            remote_authors = author_directory.directory()
+            author_directory.schedule_sync()
 
-                try:
-                    response = requests.get(
-                        api_url,
-                        auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
-                    )
-
-                    if response.status_code == 403:
-                        continue
+        if 'page' in request.query_params or 'size' in request.query_params:
+            try:
+                page = max(int(request.query_params.get('page', 1)), 1)
+                size = min(max(int(request.query_params.get('size', AuthorsPagination.page_size)), 1), AuthorsPagination.max_page_size)
+            except ValueError:
+                return Response({"error": "page and size must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
 
-                    data = response.json()
+            # Local authors first, then the directory, as in the unpaginated list
+            start = (page - 1) * size
+            local_page = list(local_users[start:start + size])
+            remote_page = []
+            if len(local_page) < size:
+                remote_start = max(start - local_users.count(), 0)
+                remote_page = list(remote_authors[remote_start:remote_start + size - len(local_page)])
+            return Response(UserSerializer(local_page, many=True).data + remote_page, status=200)
 
-                    if "authors" in data and data["authors"]:
-                        users.extend(data["authors"])
-                    else:
-                        continue
-                except requests.exceptions.RequestException as e:
-                    print(f"Error fetching authors from node {node.host}: {e}")
-                    continue
-                
+        users = UserSerializer(local_users, many=True).data + list(remote_authors)
         return Response(users, status=200)
@@ -6,11 +6,10 @@ from rest_framework.pagination import PageNumberPagination
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse, OpenApiTypes
 from drf_spectacular.utils import inline_serializer
 from rest_framework import serializers
-from requests.auth import HTTPBasicAuth
 from ..serializers import *
 from ..models import *
-from ..utils import url_parser
-import requests, os, uuid
+from ..utils import url_parser, federation, conditional, response_cache
+import uuid
 
 class CommentsPagination(PageNumberPagination):
     page_size=5
@@ -28,6 +27,18 @@ class CommentsPagination(PageNumberPagination):
             "src": data,
         })
 
+def post_comments_tags(author_serial=None, post_serial=None, post_fqid=None):
+    # Only the comments of local posts, the others come from their node
+    if post_fqid:
+        post_serial = url_parser.extract_uuid(url_parser.percent_decode(post_fqid))
+        try:
+            post_serial = uuid.UUID(post_serial)
+        except ValueError:
+            return None
+        if not Post.objects.filter(uuid=post_serial).exists():
+            return None
+    return [response_cache.post_tag(post_serial)]
+
 '''
 Handle retrieval of all the comments in a post
 Both case return a comments object which is a list of comment object
@@ -82,6 +93,7 @@ class MultipleCommentsView(APIView):
         }
     )
 
+    @response_cache.cached("post_comments", post_comments_tags)
     def get(self, request, author_serial=None, post_serial=None, post_fqid=None):
         if (author_serial):
             '''
@@ -91,11 +103,7 @@ class MultipleCommentsView(APIView):
             post_id = post_serial
             post_obj = get_object_or_404(Post, uuid=post_serial, user__uuid=author_serial)
             comments = Comment.objects.filter(post=post_obj).order_by('-created_at')
-            pagination = self.pagination_provider()
-            page = pagination.paginate_queryset(comments, request)
-
-            serialized_comments = CommentSerializer(page, many=True).data
-            return pagination.get_paginated_response(serialized_comments)
+            return self.comments_response(request, comments)
 
         else:
             '''
@@ -116,19 +124,14 @@ class MultipleCommentsView(APIView):
             try:
                 post_obj = Post.objects.get(uuid=post_id)
                 comments = Comment.objects.filter(post=post_obj).order_by('-created_at')
-                pagination = self.pagination_provider()
-                page = pagination.paginate_queryset(comments, request)
-
-                serialized_comments = CommentSerializer(page, many=True).data
-                return pagination.get_paginated_response(serialized_comments)
+                return self.comments_response(request, comments)
 
             except Post.DoesNotExist:
                 remote_comments = []
                 try:
                     # call remote endpoint
-                    response = requests.get(
+                    response = federation.get(
                         f"{post_fqid.rstrip('/')}/comments",
-                        auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
                     )
 
                     if response.status_code == 200:
@@ -142,6 +145,21 @@ class MultipleCommentsView(APIView):
                 except Exception as e:
                     print(f"Something went wrong: {str(e)}")
                     return Response({"detail": "An internal server error occurred."}, status=500)
+
+    def comments_response(self, request, comments):
+        # Comments are never edited, the page changes only when one is added or removed, which changes the count but may
+        # take the latest date back: no Last-Modified, see utils/conditional.py
+        listed = conditional.summary(comments)
+        version = conditional.validators(request.get_full_path(), listed)
+        not_modified = conditional.not_modified(request, version)
+        if not_modified:
+            return not_modified
+
+        pagination = self.pagination_provider()
+        page = pagination.paginate_queryset(comments, request)
+
+        serialized_comments = CommentSerializer(page, many=True).data
+        return conditional.with_validators(pagination.get_paginated_response(serialized_comments), version)
  
 
 '''
@@ -1,4 +1,4 @@
-from ..utils import url_parser
+from ..utils import url_parser, federation, friendship, remote_authors, response_cache
 from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -8,37 +8,8 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiRespon
 from ..serializers import FollowSerializer, UserSerializer
 from ..models import Follow, User
 from urllib.parse import unquote, urlparse
-from requests.auth import HTTPBasicAuth
-import requests, os
-
-def fetch_remote_follower_data(remote_url):
-    """
-    Fetches remote follower data by sending a get request using the remote_url
-    """
-    try:
-        # Parse the remote URL to get the host and remote author uuid
-        remote_url = url_parser.percent_decode(remote_url)
-        base_host = url_parser.get_base_host(remote_url)
-        author_uuid = url_parser.extract_uuid(remote_url)
-
-        remote_api_url = f"{base_host}/api/authors/{author_uuid}/"
-        response = requests.get(
-            remote_api_url,
-            auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD')),
-        )
-
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 403:
-            print(f"Access forbidden to the remote node.")
-            return None
-        else:
-            print(f"Failed to fetch author: {response.text}")
-            return None
-    except Exception as e:
-        print(f"Error fetching remote follower {remote_url}: {str(e)}")
-        return None
-        
+from uuid import UUID
+
 class FollowCustomView(APIView):
     @extend_schema(
         summary="Retrieve following users or friends based on query parameters",
@@ -107,17 +78,13 @@ class FollowCustomView(APIView):
         my_followees = Follow.objects.filter(local_follower=user)
 
         local_followee = []
-        remote_followee = []
+        remote_followee_urls = []
         for follow in my_followees:
             if follow.local_followee:
                 local_followee.append(follow.local_followee)
             elif follow.remote_followee:
-                try:
-                    remote_user = fetch_remote_follower_data(follow.remote_followee)
-                    if remote_user:
-                        remote_followee.append(remote_user)
-                except Exception as e:
-                    print(f"Error fetching remote followee data: {e}")
+                remote_followee_urls.append(follow.remote_followee)
+        remote_followee = remote_authors.get_profiles(remote_followee_urls)
 
         local_serializer = UserSerializer(local_followee, many=True)
         response_data = {
@@ -130,30 +97,24 @@ class FollowCustomView(APIView):
         """
         Example call: http://127.0.0.1:8000/api/authors/eba591e5-91a3-4b80-9fe4-cd3eb8b4b544/following/?action=following
         """   
-        # Fetch all local and remote followee
-        local_followee_ids = set(Follow.objects.filter(local_follower_id=user_id).values_list('local_followee_id', flat=True))
-        remote_followee_urls = set(Follow.objects.filter(local_follower_id=user_id).values_list('remote_followee', flat=True))
-        
-        # Fetch all local and remote follower
-        local_follower_ids = set(Follow.objects.filter(local_followee_id=user_id).values_list('local_follower_id', flat=True))
-        remote_follower_urls = set(Follow.objects.filter(local_followee_id=user_id).values_list('remote_follower', flat=True))
-
-        # Find mutual relationships (local & remote friends)
-        mutual_local_friends = local_followee_ids.intersection(local_follower_ids)
-        mutual_remote_friends = remote_followee_urls.intersection(remote_follower_urls)
+        # Mutual relationships (local & remote friends)
+        mutual_local_friends = friendship.friends_of(user_id)
+        mutual_remote_friends = friendship.remote_friends_of(user_id)
 
         local_friends = User.objects.filter(uuid__in=mutual_local_friends)
 
-        remote_friends = []
-        # Add remote friends by fetching data from each remote follow URL
-        for remote_friend_url in mutual_remote_friends:
-            remote_follower_data = fetch_remote_follower_data(remote_friend_url)
-            if remote_follower_data:
-                remote_friends.append(remote_follower_data)
+        # Add remote friends from the cached profiles, see utils/remote_authors.py
+        remote_friends = remote_authors.get_profiles(mutual_remote_friends)
 
         local_serializer = UserSerializer(local_friends, many=True)
         return Response(local_serializer.data + remote_friends, status=status.HTTP_200_OK)
     
+def local_followers_tags(user_id):
+    # The followers of remote authors come from their node, only the ones of local authors are cached
+    if isinstance(user_id, UUID) and User.objects.filter(uuid=user_id).exists():
+        return [response_cache.followers_tag(user_id)]
+    return None
+
 class FollowerView(APIView):
     @extend_schema(
         summary="Get all the followers of the user",
@@ -183,6 +144,7 @@ class FollowerView(APIView):
             404: OpenApiResponse(description="The follower does not exist")
         }
     )
+    @response_cache.cached("followers", local_followers_tags)
     def get(self, request, user_id):
         """
         Get all the followers of a local user
@@ -194,12 +156,10 @@ class FollowerView(APIView):
             # Get the followers list from Follow model
             followers = Follow.objects.filter(local_followee_id=user_id) 
             local_followers = []
-            remote_followers = []
+            remote_follower_urls = []
             for follower in followers:
                 if follower.remote_follower:  # Remote follower handling
-                    remote_data = fetch_remote_follower_data(follower.remote_follower)
-                    if remote_data:
-                        remote_followers.append(remote_data)
+                    remote_follower_urls.append(follower.remote_follower)
                 else:  # Local follower handling
                     try:
                         user = User.objects.get(uuid=follower.local_follower_id)
@@ -208,6 +168,7 @@ class FollowerView(APIView):
                         return Response({"error": "Local follower not found."}, status=404)
 
             local_serializer = UserSerializer(local_followers, many=True)
+            remote_followers = remote_authors.get_profiles(remote_follower_urls)
 
             response_data = {
                 "type": "followers",
@@ -227,9 +188,8 @@ class FollowerView(APIView):
                 
                 # send request to fetch all posts
                 remote_user_url = f"{base_host}/api/authors/{user_id}/followers"
-                response = requests.get(
+                response = federation.get(
                     url=remote_user_url,  
-                    auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
                 )
                 if response.status_code == 200:
                     # Now, the idea is that the folowers returned by whitesmoke is paginated and we don't need that
@@ -346,6 +306,13 @@ class FollowView(APIView):
                 type=str,
                 location=OpenApiParameter.PATH,
                 required=True
+            ),
+            OpenApiParameter(
+                name="followee",
+                description="FQID of the remote author whose serial is user_id, when a local follower unfollows a remote author",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                required=False
             )
         ],
         responses={
@@ -363,20 +330,25 @@ class FollowView(APIView):
         """
         decoded_url = unquote(follower_url)
         follower_id = url_parser.extract_uuid(decoded_url)
+        followee_url = unquote(request.query_params.get("followee", ""))
+        if followee_url and url_parser.extract_uuid(followee_url).lower() != str(user_id).lower():
+            return Response({"error": "followee does not match the author"}, status=400)
+
+        follower = Follow.objects.none()
+        # local follower of a remote author, user_id is the serial of the remote followee whose FQID is followee
+        if followee_url:
+            follower = Follow.objects.filter(local_follower_id=follower_id, remote_followee_key=url_parser.author_key(followee_url))
         # remote follower
-        follower = Follow.objects.filter(local_follower_id = follower_id, remote_followee__contains=user_id)
-
+        if not follower:
+            follower = Follow.objects.filter(local_followee_id=user_id, remote_follower_key=url_parser.author_key(decoded_url))
         # local follower
         if not follower:
-            follower = Follow.objects.filter(local_followee_id = user_id, local_follower_id=follower_id)
-        else:
-            follower.delete()
-            return Response({"message":"Follower removed successfully"}, status = 200)
-        
+            follower = Follow.objects.filter(local_followee_id=user_id, local_follower_id=follower_id)
+
         # Verifies that follower exists
         if not follower:
             return Response({"error": "Follower not found"}, status=404)
-    
+
         follower.delete()
         return Response({"message": "Follower removed successfully"}, status=200)
 
@@ -401,12 +373,10 @@ class FollowView(APIView):
             follower_local = True
 
         # Check if this follow relationship already exists
-        existing_follow = Follow.objects.filter(
-            local_followee=user if follower_local else None,
-            remote_followee=None,
-            local_follower=follower_id if follower_local else None,
-            remote_follower=None if follower_local else decoded_url
-        ).exists()
+        if follower_local:
+            existing_follow = Follow.objects.filter(local_followee=user, local_follower=follower_id).exists()
+        else:
+            existing_follow = Follow.objects.filter(local_followee=user, remote_follower_key=url_parser.author_key(decoded_url)).exists()
 
         if existing_follow:
             return Response({"message": "Already following"}, status=409)
@@ -437,7 +407,7 @@ class FollowView(APIView):
         parts = decoded_url.strip("/").split("/")
         follower_id = parts[-1]
    
-        follower = Follow.objects.filter(local_followee_id=user_id, remote_follower__contains=follower_id)
+        follower = Follow.objects.filter(local_followee_id=user_id, remote_follower_key=url_parser.author_key(decoded_url))
 
         if follower:
             return Response({"is_follower": True}, status=200) # Remote follower
@@ -1,14 +1,76 @@
-from requests.auth import HTTPBasicAuth
 from django.conf import settings
 from rest_framework.views import APIView
+from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
-from ..models import User, Post
+from django.urls import reverse
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import AllowAny
+from ..models import User, Post, ImageBlob
 from uuid import UUID
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from rest_framework import status
-from ..utils import url_parser
-import os, requests
+from ..utils import url_parser, visibility, remote_images
+from ..utils.thumbnails import get_variant
+import base64, re
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(header, size):
+    """
+    (first, last) byte of a single `Range: bytes=...` of a resource of `size` bytes, None to send the whole resource,
+    or "unsatisfiable". Several ranges at once are answered with the whole resource, as RFC 9110 allows.
+    """
+    match = RANGE_PATTERN.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # The last `last` bytes
+        length = int(last)
+        return (max(size - length, 0), size - 1) if length and size else "unsatisfiable"
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or last < first:
+        return "unsatisfiable"
+    return first, last
+
+WIDTH_PARAMETER = OpenApiParameter(
+    name="w",
+    description="Largest width in pixels wanted, rounded up to one of the widths of the resized variants.",
+    required=False,
+    type=int,
+)
+
+def requested_width(request):
+    """
+    The `?w=` of the request, None if there is none. Raises ValueError if it is not a positive number.
+    """
+    width = request.query_params.get("w")
+    if width is None:
+        return None
+    width = int(width)
+    if width <= 0:
+        raise ValueError(width)
+    return width
+
+def image_data_url(request, post, width):
+    """
+    The image of a local image post as a data URL, resized to `width` if given and if we can
+    """
+    if width and post.image_id:
+        variant = get_variant(post.image, width, request.headers.get("Accept"))
+        if variant is not None:
+            return f"data:{variant.content_type};base64,{base64.b64encode(bytes(variant.data)).decode('ascii')}"
+    return f"data:{post.content_type},{post.get_content()}"
+
+class IgnoreAccept(BaseContentNegotiation):
+    # The image views answer with bytes of their own type, an `Accept: image/*` of a browser must not be refused
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
 
 class ImageView(APIView):
     # This end point decodes image posts as images. This allows the use of image tags in Markdown.
@@ -41,6 +103,7 @@ class ImageView(APIView):
                 type=str,
                 location=OpenApiParameter.PATH
             ),
+            WIDTH_PARAMETER,
         ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
@@ -89,6 +152,11 @@ class ImageView(APIView):
         tags=['Image Posts API']
     )
     def get(self, request, author_serial=None, post_serial=None, post_fqid=None):
+        try:
+            width = requested_width(request)
+        except ValueError:
+            return Response({"detail": "w must be a positive number of pixels."}, status=400)
+
         if (author_serial and post_serial):
             """
                 URL: ://service/api/authors/{AUTHOR_SERIAL}/posts/{POST_SERIAL}/image
@@ -100,7 +168,7 @@ class ImageView(APIView):
             post = get_object_or_404(Post, uuid=post_serial) # assume local posts
 
             if post.has_image: # This will only be in local DB
-                data = f"data:{post.content_type},{post.content}"
+                data = image_data_url(request, post, width)
 
                 return Response(data, status=200)
             
@@ -128,25 +196,20 @@ class ImageView(APIView):
             base_host = url_parser.get_base_host(post_fqid)
             if base_host != settings.BASE_URL:
                 try:
-                    response = requests.get(
-                        post_fqid, # if we call the image endpoint, I don't know response structure of other groups
-                        auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD')),
-                    )
+                    # The post itself, not its image endpoint whose response differs between groups, kept on disk
+                    # and revalidated with the node, see utils/remote_images.py
+                    status_code, content_type, content = remote_images.get_image(post_fqid)
 
-                    if response.status_code == 200:
+                    if status_code == 200:
                         # Reconstruct Image URI using content and contentType
-                        post_data = response.json()
-                        content_type = post_data.get("contentType") # must be image/png;base64 or image/jpeg;base64 or application/base64
-                        content = post_data.get("content")
-
                         data = f"data:{content_type},{content}"
 
                         return Response(data, status=200)
-                    elif response.status_code == 403:
+                    elif status_code == 403:
                         # They don't give us access
                         print(f"Access forbidden to the remote node.")
                         return
-                    elif response.status_code == 404:
+                    elif status_code == 404:
                         # The remote post/image we are trying to reference isn't an Image Post
                         return Response({"error": "post is not an image."}, status=404)
                     else:
@@ -158,8 +221,106 @@ class ImageView(APIView):
                 post = get_object_or_404(Post, uuid=post_serial)
 
                 if post.has_image: # This will only be in local DB
-                    data = f"data:{post.content_type},{post.content}"
+                    data = image_data_url(request, post, width)
 
                     return Response(data, status=200)
                 else:
                     return Response({"error": "post is not an image."}, status=404)
+
+
+class ImageBlobView(APIView):
+    # Raw bytes of the image of a post or of a profile picture, addressed by their SHA-256 so they never change and can be
+    # cached forever. Open to every client, so the browsers of other nodes can show our profile pictures: who may see an
+    # image is decided below from the posts that use it.
+    permission_classes = [AllowAny]
+    content_negotiation_class = IgnoreAccept
+
+    @extend_schema(
+        summary="Retrieve the raw bytes of an image",
+        description=(
+            "Returns the image stored under its SHA-256 `digest` with its own Content-Type, a strong ETag and "
+            "Cache-Control immutable. Supports `If-None-Match` (304) and single `Range` requests (206). "
+            "With `w`, a resized variant is returned instead, in WebP if the client accepts it. "
+            "The image is only sent to viewers who may read one of the posts using it, profile pictures to everyone."
+        ),
+        parameters=[
+            OpenApiParameter(name="digest", description="SHA-256 of the image bytes.", required=True, type=str, location=OpenApiParameter.PATH),
+            WIDTH_PARAMETER,
+        ],
+        responses={
+            status.HTTP_200_OK: OpenApiResponse(description="The image bytes."),
+            status.HTTP_206_PARTIAL_CONTENT: OpenApiResponse(description="The requested range of the image bytes."),
+            status.HTTP_304_NOT_MODIFIED: OpenApiResponse(description="The client already has these bytes."),
+            status.HTTP_404_NOT_FOUND: OpenApiResponse(description="No image the viewer may see has this digest."),
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: OpenApiResponse(description="The range is outside of the image."),
+        },
+        tags=['Image Posts API']
+    )
+    def get(self, request, digest):
+        try:
+            width = requested_width(request)
+        except ValueError:
+            return HttpResponse("w must be a positive number of pixels.", status=400, content_type="text/plain")
+
+        viewer = visibility.Viewer.of(request)
+        readable = Post.objects.filter(image_id=digest).filter(visibility.readable_by(viewer))
+        is_avatar = User.objects.filter(avatar_id=digest).exists()
+        if not is_avatar and not readable.exists():
+            return HttpResponse(status=404)
+
+        # The original bytes are only read if they are sent or a variant has to be made from them
+        blob = get_object_or_404(ImageBlob.objects.defer("data") if width else ImageBlob.objects, sha256=digest)
+        variant = get_variant(blob, width, request.headers.get("Accept")) if width else None
+        if variant is not None:
+            etag, content_type, data = f'"{digest}-{variant.width}-{variant.format}"', variant.content_type, variant.data
+        else:
+            etag, content_type, data = f'"{digest}"', blob.content_type, blob.data
+
+        # Shared caches may keep the bytes only if anyone can read them
+        cache_scope = "public" if is_avatar or readable.filter(visibility=visibility.PUBLIC).exists() else "private"
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"{cache_scope}, max-age=31536000, immutable",
+            "Accept-Ranges": "bytes",
+        }
+        if width:
+            headers["Vary"] = "Accept"  # the format of a variant depends on it
+        if etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+            return HttpResponse(status=304, headers=headers)
+
+        data = bytes(data)
+        byte_range = parse_range(request.headers.get("Range"), len(data))
+        if byte_range == "unsatisfiable":
+            return HttpResponse(status=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+        if byte_range is None:
+            return HttpResponse(data, content_type=content_type, headers=headers)
+
+        first, last = byte_range
+        headers["Content-Range"] = f"bytes {first}-{last}/{len(data)}"
+        return HttpResponse(data[first:last + 1], status=206, content_type=content_type, headers=headers)
+
+
+class ImageRawView(APIView):
+    @extend_schema(
+        summary="Redirect to the raw bytes of the image of a post",
+        description="Redirects to the immutable URL of the image of a local image post, see ImageBlobView.",
+        parameters=[
+            OpenApiParameter(name="author_serial", description="UUID of the author.", required=True, type=str, location=OpenApiParameter.PATH),
+            OpenApiParameter(name="post_serial", description="UUID of the post.", required=True, type=str, location=OpenApiParameter.PATH),
+            WIDTH_PARAMETER,
+        ],
+        responses={
+            status.HTTP_302_FOUND: OpenApiResponse(description="Location of the image bytes."),
+            status.HTTP_404_NOT_FOUND: OpenApiResponse(description="The post is not an image or could not be found."),
+        },
+        tags=['Image Posts API']
+    )
+    def get(self, request, author_serial, post_serial):
+        post = get_object_or_404(Post, uuid=post_serial, user_id=author_serial)
+        if not post.image_id:
+            return Response({"error": "post is not an image."}, status=404)
+        # The post may change its image, so only the redirect is not cached
+        url = reverse("get_image_blob", kwargs={"digest": post.image_id})
+        if "w" in request.query_params:
+            url = f"{url}?w={request.query_params['w']}"
+        return HttpResponseRedirect(url, headers={"Cache-Control": "no-cache"})
@@ -1,9 +1,14 @@
 from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils.timezone import is_aware, make_aware
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db.models import Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, serializers
+from rest_framework.exceptions import ValidationError
 from django.contrib.contenttypes.models import ContentType
 from drf_spectacular.utils import (
     extend_schema,
@@ -14,13 +19,15 @@ from drf_spectacular.utils import (
     inline_serializer,
 )
 from django.core.exceptions import ObjectDoesNotExist
-from requests.auth import HTTPBasicAuth
 from urllib.parse import urlparse, quote, urlunparse
-import requests, os, json, logging
+import logging, uuid
 from ..serializers import *
 from ..models import *
 from datetime import datetime
-from ..utils import url_parser
+from ..utils import url_parser, node_health, outbox, post_projection
+from ..utils.auth import get_request_node
+from ..utils.merged_stream import encode_cursor, decode_cursor
+from .posts import PROJECTION_PARAMETER
 from rest_framework.pagination import PageNumberPagination
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
@@ -41,7 +48,22 @@ class InboxView(APIView):
                 type=str,
                 required=True,
                 location=OpenApiParameter.PATH,
-            )
+            ),
+            OpenApiParameter(
+                name="type",
+                description="Only return these item types, comma separated (post, comment, like, follow, share)",
+                type=str,
+                required=False,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name="since",
+                description="Only return items received after this ISO 8601 date",
+                type=str,
+                required=False,
+                location=OpenApiParameter.QUERY,
+            ),
+            PROJECTION_PARAMETER,
         ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
@@ -114,42 +136,14 @@ class InboxView(APIView):
         user_obj = get_object_or_404(User, uuid=author_serial)
         inbox_obj = get_object_or_404(Inbox, user=user_obj)
 
-        # Get the latest inbox items
-        inbox_items_obj = InboxItem.objects.filter(inbox=inbox_obj).order_by("-time")
+        # Get the latest inbox items, filtered by type, date and reachability of their node in the database
+        inbox_items_obj = filter_inbox_items(InboxItem.objects.filter(inbox=inbox_obj), request).order_by("-time", "-id")
+        inbox_items_obj = check_origin_hosts(list(inbox_items_obj))
 
         serializer = InboxItemSerializer(
-            inbox_items_obj, many=True, context={"request": request}
+            inbox_items_obj, many=True, context={"request": request, "projection": post_projection.of(request)}
         )
-        filtered_data = []
-        for json in serializer.data:
-            if json.get("type") in ["like", "post", "comment"]:
-                base_host = url_parser.get_base_host(json.get("id"))
-            elif json.get("type") == "follow":
-                base_host = url_parser.get_base_host(json.get("actor").get("id"))
-
-            if (
-                base_host.strip().lower() != (settings.BASE_URL).strip().lower()
-            ):  # only for remote objects
-                try:
-                    req = requests.get(
-                        f"{base_host}/api/authors/?page=1&size=1",  # Any endpoint to ensure connection
-                        auth=HTTPBasicAuth(
-                            os.getenv("NODE_USERNAME"), os.getenv("NODE_PASSWORD")
-                        ),
-                    )
-
-                    if req.status_code == 200:
-                        filtered_data.append(json)
-                    elif req.status_code == 403:
-                        # Local node in remote node's list, but connection not allowed
-                        continue
-                    else:
-                        continue
-                except requests.exceptions.RequestException as e:
-                    print(f"Error occurred while fetching {base_host}: {e}")
-                    continue
-            else:  # local objects
-                filtered_data.append(json)
+        filtered_data = [json for json in serializer.data if json is not None]
 
         uri = request.build_absolute_uri("/")
 
@@ -295,7 +289,7 @@ class InboxView(APIView):
             # Delete the whole inbox
             user_obj = get_object_or_404(User, uuid=author_serial)
             inbox_obj = get_object_or_404(Inbox, user=user_obj)
-            inbox_obj.items.clear()
+            inbox_obj.items.all().delete()
             return Response(
                 {"message": "delete all inbox items successfully"},
                 status=status.HTTP_200_OK,
@@ -332,10 +326,10 @@ class InboxView(APIView):
                 + for local user, we have to further check if the post send to us is remote post or local post
                     > local post:
                         + Create another inbox item with type post, post_status is delete
-                        + Find all the previous post with matching post_id and remove it (handle edited post)
+                        + Find all the previous post with matching post_id in every inbox and remove it (handle edited post)
                     > remote post:
                         + Create another inbox item with with remote payload, post_status is delete
-                        + Find all the previous post with matching post_id and remove it (handle edited post)
+                        + Find all the previous post with matching post_id in every inbox and remove it (handle edited post)
             - if objet does not exist => remote user:
                 + we just simply send a delete request with a whole deleted post obj to their endpoint
         return message indicating successful or not
@@ -359,45 +353,45 @@ class InboxView(APIView):
                     "follower"
                 ]  # we not sure if follower is sent with or not but local user won't need it anyway
 
+            # Remove the old versions of that post including null, update, update-old, but keep the delete notices of
+            # the other inboxes, this one gets a new one. Only the origin of the post removes it from every inbox
+            items = InboxItem.objects if self.is_origin_of_post(request, payload.get("id")) else inbox_obj.items
+            items.tombstone_post(payload.get("id"), inbox=inbox_obj)
+
             try:
                 post_id = url_parser.extract_uuid(payload.get('id'))
                 post_obj = Post.objects.get(uuid=post_id)
-
-                # Find the old version of that posts in inbox including null, update, update-old or even delete and remove them
-                post_content_type = ContentType.objects.get(model="post")
-                InboxItem.objects.filter(
-                    inbox=inbox_obj,
-                    content_type=post_content_type,
-                    object_id=post_id,  # Filtering by the specific post ID
-                ).delete()
-
                 create_inbox_item(inbox_obj, post_obj, post_status="delete")
-                return Response(
-                    {"message": "We have notified other users about your deleted post"},
-                    status=status.HTTP_200_OK,
-                )
-
             except Post.DoesNotExist:
-                # Find the old version of that posts in inbox including null, update, update-old or even delete and remove them
-                InboxItem.objects.filter(
-                    inbox=inbox_obj,
-                    remote_payload__id=payload[
-                        "id"
-                    ],  # Check if remote_payload's id matches the incoming id
-                ).delete()
-
                 create_inbox_item(
                     inbox_obj, remote_payload=payload, post_status="delete"
                 )
-                return Response(
-                    {"message": "We have notified other users about your deleted post"},
-                    status=status.HTTP_200_OK,
-                )
+            return Response(
+                {"message": "We have notified other users about your deleted post"},
+                status=status.HTTP_200_OK,
+            )
 
         except User.DoesNotExist:
             # author_serial is remote user
             return self.send_modified_post_to_remote(payload, http_method="DELETE")
 
+    def is_origin_of_post(self, request, post_id):
+        """
+        Whether the sender of `request` owns the post `post_id`: the node it comes from, or the local author of the post
+        """
+        if not post_id:
+            return False
+        node = get_request_node(request)
+        if node is not None:
+            return urlparse(node.host).netloc.lower() == urlparse(post_id).netloc.lower()
+        if not request.user.is_authenticated:
+            return False
+        try:
+            post_uuid = uuid.UUID(url_parser.extract_uuid(post_id))
+        except ValueError:
+            return False
+        return Post.objects.filter(uuid=post_uuid, user_id=request.user.uuid).exists()
+
     """
     The deleted follow request can be from remote/local users
     """
@@ -493,59 +487,23 @@ class InboxView(APIView):
                     "follower"
                 ]  # we not sure if follower is sent with or not but local user won't need it anyway
 
+            # Mark the old versions of that post in this inbox as edited (update-old for the last update of a remote post)
+            inbox_obj.items.supersede_post(payload.get("id"))
+
             try:
                 post_id = url_parser.extract_uuid(payload.get('id'))
                 post_obj = Post.objects.get(uuid=post_id)
-                # Local post: Update inbox and modify existing post status
-                # Find the old version of that posts in inbox
-                post_content_type = ContentType.objects.get(model="post")
-                inbox_item_obj = InboxItem.objects.filter(
-                    inbox=inbox_obj,
-                    content_type=post_content_type,
-                    object_id=post_id,  # Filtering by the specific post ID
-                ).exclude(post_status__in=["delete", "edited"])
-
-                # Modify the post_status to edited
-                if inbox_item_obj.exists():
-                    for item in inbox_item_obj:
-                        item.post_status = "edited"
-                        item.save()
-
                 create_inbox_item(inbox_obj, post_obj, post_status="update")
-
-                return Response(
-                    {"message": "We have notified other users about your updated post"},
-                    status=status.HTTP_200_OK,
-                )
-
             except Post.DoesNotExist:
-                # Remote post: Update inbox and modify existing remote payload status
-                # Find the old version of that posts in inbox
-                existing_item_obj = InboxItem.objects.filter(
-                    inbox=inbox_obj,
-                    remote_payload__id=payload["id"],  # Check if remote_payload's id matches the incoming id
-                ).exclude(post_status__in=["delete", "edited"])
-
-                # Modify the post_status to edited
-                if existing_item_obj.exists():
-                    for item in existing_item_obj:
-                        if item.post_status == "update":
-                            # this means these are the last update
-                            item.post_status = "update-old"
-                        else:
-                            item.post_status = "edited"
-                        item.save()
-
                 if "modified_at" not in payload:
                     payload["modified_at"] = datetime.now().isoformat()
                 create_inbox_item(
                     inbox_obj, remote_payload=payload, post_status="update"
                 )
-
-                return Response(
-                    {"message": "We have notified other users about your updated post"},
-                    status=status.HTTP_200_OK,
-                )
+            return Response(
+                {"message": "We have notified other users about your updated post"},
+                status=status.HTTP_200_OK,
+            )
 
         except User.DoesNotExist:
             # author_serial is remote user
@@ -561,28 +519,15 @@ class InboxView(APIView):
             base_host = url_parser.get_base_host(remote_follower.get("host"))
             print(f"UPDATED POST JSON to be sent: {payload}")
 
+            precondition_url = ""
             if payload["visibility"] == "FRIENDS":
-                # Need a check here if remote follower indeed has accepted follow request of post's author in their node
+                # Only deliver if the remote follower indeed has accepted the follow request of the post's author in their node
                 author = payload["author"]
                 encoded_url = quote(author.get("id"), safe="")
-                remote_follow_status_url = (
+                precondition_url = (
                     f"{base_host}/api/authors/{follower_serial}/followers/{encoded_url}"
                 )
 
-                response = requests.get(
-                    remote_follow_status_url,
-                    auth=HTTPBasicAuth(
-                        os.getenv("NODE_USERNAME"), os.getenv("NODE_PASSWORD")
-                    ),
-                )
-
-                if (
-                    response.status_code == 404
-                ):  # User not a follower of remote follower
-                    return Response(
-                        {"message": "Friends-only post is not sent to remote node."},
-                        status=status.HTTP_200_OK,
-                    )
             # For DELETE post, we need to change the visibility to DELETED
             if http_method == "DELETE":
                 payload["visibility"] = "DELETED"
@@ -592,27 +537,17 @@ class InboxView(APIView):
                 http_method = "POST"
             print(f"method to be sent: {http_method}")
 
-            # Send the updated/deleted post to the remote inbox
+            # Queue the updated/deleted post for the remote inbox, it is sent in the background
             remote_inbox_url = f"{base_host}/api/authors/{follower_serial}/inbox"
-            response = requests.request(
-                method=http_method,
-                url=remote_inbox_url,
-                json=payload,
-                auth=HTTPBasicAuth(
-                    os.getenv("NODE_USERNAME"), os.getenv("NODE_PASSWORD")
-                ),
+            delivery = outbox.enqueue(
+                "post", remote_inbox_url, payload, method=http_method, precondition_url=precondition_url
             )
 
-            if response.status_code == 200:
-                return Response(
-                    {"message": "Post successfully sent to remote inbox."},
-                    status=status.HTTP_200_OK,
-                )
-            else:
-                return Response(
-                    {"message": f"Failed to send post: {response.text}"},
-                    status=response.status_code,
-                )
+            return queued_response(
+                delivery,
+                {"message": "Post queued for the remote inbox."},
+                status.HTTP_200_OK,
+            )
 
         except Exception as e:
             return Response(
@@ -896,25 +831,13 @@ class InboxView(APIView):
             base_host = url_parser.get_base_host(remote_follower.get("host"))
             remote_inbox_url = f"{base_host}/api/authors/{follower_serial}/inbox"
 
-            response = requests.post(
-                remote_inbox_url,
-                json=payload,
-                auth=HTTPBasicAuth(
-                    os.getenv("NODE_USERNAME"), os.getenv("NODE_PASSWORD")
-                ),
+            delivery = outbox.enqueue("post", remote_inbox_url, payload)
+            return queued_response(
+                delivery,
+                {"message": "Post queued for the remote inbox."},
+                status.HTTP_201_CREATED,
             )
 
-            if response.status_code == 200 or response.status_code == 201:
-                return Response(
-                    {"message": "Post successfully sent to remote inbox."},
-                    status=status.HTTP_201_CREATED,
-                )
-            else:
-                return Response(
-                    {"error": f"Failed to send post: {response.text}"},
-                    status=response.status_code,
-                )
-
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -943,43 +866,36 @@ class InboxView(APIView):
 
             remote_inbox_url = f"{base_host}/api/authors/{author_serial}/inbox"
 
-            response = requests.post(
-                remote_inbox_url,
-                json=payload,
-                auth=HTTPBasicAuth(
-                    os.getenv("NODE_USERNAME"), os.getenv("NODE_PASSWORD")
-                ),
-            )
+            # Make a Follow object in local regardless of whether the remote request is going to be accepted
+            local_follower_uuid = url_parser.extract_uuid(payload.get('actor').get('id'))
 
-            if response.status_code in [200, 201]:
-                # If successful, make a Follow object in local regardless of whether the remote request is going to be accepted
-                local_follower_uuid = url_parser.extract_uuid(payload.get('actor').get('id'))
-
-                follow_data = {
-                    "local_followee": None,
-                    "remote_followee": payload["object"].get("id"),
-                    "local_follower": local_follower_uuid,
-                    "remote_follower": None,
-                }
-
-                serializer = FollowSerializer(data=follow_data)
-                if serializer.is_valid():
-                    serializer.save()
-                    return Response(
-                        {"message": "Follow request sent to remote inbox."},
-                        status=status.HTTP_201_CREATED,
-                    )
-                else:
-                    print(serializer.errors)
-                    return Response(
-                        serializer.errors, status=status.HTTP_400_BAD_REQUEST
-                    )
-            else:
+            follow_data = {
+                "local_followee": None,
+                "remote_followee": payload["object"].get("id"),
+                "local_follower": local_follower_uuid,
+                "remote_follower": None,
+            }
+
+            serializer = FollowSerializer(data=follow_data)
+            if not serializer.is_valid():
+                print(serializer.errors)
                 return Response(
-                    {"error": f"Failed to send follow request: {response.text}"},
-                    status=response.status_code,
+                    serializer.errors, status=status.HTTP_400_BAD_REQUEST
                 )
 
+            # Asking again (e.g. after a rejection) sends the request again, the follow is already there
+            if not Follow.objects.filter(
+                local_follower_id=local_follower_uuid,
+                remote_followee_key=url_parser.author_key(payload["object"].get("id")),
+            ).exists():
+                serializer.save()
+            delivery = outbox.enqueue("follow", remote_inbox_url, payload)
+            return queued_response(
+                delivery,
+                {"message": "Follow request queued for the remote inbox."},
+                status.HTTP_201_CREATED,
+            )
+
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1044,30 +960,12 @@ class InboxView(APIView):
         if not payload["published"]:
             return Response(f"published field is invalid: {payload['published']}", status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            response = requests.post(
-                remote_inbox_api,
-                auth=HTTPBasicAuth(
-                    os.getenv("NODE_USERNAME"), os.getenv("NODE_PASSWORD")
-                ),
-                json=payload,
-            )
-
-            if response.status_code == 200 or response.status_code == 201:
-                return Response(
-                    {"message": "Like sent to remote inbox."},
-                    status=status.HTTP_201_CREATED,
-                )
-
-            elif response.status_code == 403:
-                return Response(
-                    {"message": "Unauthorized on remote node."},
-                    status=status.HTTP_403_FORBIDDEN,
-                )
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        delivery = outbox.enqueue("like", remote_inbox_api, payload)
+        return queued_response(
+            delivery,
+            {"message": "Like queued for the remote inbox."},
+            status.HTTP_201_CREATED,
+        )
 
     def send_comment_to_remote(self, payload, request, test=False):
         print(f"Initial Comment Payload: {payload}")
@@ -1112,11 +1010,6 @@ class InboxView(APIView):
         payload["post"] = post_url
         payload["id"] = comment_url
 
-        payload_json = json.dumps(payload)
-        headers = {
-            "Content-Type": "application/json",
-            "Content-Length": str(len(payload_json)),
-        }
         # Replace the netloc (host) in full_url with author_host
         inbox_url = parsed_url._replace(netloc=author_host)
         formatted_url = urlunparse(inbox_url)
@@ -1136,44 +1029,9 @@ class InboxView(APIView):
         
         print(f"FINAL COMMENT PAYLOAD: {payload} to be sent to {author_host}")
 
-        try:
-            # Send the POST request
-            response = requests.post(
-                formatted_url,
-                auth=HTTPBasicAuth(os.getenv("NODE_USERNAME"), os.getenv("NODE_PASSWORD")),
-                data=payload_json,
-                headers=headers,
-            )
-            
-            print(f"Response status code: {response.status_code}")
-
-            if response.status_code in [200, 201]:
-                try:
-                    data = response.json()
-                except requests.JSONDecodeError:
-                    print("Response is not valid JSON.")
-                    data = {"message": "Successfully sent comment to remote node, but response is not JSON."}
-                
-                print(f"Returned comment data: {data}") # If remote groups don't send us comment response, gonna fail in frontend
-                return Response(payload, response.status_code)
-            else:
-                return Response(
-                    {"error": f"Failed to send comment. Status code: {response.status_code}, Response: {response.text}"},
-                    response.status_code,
-                )
-        except requests.RequestException as e:
-            # Handle network-related issues
-            print(f"Network error: {str(e)}")
-            return Response(
-                {"error": f"Network error occurred while sending comment: {str(e)}"},
-                500,
-            )
-        except Exception as e:
-            print(f"Unexpected error: {str(e)}")
-            return Response(
-                {"error": f"An unexpected error occurred: {str(e)}"},
-                500,
-            )
+        # The frontend shows the comment object we answer with, the remote node gets it in the background
+        delivery = outbox.enqueue("comment", formatted_url, payload)
+        return queued_response(delivery, payload, status.HTTP_201_CREATED)
 
     """
     payload is a follow request object
@@ -1347,25 +1205,70 @@ def create_inbox_item(inbox, content=None, remote_payload=None, post_status=None
     if content:
         content_type = ContentType.objects.get_for_model(content)
         id = getattr(content, "uuid", getattr(content, "id", None))
-        inbox_item_object = InboxItem.objects.create(
+        InboxItem.objects.create(
+            inbox=inbox,
             content_type=content_type,
             object_id=id,
             content_object=content,
             post_status=post_status,
         )
     else:
-        inbox_item_object = InboxItem.objects.create(
-            remote_payload=remote_payload, post_status=post_status
+        InboxItem.objects.create(
+            inbox=inbox, remote_payload=remote_payload, post_status=post_status
         )
-    inbox.items.add(inbox_item_object)
+        if isinstance(remote_payload, dict) and str(remote_payload.get("type", "")).lower() == "post":
+            # Keep the remote post cache used by the public stream up to date
+            RemotePost.upsert_from_payload(remote_payload, post_status)
+
+
+def queued_response(delivery, data, response_status):
+    """
+    Response to an activity queued for a remote inbox, the Location header points to the status of its delivery
+    """
+    if isinstance(data, dict) and "message" in data:
+        data["delivery"] = str(delivery.uuid)
+    location = reverse("outbox_delivery", kwargs={"delivery_id": delivery.uuid})
+    return Response(data, status=response_status, headers={"Location": location})
+
+
+def filter_inbox_items(inbox_items, request):
+    """
+    Filters the inbox items with the query parameters, in the database:
+        type: only these item types, comma separated (post, comment, like, follow, share)
+        since: only items received after this ISO 8601 date, to poll for new items
+    Items coming from nodes we currently cannot reach are left out
+    """
+    item_types = request.query_params.get("type")
+    if item_types:
+        inbox_items = inbox_items.filter(item_type__in=[item_type.strip().lower() for item_type in item_types.split(",")])
+
+    since = request.query_params.get("since")
+    if since:
+        try:
+            since_time = parse_datetime(since.replace(" ", "+"))  # + of the UTC offset decoded as a space
+        except ValueError:
+            since_time = None
+        if since_time is None:
+            raise ValidationError({"since": "Must be an ISO 8601 date, e.g. 2024-11-20T10:00:00+00:00"})
+        if timezone.is_naive(since_time):
+            since_time = timezone.make_aware(since_time)
+        inbox_items = inbox_items.filter(time__gt=since_time)
+
+    return inbox_items.exclude(origin_host__in=node_health.unreachable_hosts())
+
+
+def check_origin_hosts(inbox_items):
+    """
+    Schedule a background probe for the nodes of these items we know nothing about yet
+    """
+    for origin_host in {item.origin_host for item in inbox_items if item.origin_host}:
+        node_health.is_reachable(origin_host)
+    return inbox_items
 
 
 def delete_inbox_item(inbox, inbox_item_obj):
-    # This is to remove the inbox_item from the items list
-    for item in inbox.items.all():
-        # content_object is the actual object (FollowRequest or Post)
-        if item.content_object == inbox_item_obj:
-            inbox.items.remove(item)
+    # This is to remove the inbox_item (FollowRequest or Post) from the items list, returns how many were removed
+    return inbox.items.of_content(inbox_item_obj).delete()[0]
 
 
 class PaginatedInboxView(APIView): 
@@ -1393,7 +1296,29 @@ class PaginatedInboxView(APIView):
                 type=int,
                 required=False,
                 location=OpenApiParameter.QUERY,
-            )
+            ),
+            OpenApiParameter(
+                name='cursor',
+                description='next_cursor of the previous page, continues after its last item (page is ignored)',
+                type=str,
+                required=False,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name='type',
+                description='Only return these item types, comma separated (post, comment, like, follow, share)',
+                type=str,
+                required=False,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name='since',
+                description='Only return items received after this ISO 8601 date',
+                type=str,
+                required=False,
+                location=OpenApiParameter.QUERY,
+            ),
+            PROJECTION_PARAMETER,
         ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
@@ -1410,6 +1335,7 @@ class PaginatedInboxView(APIView):
                         'size': serializers.IntegerField(),
                         'total_pages': serializers.IntegerField(),
                         'total_items': serializers.IntegerField(),
+                        'next_cursor': serializers.CharField(allow_null=True),
                     }
                 ),
                 description="Paginated Inbox items retrieved successfully",
@@ -1424,47 +1350,47 @@ class PaginatedInboxView(APIView):
         try:
             user_obj = get_object_or_404(User, uuid=author_serial)
             inbox_obj = get_object_or_404(Inbox, user=user_obj)
-            inbox_items_obj = InboxItem.objects.filter(inbox=inbox_obj).order_by("-time")
+            inbox_items_obj = filter_inbox_items(InboxItem.objects.filter(inbox=inbox_obj), request).order_by("-time", "-id")
 
             # Pagination parameters
             page = request.query_params.get('page', 1)
-            size = request.query_params.get('size', 5)  # Default size is 5
+            size = int(request.query_params.get('size', 5))  # Default size is 5
+            cursor = request.query_params.get('cursor')
 
             paginator = Paginator(inbox_items_obj, size)
-            try:
-                paginated_items = paginator.page(page)
-            except PageNotAnInteger:
-                paginated_items = paginator.page(1)
-            except EmptyPage:
-                paginated_items = []
-
-            serializer = InboxItemSerializer(paginated_items, many=True, context={"request": request})
+            next_cursor = None
+            if cursor:
+                # Continue after the last item of the previous page, unaffected by items received in between
+                try:
+                    cursor_time, _, cursor_id = decode_cursor(cursor)
+                except ValueError:
+                    return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+                paginated_items = list(inbox_items_obj.filter(
+                    Q(time__lt=cursor_time) | Q(time=cursor_time, id__lt=cursor_id)
+                )[:size + 1])
+                if len(paginated_items) > size:
+                    paginated_items = paginated_items[:size]
+                    next_cursor = encode_cursor((paginated_items[-1].time, 0, paginated_items[-1].id))
+                page = None
+            else:
+                try:
+                    paginated_items = paginator.page(page)
+                except PageNotAnInteger:
+                    paginated_items = paginator.page(1)
+                except EmptyPage:
+                    paginated_items = []
+
+                if paginated_items and paginated_items.has_next():
+                    next_cursor = encode_cursor((paginated_items[-1].time, 0, paginated_items[-1].id))
+                page = int(page)
+
+            serializer = InboxItemSerializer(
+                check_origin_hosts(list(paginated_items)), many=True,
+                context={"request": request, "projection": post_projection.of(request)}
+            )
             
-            filtered_data = []
-            for json in serializer.data:
-                
-                if (json == None):
-                    continue
-                
-                if json.get("type") in ["like", "post", "comment"]:
-                    base_host = url_parser.get_base_host(json.get('id'))
-                elif json.get("type") == "follow":
-                    base_host = url_parser.get_base_host(json.get('actor').get('id'))
-
-                if base_host != settings.BASE_URL:
-                    try:
-                        req = requests.get(
-                            f"{base_host}/api/authors/?page=1&size=1",
-                            auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD')),
-                        )
-                        if req.status_code == 200:
-                            filtered_data.append(json)
-                        elif req.status_code == 403:
-                            continue
-                    except requests.exceptions.RequestException:
-                        continue
-                else:
-                    filtered_data.append(json)
+            filtered_data = [json for json in serializer.data if json is not None]
 
             uri = request.build_absolute_uri("/")
 
@@ -1472,13 +1398,16 @@ class PaginatedInboxView(APIView):
                 'user': f"{uri}api/authors/{author_serial}",
                 'items': filtered_data,
                 'type': 'inbox',
-                'page': int(page),
+                'page': page,
                 'size': int(size),
                 'total_pages': paginator.num_pages,
                 'total_items': paginator.count,
+                'next_cursor': next_cursor,
             }
             print(data)
             return Response(data, status=status.HTTP_200_OK)
+        except ValidationError:
+            raise
         except Exception as e:
             print(f"ERROR: {e}")
     
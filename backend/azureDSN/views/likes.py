@@ -8,9 +8,7 @@ from uuid import UUID
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
-from ..utils import url_parser
-import requests, os
-from requests.auth import HTTPBasicAuth
+from ..utils import url_parser, federation, conditional, response_cache
 
 class LikesPagination(PageNumberPagination):
     page_size=10
@@ -198,6 +196,19 @@ class AuthorLikesView(APIView):
         return pagination.get_paginated_response(serialized_likes) # auto returns status code
 
 
+def post_likes_tags(author_serial=None, post_serial=None, post_fqid=None, comment_fqid=None):
+    # Only the likes of local posts, the others come from their node
+    if comment_fqid:
+        return None
+    if post_fqid:
+        try:
+            post_serial = UUID(post_fqid.strip('/').split('/')[-1])
+        except ValueError:
+            return None
+    elif not isinstance(author_serial, UUID) or not User.objects.filter(uuid=author_serial).exists():
+        return None
+    return [response_cache.post_tag(post_serial)]
+
 class LikesView(APIView):
     pagination_provider = LikesPagination
     @extend_schema(
@@ -259,6 +270,7 @@ class LikesView(APIView):
             },
             tags=['Likes & Liked API']
     )
+    @response_cache.cached("post_likes", post_likes_tags)
     def get(self, request, author_serial=None, post_serial=None, post_fqid=None, comment_fqid=None):
         if (comment_fqid and author_serial and post_serial):
             """
@@ -320,9 +332,8 @@ class LikesView(APIView):
 
                 endpoint = f"{author_host}/api/authors/{author_serial}/posts/{post_serial}/likes"
 
-                response = requests.get(
+                response = federation.get(
                     endpoint,
-                    auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD')),
                     timeout=5
                 )
 
@@ -360,10 +371,18 @@ class LikesView(APIView):
             count = Like.objects.filter(post=post).count()
             author_serial = post.user.uuid
 
+        # Likes are never edited, the page changes only when one is added or removed, which changes the count but may
+        # take the latest date back: no Last-Modified, see utils/conditional.py
+        listed = conditional.summary(likes)
+        version = conditional.validators(request.get_full_path(), listed)
+        not_modified = conditional.not_modified(request, version)
+        if not_modified:
+            return not_modified
+
         pagination = self.pagination_provider()
         page = pagination.paginate_queryset(likes, request)
 
         serialized_likes = LikeSerializer(page, many=True).data
 
-        return pagination.get_paginated_response(serialized_likes) # auto returns status code
+        return conditional.with_validators(pagination.get_paginated_response(serialized_likes), version) # auto returns status code
 
@@ -9,6 +9,7 @@ from rest_framework.views import APIView
 from urllib.parse import urlparse
 from ..models.user import NodeUser, User
 from ..serializers import NodeSerializer, NodeWithAuthenticationSerializer
+from ..utils import federation, node_health, remote_images, response_cache
 
 class GetNodesView(APIView):
     @extend_schema(
@@ -259,3 +260,78 @@ class DeleteNodeView(APIView):
         except NodeUser.DoesNotExist:
             return Response({'error': 'Node not found.'}, status=status.HTTP_404_NOT_FOUND)
         
+
+class NodeMetricsView(APIView):
+    @extend_schema(
+        summary="Fetch the federation client metrics.",
+        description="Per remote node: number of calls, failed calls, average and max latency, and connection pool usage since the server started, and the last known reachability of each node. Also the counters of the cache of remote images and, per endpoint, of the cache of public responses.",
+        responses={
+            status.HTTP_200_OK: OpenApiResponse(
+                description="Metrics of the calls made to each remote node.",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string", "example": "metrics"},
+                        "nodes": {
+                            "type": "object",
+                            "additionalProperties": {
+                                "type": "object",
+                                "properties": {
+                                    "requests": {"type": "integer", "example": 42},
+                                    "errors": {"type": "integer", "example": 1},
+                                    "avg_latency_ms": {"type": "number", "example": 120.5},
+                                    "max_latency_ms": {"type": "number", "example": 980.0},
+                                    "connections_opened": {"type": "integer", "example": 3},
+                                    "pool_hits": {"type": "integer", "example": 39},
+                                }
+                            }
+                        },
+                        "health": {
+                            "type": "object",
+                            "additionalProperties": {
+                                "type": "object",
+                                "properties": {
+                                    "status": {"type": "string", "example": "up"},
+                                    "age_seconds": {"type": "number", "example": 12.5},
+                                }
+                            }
+                        },
+                        "remote_images": {
+                            "type": "object",
+                            "properties": {
+                                "hits": {"type": "integer", "example": 120},
+                                "revalidated": {"type": "integer", "example": 14},
+                                "misses": {"type": "integer", "example": 9},
+                                "stale": {"type": "integer", "example": 0},
+                                "evictions": {"type": "integer", "example": 2},
+                                "hit_ratio": {"type": "number", "example": 0.937},
+                            }
+                        },
+                        "response_cache": {
+                            "type": "object",
+                            "additionalProperties": {
+                                "type": "object",
+                                "properties": {
+                                    "hits": {"type": "integer", "example": 310},
+                                    "misses": {"type": "integer", "example": 25},
+                                    "hit_ratio": {"type": "number", "example": 0.925},
+                                }
+                            }
+                        }
+                    }
+                }
+            ),
+        },
+        tags=["Node API"]
+    )
+    def get(self, request):
+        """
+            Metrics of the pooled federation client, keyed by remote node.
+        """
+        return Response({
+            "type": "metrics",
+            "nodes": federation.metrics.snapshot(),
+            "health": node_health.snapshot(),
+            "remote_images": remote_images.metrics.snapshot(),
+            "response_cache": response_cache.metrics.snapshot(),
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,33 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from ..models import OutboxDelivery
+from ..serializers import OutboxDeliverySerializer
+
+class OutboxDeliveryView(APIView):
+    @extend_schema(
+        summary="Fetch the delivery status of an activity sent to a remote inbox.",
+        description="Posts, follow requests, likes and comments sent to remote authors are queued and delivered in the background. The Location header of the inbox response points here.",
+        parameters=[
+            OpenApiParameter(
+                name="delivery_id",
+                description="UUID of the delivery.",
+                type=str,
+                required=True,
+                location=OpenApiParameter.PATH
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: OutboxDeliverySerializer,
+            status.HTTP_404_NOT_FOUND: OpenApiResponse(description="Delivery not found."),
+        },
+        tags=["Inbox API"]
+    )
+    def get(self, request, delivery_id):
+        """
+            Status of one delivery: pending, sending, delivered, skipped or dead
+        """
+        delivery = get_object_or_404(OutboxDelivery, uuid=delivery_id)
+        return Response(OutboxDeliverySerializer(delivery).data, status=status.HTTP_200_OK)
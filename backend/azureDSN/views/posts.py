@@ -1,20 +1,18 @@
 from urllib.parse import urlparse
-from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
-from ..models import User, Post, Follow
+from ..models import User, Post, Like, Comment
 from ..serializers import PostSerializer, UserSerializer, CreatePostSerializer
 from rest_framework.response import Response
 from rest_framework.authentication import get_authorization_header
 from rest_framework import status
-from requests.auth import HTTPBasicAuth
-from django.http import HttpResponse
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from rest_framework.pagination import PageNumberPagination
+from uuid import UUID
 import requests, os
 from ..utils.auth import is_valid_basic_auth
-from ..utils import url_parser
+from ..utils import url_parser, federation, visibility, post_projection, conditional, response_cache
 
 
 class AuthorPostView(APIView):
@@ -67,72 +65,23 @@ class AuthorPostView(APIView):
             author = get_object_or_404(User, uuid=author_serial)
             post = get_object_or_404(Post, uuid=post_serial, user=author)
 
-            # Check visibility for permission logic:
-            if post.visibility == 1:  # PUBLIC
-                # Public posts are visible to everyone
-                serializer = PostSerializer(post)
-                return Response(serializer.data, status=200)
-
-            elif post.visibility == 2:  # FRIENDS
-                # Friends-only posts require authentication
-                remote = False
-                if not request.user.is_authenticated:
-                    auth_header = get_authorization_header(request).split()
-                    if len(auth_header) == 2 and auth_header[0].lower() == b"basic":
-                        remote = is_valid_basic_auth(auth_header[1].decode())
-                    if not remote:
-                        return Response("Friends-only posts must be authenticated to view.", status=403)
-                    
-                # Check if the request user is the author or a friend of the author,
-                # remote request has no request.user, but will only get the post if they are friends
-                elif request.user:
-                    if (request.user.uuid != author.uuid):
-                        get_friends = requests.get(
-                            f"{settings.BASE_URL}/api/authors/{author.uuid}/following/?action=following",
-                            headers={"Internal-Auth": settings.INTERNAL_API_SECRET}
-                        )
-
-                        friends = get_friends.json().get('followers', [])
-
-                        is_friend = False
-                        for friend in friends:
-                            friend_uuid = friend['id'].split('/')[-1]
-
-                            if friend_uuid == str(request.user.uuid):
-                                is_friend = True
-                                break
-
-                        if not is_friend:
-                            return Response("You do not have permission to view this friend's post.", status=403)
-                    
-                    # Else this author is trying to view their own friends-only post
-                
-                # If permission is granted, serialize and return the post
-                serializer = PostSerializer(post)
-                return Response(serializer.data, status=200)
-
-            elif post.visibility == 3:  # UNLISTED
-                # Unlisted posts require authentication
-                remote = False
-                if not request.user.is_authenticated:
-                    auth_header = get_authorization_header(request).split()
-                    if len(auth_header) == 2 and auth_header[0].lower() == b"basic":
-                        remote = is_valid_basic_auth(auth_header[1].decode())
-                    if not remote:
-                        return Response("Unlisted posts must be authenticated to view.", status=403)
-                
-                # If authenticated, return the post
-                serializer = PostSerializer(post)
-                return Response(serializer.data, status=200)
-
-            elif post.visibility == 4:  # DELETED
-                # Deleted posts should return a 404 error
-                if request.user.is_authenticated:
-                    requestUser = get_object_or_404(User, uuid=request.user.uuid)
-                    if requestUser.is_staff:
-                        serializer = PostSerializer(post)
-                        return Response(serializer.data, status = 200)             
-                return HttpResponse("This post does not exist.", status=404) # We don't want to disclose information that this post still exists technically
+            # Check visibility for permission logic, see utils/visibility.py
+            viewer = visibility.Viewer.of(request)
+            if not visibility.can_read(viewer, post):
+                # A deleted post is a 404, we don't want to disclose information that this post still exists technically
+                message, status_code = visibility.refusal(viewer, post)
+                return Response(message, status=status_code)
+
+            # The post embeds its author and the first page of its likes and comments, no Last-Modified as a like or
+            # comment can be removed, see utils/conditional.py
+            likes, comments = conditional.summary(Like.objects.filter(post=post)), conditional.summary(Comment.objects.filter(post=post))
+            version = conditional.validators(post.uuid, post.modified_at, author.modified_at, likes, comments)
+            not_modified = conditional.not_modified(request, version)
+            if not_modified:
+                return not_modified
+
+            serializer = PostSerializer(post)
+            return conditional.with_validators(Response(serializer.data, status=200), version)
         
     @extend_schema(
         summary="Edit a post",
@@ -268,6 +217,17 @@ class AuthorPostView(APIView):
         else:
             return Response("You are not the author of this post.", status=403)
 
+PROJECTION_PARAMETER = OpenApiParameter(
+    name=post_projection.PARAMETER,
+    description=(
+        "`list` to leave out the content: text posts come with a preview of it, image posts with the URL of their image, "
+        "both with contentSize and the contentUrl of the whole content."
+    ),
+    required=False,
+    type=str,
+    enum=[post_projection.LIST],
+)
+
 class PostsPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'size'
@@ -282,6 +242,12 @@ class PostsPagination(PageNumberPagination):
             "src": data,
         })
 
+def local_author_tags(author_serial):
+    # The posts of remote authors come from their node, only the ones of local authors are cached
+    if isinstance(author_serial, UUID) and User.objects.filter(uuid=author_serial).exists():
+        return [response_cache.author_tag(author_serial)]
+    return None
+
 class AuthorPostsAllView(APIView):
     """
     URL: ://service/api/authors/{AUTHOR_SERIAL}/posts
@@ -312,7 +278,8 @@ class AuthorPostsAllView(APIView):
                 type=int,
                 required=False,
                 location=OpenApiParameter.QUERY
-            )
+            ),
+            PROJECTION_PARAMETER,
         ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(response=PostSerializer(many=True), description='Posts retrieved successfully'),
@@ -321,6 +288,7 @@ class AuthorPostsAllView(APIView):
         },
         tags=['Posts API']
     )
+    @response_cache.cached("author_posts", local_author_tags)
     def get(self, request, author_serial):
         """
         GET [local, remote] get the recent posts from author AUTHOR_SERIAL (paginated)
@@ -339,36 +307,31 @@ class AuthorPostsAllView(APIView):
             author = User.objects.get(uuid=author_serial)
             self.fetch_github_activity(author)
 
-            posts = Post.objects.filter(user=author).filter(visibility__in=[1, 2, 3]).order_by('-modified_at')
+            # Public posts for everyone, friends-only ones for friends, everything but deleted ones for the author
+            posts = Post.objects.filter(user=author).filter(visibility.on_author_page(visibility.Viewer.of(request))).order_by('-modified_at')
             # Likes and Comments will be handled in PostSerializer below
 
-            if request.user.is_authenticated:
-                if request.user == author:  # "I want to view my own public profile page"
-                    pass
-                else:
-                    # Retrieve the followees (users the current user who made the request is following)
-                    followee_uuids = Follow.objects.filter(local_follower=request.user).values_list('local_followee', flat=True)
-                    followees = User.objects.filter(uuid__in=followee_uuids)
-
-                    friends = Follow.objects.filter(
-                        local_followee=request.user,
-                        local_follower__in=followees
-                    ).values_list('local_follower_id', flat=True)
-
-                    if author.uuid in friends:
-                        posts = posts.filter(visibility__in=[1, 2])
-                    else:
-                        # The user who made the request has no relationship with the author whose profile page they want to view
-                        posts = posts.filter(visibility=1)
-            else:
-                # Unauthenticated users should only see public posts
-                posts = posts.filter(visibility=1)
+            # Any edited, added or removed post changes the latest date or the count of the posts. No Last-Modified,
+            # the latest date goes back when the newest post is deleted, see utils/conditional.py
+            listed, likes, comments = (
+                conditional.summary(posts, "modified_at"),
+                conditional.summary(Like.objects.filter(post__in=posts)),
+                conditional.summary(Comment.objects.filter(post__in=posts)),
+            )
+            version = conditional.validators(request.get_full_path(), author.modified_at, listed, likes, comments)
+            not_modified = conditional.not_modified(request, version)
+            if not_modified:
+                return not_modified
+
+            projection = post_projection.of(request)
+            if projection == post_projection.LIST:
+                posts = post_projection.for_list(posts)
             
             pagination = self.pagination_provider()
             page = pagination.paginate_queryset(posts, request)
-            serialized_posts = PostSerializer(page, many=True).data
+            serialized_posts = PostSerializer(page, many=True, context={"projection": projection}).data
 
-            return pagination.get_paginated_response(serialized_posts)
+            return conditional.with_validators(pagination.get_paginated_response(serialized_posts), version)
         
         except User.DoesNotExist:
             # author_serial is remote user
@@ -381,10 +344,9 @@ class AuthorPostsAllView(APIView):
                 base_host = url_parser.get_base_host(remote_host)
                 # send request to fetch all posts
                 remote_user_url = f"{base_host}/api/authors/{author_serial}/posts/"
-                response = requests.get(
+                response = federation.get(
                     url=remote_user_url,
                     params={"page": 1, "size": 10},  
-                    auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
                 )
 
                 if response.status_code == 200:
@@ -627,15 +589,18 @@ class PostView(APIView):
 
             if host.strip().lower() == os.getenv('BASE_URL', 'http://localhost:8000').strip().lower():
                 post = get_object_or_404(Post, uuid=post_serial)
-                post_visibility = post.visibility
+                # Same rules as the author's post endpoint, see utils/visibility.py
+                viewer = visibility.Viewer.of(request)
+                if not visibility.can_read(viewer, post):
+                    message, status_code = visibility.refusal(viewer, post)
+                    return Response(message, status=status_code)
                 serializer = PostSerializer(post)
-                post_data = serializer.data
+                return Response(serializer.data, status=200)
             else:
                 # Dealing with remote post
                 try:
-                    response = requests.get(
+                    response = federation.get(
                         decoded_post_fqid,
-                        auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD')),
                     )
                     if (response.status_code == 200):
                         post_data = response.json()
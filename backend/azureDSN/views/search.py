@@ -0,0 +1,78 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from ..serializers import PostSerializer, UserSerializer
+from ..models import Post, User, SearchDocument
+from ..utils import search, visibility
+from .posts import PostsPagination
+
+KINDS = {
+    "all": [SearchDocument.KIND_POST, SearchDocument.KIND_AUTHOR],
+    "posts": [SearchDocument.KIND_POST],
+    "authors": [SearchDocument.KIND_AUTHOR],
+}
+
+class SearchPagination(PostsPagination):
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["type"] = "search"
+        return response
+
+class SearchView(APIView):
+    pagination_provider = SearchPagination
+
+    @extend_schema(
+        summary="Search posts and authors",
+        description=(
+            "Full-text search over the title, description and text content of the local posts and the display name, "
+            "username and bio of the local authors, most relevant first. Only the posts the viewer could see on an "
+            "author page or in their stream are returned. Every word of `q` must match, as a prefix."
+        ),
+        parameters=[
+            OpenApiParameter(name="q", description="Words to search for", required=True, type=str),
+            OpenApiParameter(name="type", description="What to search: all (default), posts or authors", required=False, type=str),
+            OpenApiParameter(name="page", description="Page number", required=False, type=int),
+            OpenApiParameter(name="size", description="Number of results per page", required=False, type=int),
+        ],
+        responses={
+            status.HTTP_200_OK: OpenApiResponse(
+                description="A page of matching posts (type post) and authors (type author), most relevant first.",
+            ),
+            status.HTTP_400_BAD_REQUEST: OpenApiResponse(description="Missing query or unknown type."),
+        },
+        tags=["Search API"]
+    )
+    def get(self, request):
+        """
+        Search the local posts and authors
+        """
+        query = request.query_params.get("q", "")
+        kinds = KINDS.get(request.query_params.get("type", "all"))
+        if kinds is None:
+            return Response({"error": f"type must be one of {', '.join(KINDS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if not search.terms_of(query):
+            return Response({"error": "q must contain at least one word."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Drop the posts the viewer may not see before paginating, so every page is full
+        matches = search.search(query, kinds)
+        post_ids = [object_id for kind, object_id in matches if kind == SearchDocument.KIND_POST]
+        if post_ids:
+            visible = set(
+                Post.objects.filter(uuid__in=post_ids)
+                .filter(visibility.in_search(visibility.Viewer.of(request)))
+                .values_list("uuid", flat=True)
+            )
+            matches = [(kind, object_id) for kind, object_id in matches if kind != SearchDocument.KIND_POST or object_id in visible]
+
+        pagination = self.pagination_provider()
+        page = pagination.paginate_queryset(matches, request, view=self)
+
+        page_post_ids = [object_id for kind, object_id in page if kind == SearchDocument.KIND_POST]
+        page_author_ids = [object_id for kind, object_id in page if kind == SearchDocument.KIND_AUTHOR]
+        posts = list(Post.objects.filter(uuid__in=page_post_ids).select_related("user"))
+        authors = list(User.objects.filter(uuid__in=page_author_ids, type="author"))
+
+        results = {(SearchDocument.KIND_POST, post.uuid): data for post, data in zip(posts, PostSerializer(posts, many=True).data)}
+        results.update({(SearchDocument.KIND_AUTHOR, author.uuid): data for author, data in zip(authors, UserSerializer(authors, many=True).data)})
+        return pagination.get_paginated_response([results[match] for match in page if match in results])
@@ -1,21 +1,90 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from rest_framework.exceptions import NotFound
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from functools import partial
 from ..serializers import PostSerializer
-from ..models import Post, User, Follow, Share, Inbox
-from ..utils import url_parser
-from .posts import PostsPagination
-from requests.auth import HTTPBasicAuth
-import requests, os
+from ..models import Post, User, Share, InboxItem, RemotePost
+from ..utils import url_parser, federation, friendship, visibility, post_projection, response_cache
+from ..utils.remote_posts import schedule_refresh
+from ..utils.merged_stream import MergedStream, StreamSource, decode_cursor
+from ..utils.fanout import fan_out
+from .posts import PostsPagination, PROJECTION_PARAMETER
+import time
+
+class StreamPagination(PostsPagination):
+    """
+    Pages a MergedStream either by page number (page, size) or from the next_cursor of the previous page (cursor, size)
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_stream(self, stream, request):
+        self.request = request
+        self.size = self.get_page_size(request)
+        self.page_number = None
+        offset, cursor = 0, request.query_params.get(self.cursor_query_param)
+
+        if cursor:
+            try:
+                cursor = decode_cursor(cursor)
+            except ValueError:
+                raise NotFound("Invalid cursor.")
+        else:
+            try:
+                self.page_number = int(request.query_params.get(self.page_query_param, 1))
+            except ValueError:
+                raise NotFound("Invalid page.")
+            if self.page_number < 1:
+                raise NotFound("Invalid page.")
+            offset = (self.page_number - 1) * self.size
+
+        items, self.next_cursor = stream.page(self.size, offset=offset, cursor=cursor)
+        if not items and self.page_number and self.page_number > 1:
+            raise NotFound("Invalid page.")
+
+        self.count = stream.count()
+        return items
+
+    def get_paginated_response(self, data):
+        return Response({
+            "type": "posts",
+            "page_number": self.page_number,
+            "size": self.size,
+            "count": self.count,
+            "next_cursor": self.next_cursor,
+            "src": data,
+        })
+
+def get_remote_json(url, auth=federation.NODE_AUTH):
+    """
+    GET a remote URL, returns (status code, JSON body or None if the body is not JSON)
+    """
+    response = federation.get(url, auth=auth, timeout=settings.FANOUT_REQUEST_TIMEOUT)
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, None
 
 class PublicStreamView(APIView):
-    pagination_provider = PostsPagination
+    pagination_provider = StreamPagination
 
     @extend_schema(
         summary="Retrieve Public Posts (and Deleted Posts if Admin)",
         description="Retrieve all public (and deleted) posts available on the node, sorted by the most recent creation date.",
+        parameters=[
+            OpenApiParameter(name="page", description="Page number", required=False, type=int),
+            OpenApiParameter(name="size", description="Number of posts per page", required=False, type=int),
+            OpenApiParameter(
+                name="cursor",
+                description="next_cursor of the previous page, continues the stream from there (page is ignored)",
+                required=False,
+                type=str
+            ),
+            PROJECTION_PARAMETER,
+        ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
                 response=PostSerializer(many=True),
@@ -23,89 +92,33 @@ class PublicStreamView(APIView):
             )
         },
     )
+    @response_cache.cached("public_stream", lambda: [response_cache.STREAM])
     def get(self, request):
         """Retrieve the public posts of the node and remote posts in the user's inbox."""
 
-        # Default visibility filter for public posts
-        visibility_filter = [1]
-
-        # If the user is authenticated, customize the visibility filter
-        if request.user and request.user.is_authenticated:
-            user = get_object_or_404(User, uuid=request.user.uuid)
-            if user.is_staff:
-                visibility_filter.append(4)  # Add deleted posts for admin
-
-        remote_posts = {}
-        processed_posts = {}  # A dictionary to track post_id and post_status
-        for inbox in Inbox.objects.all(): # Iterate through all local inboxes
-            for item in inbox.items.filter(remote_payload__isnull=False):
-                remote_payload = item.remote_payload
-                if remote_payload.get("type") == "post": # And get the remote posts
-                    post_id = remote_payload.get("id")
-                    visibility = remote_payload.get("visibility").upper()
-
-                    if (visibility == "DELETED"):
-                        # We don't want to see deleted remote posts
-                        if post_id in remote_posts:
-                            remote_posts.pop(post_id) # Remove deleted post
-                    
-                    if item.post_status != None and item.post_status in ["edited", "update-old"]:
-                            # don't handle old post
-                            continue
-
-                    if visibility == "PUBLIC" and (item.post_status == None or item.post_status.upper() != "DELETE"): # This logic only works for local, local-remote posts
-                        if post_id in processed_posts and processed_posts[post_id] == item.post_status:
-                            # Skip if the post has already been processed with the same status
-                            # This should work for remote-remote edited posts? Because we are fetching post from their endpoint directly (it will show latest content)
-                            continue
-                        
-                        if visibility == "UNLISTED" or visibility == "FRIENDS":
-                            continue
-
-                        author_host = remote_payload["author"]["host"]
-                        base_author_host = url_parser.get_base_host(author_host)
-                        post_uuid = url_parser.extract_uuid(post_id)
-                        author_fqid = remote_payload["author"]["id"]
-                        author_uuid = url_parser.extract_uuid(author_fqid)
-
-                        get_post_url = f"{base_author_host}/api/authors/{author_uuid}/posts/{post_uuid}"
-                        try:
-                            # Perform the GET request
-                            response = requests.get(
-                                get_post_url,
-                                auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
-                            )
-
-                            if response.status_code == 200:
-                                post_data = response.json()
-
-                                if post_id not in remote_posts: # Add if this post hasn't been added
-                                    remote_posts[post_id] = post_data
-                                elif item.post_status and item.post_status.upper() == "UPDATE":
-                                    # There's a newer version of this post
-                                    remote_posts[post_id] = post_data
-
-                            else: # Remote node doesn't give authorization
-                                print(f"Failed to fetch post. Status code: {response.status_code}")
-
-                            processed_posts[post_id] = item.post_status # Regardless of whether fail or success
-
-                        except Exception as e:
-                            print(f"Error fetching remote post {get_post_url}: {e}")
-
-        unique_remote_posts = list(remote_posts.values())
-
-        local_posts = Post.objects.filter(visibility__in=visibility_filter)
-
-        serialized_local_posts = PostSerializer(local_posts, many=True).data
-
-        all_posts = serialized_local_posts + unique_remote_posts
-
-        # Separate logic for Post objects and JSON objects
-        all_posts.sort(key=lambda post: post['published'] if isinstance(post, dict) else post['modified_at'], reverse=True)
-
-        pagination = PostsPagination()
-        paginated_posts = pagination.paginate_queryset(all_posts, request, view=self)
+        # Public posts, and deleted posts for admin
+        public_filter = visibility.in_public_stream(visibility.Viewer.of(request))
+
+        # Local public posts merged with the remote public posts cached from the inboxes, newest first
+        projection = post_projection.of(request)
+        public_posts = Post.objects.filter(public_filter).select_related("user")
+        local_posts = StreamSource(
+            post_projection.for_list(public_posts) if projection == post_projection.LIST else public_posts,
+            rank=1, published_field="modified_at", key_field="uuid",
+            serialize=lambda posts: PostSerializer(posts, many=True, context={"projection": projection}).data,
+        )
+        remote_posts = StreamSource(
+            RemotePost.objects.filter(
+                visibility="PUBLIC",
+                status__in=[RemotePost.STATUS_OK, RemotePost.STATUS_PENDING],
+            ),
+            rank=0, published_field="published", key_field="id",
+            serialize=lambda posts: [remote_post.body for remote_post in posts],
+        )
+        schedule_refresh() # remote posts are refreshed from their nodes in the background
+
+        pagination = self.pagination_provider()
+        paginated_posts = pagination.paginate_stream(MergedStream([local_posts, remote_posts]), request)
 
         return pagination.get_paginated_response(paginated_posts)
     
@@ -118,6 +131,7 @@ class AuthStreamView(APIView):
             "Retrieve unlisted and friends-only posts for the authenticated user "
             "and items from the user's inbox related to posts, sorted by publication date."
         ),
+        parameters=[PROJECTION_PARAMETER],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
                 description="Combined list of posts and inbox items.",
@@ -153,153 +167,109 @@ class AuthStreamView(APIView):
             author_uuid = request.user.uuid
             user = get_object_or_404(User, uuid=author_uuid)
 
-            # Query for friends-only and unlisted posts authored by this user
-            unlisted_and_friends_posts = Post.objects.filter(
-                visibility__in=[2, 3], 
-                user=user
-            )
+            # This user's friends-only and unlisted posts, the unlisted posts of their followees and the friends-only
+            # posts of their friends in one query, see utils/visibility.py
+            all_relevant_local_posts = Post.objects.filter(
+                visibility.in_stream(visibility.Viewer(user=user))
+            ).order_by("-created_at")
+            projection = post_projection.of(request)
+            if projection == post_projection.LIST:
+                all_relevant_local_posts = post_projection.for_list(all_relevant_local_posts)
 
-            # Retrieve the local followees (users the current user is following)
-            followee_uuids = Follow.objects.filter(local_follower=user).values_list('local_followee', flat=True)
+            # The local followees (users the current user is following), whose shares are in the stream
+            local_followees = friendship.followees_of(user)
 
-            # Get the actual User objects of the followees based on their UUIDs
-            local_followees = User.objects.filter(uuid__in=followee_uuids)
+            pagination = PostsPagination()
 
-            # Retrieve mutual followers (friends: both following each other)
-            friends = Follow.objects.filter(
-                local_followee=user,
-                local_follower__in=local_followees
-            ).values_list('local_follower_id', flat=True)
+            paginated_posts = pagination.paginate_queryset(all_relevant_local_posts, request, view=self)
 
-            # Query for local followees' unlisted posts
-            followees_unlisted_posts = Post.objects.filter(
-                user__in=local_followees,
-                visibility=3
-            )
+            serialized_local_posts = PostSerializer(paginated_posts, many=True, context={"projection": projection}).data
 
-            # Query for local friends' friends-only posts
-            friends_only_posts = Post.objects.filter(
-                user__in=friends,
-                visibility=2
-            )
+            # Handle remote posts from the user's inbox, one fetch per post: the latest update of a post wins
+            remote_items = {}
+            for item in InboxItem.objects.filter(inbox__user=user, remote_payload__isnull=False).order_by("time"):
+                remote_payload = item.remote_payload
+                if remote_payload.get("type") != "post":
+                    continue
 
-            all_relevant_local_posts = unlisted_and_friends_posts | followees_unlisted_posts | friends_only_posts
+                remote_visibility = remote_payload.get("visibility", "").upper()
+                if remote_visibility not in ["FRIENDS", "UNLISTED"]:
+                    continue
 
-            # Remove local duplicates and sort by creation date
-            all_relevant_local_posts = all_relevant_local_posts.order_by("-created_at").distinct()
-                  
-            pagination = PostsPagination()
+                if item.post_status != None and item.post_status in ["edited", "update-old"]:
+                    # don't handle old post
+                    continue
 
-            paginated_posts = pagination.paginate_queryset(all_relevant_local_posts, request, view=self)
+                post_id = remote_payload.get("id")
+                if post_id not in remote_items or (item.post_status and item.post_status.upper() == "UPDATE"):
+                    remote_items[post_id] = remote_payload
+
+            post_urls = {}
+            for post_id, remote_payload in remote_items.items():
+                base_host = url_parser.get_base_host(post_id)
+                author_serial = url_parser.extract_uuid(remote_payload.get("author").get("id"))
+                post_serial = url_parser.extract_uuid(post_id)
+                post_urls[post_id] = f"{base_host}/api/authors/{author_serial}/posts/{post_serial}"
+
+            """
+                In this stream, there is also a case where user also see posts shared by people they follow
+                All the posts shared are public post as well but it could either remote or local
+            """
+            # Query all shared posts where the user who shared it is in the followees list
+            shared_posts = Share.objects.filter(user__in=local_followees).select_related("user")
+            shared_urls = {shared.post for shared in shared_posts}
 
-            serialized_local_posts = PostSerializer(paginated_posts, many=True).data
+            # Fetch the remote posts and the shared posts from all nodes at once, within one deadline
+            deadline_at = time.monotonic() + settings.FANOUT_DEADLINE
+            tasks = {("post", post_id): (url, partial(get_remote_json, url)) for post_id, url in post_urls.items()}
+            tasks.update({("share", url): (url, partial(get_remote_json, url, auth=None)) for url in shared_urls})
+            responses = fan_out(tasks, deadline=settings.FANOUT_DEADLINE)
 
-            # Handle remote posts from the user's inbox
             remote_posts = {}
-            processed_posts = {}
-            user_inbox = Inbox.objects.filter(user=user)
-
-            for inbox in user_inbox:
-                for item in inbox.items.filter(remote_payload__isnull=False):
-                    remote_payload = item.remote_payload
-                    if remote_payload.get("type") == "post":
-                        visibility = remote_payload.get("visibility", "").upper()
-                        if visibility not in ["FRIENDS", "UNLISTED"]:
-                            continue
-                        
-                        if item.post_status != None and item.post_status in ["edited", "update-old"]:
-                            # don't handle old post
-                            continue
-
-                        post_id = remote_payload.get("id")
-                        if post_id in processed_posts and processed_posts[post_id] == item.post_status:
-                            # Skip already processed posts with the same status
-                            continue
-                        
-
-                        base_host = url_parser.get_base_host(remote_payload.get("id"))
-                        author_serial = url_parser.extract_uuid(remote_payload.get("author").get("id"))
-                        post_serial = url_parser.extract_uuid(remote_payload.get("id"))
-                        get_post_url = f"{base_host}/api/authors/{author_serial}/posts/{post_serial}"
-
-                        try:
-                            response = requests.get(
-                                get_post_url,
-                                auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
-                            )
-
-                            if response.status_code == 200:
-                                post_data = response.json()
-
-                                if post_id not in remote_posts: # Add if this post hasn't been added
-                                    remote_posts[post_id] = post_data
-                                elif item.post_status and item.post_status.upper() == "UPDATE":
-                                    # There's a newer version of this post
-                                    remote_posts[post_id] = post_data
-
-                            elif response.status_code == 500: # Whitesmoke post endpoint
-                                if visibility == "FRIENDS":
-                                    author_serial = url_parser.extract_uuid(remote_payload.get("author").get("id"))
-                                    post_serial = url_parser.extract_uuid(remote_payload.get("id"))
-
-                                    try:
-                                        # Fetch friends-only likes
-                                        response = requests.get(
-                                            f"{base_host}/api/authors/{author_serial}/posts/{post_serial}/likes",
-                                            auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
-                                        )
-
-                                        if response.status_code == 200:
-                                            remote_payload['likes'] = response.json()
-
-                                            # Fetch friends-only comments
-                                            response = requests.get(
-                                                f"{base_host}/api/authors/{author_serial}/posts/{post_serial}/comments",
-                                                auth=HTTPBasicAuth(os.getenv('NODE_USERNAME'), os.getenv('NODE_PASSWORD'))
-                                            )
-
-                                            if response.status_code == 200:
-                                                remote_payload['comments'] = response.json()
-
-                                        else:
-                                            print(f"Unable to fetch remote post with ID (Inside elif): {post_id}")
-
-                                    except Exception as e:
-                                        print(f"Error fetching likes and comments {post_id}: {e}")
-
-                                    print(f"This should contain latest likes and comments: {remote_payload}")
-                                    if post_id not in remote_posts: # Add if this post hasn't been added
-                                        remote_posts[post_id] = remote_payload
-                                    elif item.post_status and item.post_status.upper() == "UPDATE":
-                                        # There's a newer version of this post
-                                        remote_posts[post_id] = remote_payload
-
-                            else:
-                                print(f"Unable to fetch remote post with ID (Inside else): {post_id}")
-                
-                            processed_posts[post_id] = item.post_status
-
-                        except Exception as e:
-                            print(f"Error fetching post {post_id}: {e}")
+            fallback_tasks = {}
+            for post_id, remote_payload in remote_items.items():
+                if ("post", post_id) not in responses:
+                    print(f"Unable to fetch remote post with ID (failed or timed out): {post_id}")
+                    continue
+
+                status_code, post_data = responses[("post", post_id)]
+                if status_code == 200 and post_data is not None:
+                    remote_posts[post_id] = post_data
+                elif status_code == 500 and remote_payload.get("visibility", "").upper() == "FRIENDS":
+                    # Whitesmoke post endpoint, fetch friends-only likes and comments instead
+                    for kind in ["likes", "comments"]:
+                        url = f"{post_urls[post_id]}/{kind}"
+                        fallback_tasks[(post_id, kind)] = (url, partial(get_remote_json, url))
+                else:
+                    print(f"Unable to fetch remote post with ID (Inside else): {post_id}")
+
+            fallback_responses = fan_out(fallback_tasks, deadline=max(deadline_at - time.monotonic(), 0))
+            for post_id in dict.fromkeys(post_id for post_id, _ in fallback_tasks):
+                remote_payload = remote_items[post_id]
+                likes_status, likes = fallback_responses.get((post_id, "likes"), (None, None))
+                if likes_status == 200:
+                    remote_payload['likes'] = likes
+
+                    comments_status, comments = fallback_responses.get((post_id, "comments"), (None, None))
+                    if comments_status == 200:
+                        remote_payload['comments'] = comments
+                else:
+                    print(f"Unable to fetch remote post with ID (Inside elif): {post_id}")
+
+                remote_posts[post_id] = remote_payload
 
             combined_posts = serialized_local_posts.copy()
             
             for post_id, post_data in remote_posts.items():
                 combined_posts.append(post_data)
 
-            """
-                In this stream, there is also a case where user also see posts shared by people they follow
-                All the posts shared are public post as well but it could either remote or local
-            """
             # Dictionary to hold unique posts by their post ID or URL (or any unique identifier)
             distinct_shared_posts = {} # can remove distinct if we decided to not have notification for shared post (not required per specification) --> remove receiver in Share model
             
-            # Query all shared posts where the user who shared it is in the followees list
-            shared_posts = Share.objects.filter(user__in=local_followees)
             for shared in shared_posts:
-                response = requests.get(shared.post) # Post if FQID, we send a request to fetch the Post data
-                if response.status_code == 200:
-                    shared_data = response.json()
+                status_code, post_data = responses.get(("share", shared.post), (None, None))
+                if status_code == 200 and post_data is not None:
+                    shared_data = dict(post_data)
                     shared_data["type"] = "shared" # so we can differentiate in the frontend from normal posts
                     shared_data["shared_by"] = shared.user.display_name
                     unique_key = f"{shared_data.get('id')}_{shared.user.uuid}"
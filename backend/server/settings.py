@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
-import os, environ
+import os, environ, tempfile
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -21,6 +21,80 @@ environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 BASE_URL = env('BASE_URL', default='http://localhost:8000')
 INTERNAL_API_SECRET = os.getenv('INTERNAL_API_SECRET', '')
 
+# Remote post cache, see azureDSN/utils/remote_posts.py
+REMOTE_POST_BACKGROUND_REFRESH = env.bool('REMOTE_POST_BACKGROUND_REFRESH', default=True)
+REMOTE_POST_REFRESH_INTERVAL = env.int('REMOTE_POST_REFRESH_INTERVAL', default=300)  # seconds before a cached post is refetched
+REMOTE_POST_REFRESH_BATCH = env.int('REMOTE_POST_REFRESH_BATCH', default=50)  # posts refreshed per background run
+REMOTE_POST_FETCH_TIMEOUT = env.float('REMOTE_POST_FETCH_TIMEOUT', default=5.0)
+
+# Remote author profile cache, see azureDSN/utils/remote_authors.py
+REMOTE_AUTHOR_BACKGROUND_REFRESH = env.bool('REMOTE_AUTHOR_BACKGROUND_REFRESH', default=True)
+REMOTE_AUTHOR_TTL = env.int('REMOTE_AUTHOR_TTL', default=600)  # seconds before a cached profile is refetched
+REMOTE_AUTHOR_RETRY_AFTER = env.int('REMOTE_AUTHOR_RETRY_AFTER', default=60)  # seconds before a failed fetch is retried
+REMOTE_AUTHOR_REFRESH_BATCH = env.int('REMOTE_AUTHOR_REFRESH_BATCH', default=100)  # profiles refreshed per background run
+REMOTE_AUTHOR_FETCH_TIMEOUT = env.float('REMOTE_AUTHOR_FETCH_TIMEOUT', default=3.0)  # seconds for a single profile
+REMOTE_AUTHOR_FETCH_DEADLINE = env.float('REMOTE_AUTHOR_FETCH_DEADLINE', default=4.0)  # seconds a list waits for unknown profiles
+
+# Federated author directory, see azureDSN/utils/author_directory.py
+AUTHOR_DIRECTORY_BACKGROUND_SYNC = env.bool('AUTHOR_DIRECTORY_BACKGROUND_SYNC', default=True)
+AUTHOR_DIRECTORY_SYNC_INTERVAL = env.int('AUTHOR_DIRECTORY_SYNC_INTERVAL', default=900)  # seconds before a node is synced again
+AUTHOR_DIRECTORY_PAGE_SIZE = env.int('AUTHOR_DIRECTORY_PAGE_SIZE', default=50)  # authors asked per page of a node
+AUTHOR_DIRECTORY_MAX_PAGES = env.int('AUTHOR_DIRECTORY_MAX_PAGES', default=100)  # pages read per node and sync
+AUTHOR_DIRECTORY_FETCH_TIMEOUT = env.float('AUTHOR_DIRECTORY_FETCH_TIMEOUT', default=5.0)
+
+# HTTP client for calls to other nodes, see azureDSN/utils/federation.py
+FEDERATION_POOL_SIZE = env.int('FEDERATION_POOL_SIZE', default=10)  # kept-alive connections per node
+FEDERATION_TIMEOUT = env.float('FEDERATION_TIMEOUT', default=10.0)  # default seconds for a call to another node
+FEDERATION_RETRIES = env.int('FEDERATION_RETRIES', default=2)  # retries of idempotent calls on connection errors and 502/503/504
+FEDERATION_RETRY_BACKOFF = env.float('FEDERATION_RETRY_BACKOFF', default=0.3)
+
+# Reachability of the other nodes, see azureDSN/utils/node_health.py
+NODE_HEALTH_TTL = env.int('NODE_HEALTH_TTL', default=60)  # seconds before a node is probed again
+NODE_HEALTH_PROBE_TIMEOUT = env.float('NODE_HEALTH_PROBE_TIMEOUT', default=5.0)
+
+# Cached follows and friendships, see azureDSN/utils/friendship.py
+FRIENDSHIP_CACHE_TTL = env.int('FRIENDSHIP_CACHE_TTL', default=60)  # seconds before another worker sees a follow change
+
+# Full-text search, see azureDSN/utils/search.py
+SEARCH_MAX_RESULTS = env.int('SEARCH_MAX_RESULTS', default=500)  # matches ranked per query, pages are cut from these
+
+# Resized variants of images, see azureDSN/utils/thumbnails.py
+IMAGE_VARIANT_WIDTHS = env.list('IMAGE_VARIANT_WIDTHS', cast=int, default=[64, 320, 1080])  # ?w= is rounded up to one of these
+IMAGE_AVATAR_WIDTH = env.int('IMAGE_AVATAR_WIDTH', default=320)  # width of the profile pictures linked in author objects
+IMAGE_VARIANT_QUALITY = env.int('IMAGE_VARIANT_QUALITY', default=80)
+
+# Disk cache of the images of remote image posts, see azureDSN/utils/remote_images.py
+REMOTE_IMAGE_CACHE_DIR = env.str('REMOTE_IMAGE_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'azureDSN-remote-images'))
+REMOTE_IMAGE_CACHE_MAX_BYTES = env.int('REMOTE_IMAGE_CACHE_MAX_BYTES', default=256 * 1024 * 1024)  # least recently used entries go beyond this
+REMOTE_IMAGE_CACHE_TTL = env.int('REMOTE_IMAGE_CACHE_TTL', default=300)  # seconds an entry is served before asking the node again
+REMOTE_IMAGE_FETCH_TIMEOUT = env.float('REMOTE_IMAGE_FETCH_TIMEOUT', default=5.0)
+
+# Responses of the public endpoints, see azureDSN/utils/response_cache.py
+CACHES = {'default': env.cache_url('CACHE_URL', default='locmemcache://')}  # a shared cache (redis://...) for several workers
+RESPONSE_CACHE_ENABLED = env.bool('RESPONSE_CACHE_ENABLED', default=True)
+RESPONSE_CACHE_TTL = env.int('RESPONSE_CACHE_TTL', default=60)  # seconds, also bounds what no signal invalidates
+
+# Posts listed with ?projection=list, see azureDSN/utils/post_projection.py
+POST_LIST_PREVIEW_LENGTH = env.int('POST_LIST_PREVIEW_LENGTH', default=500)  # characters of text content sent per post
+
+# Concurrent remote calls, see azureDSN/utils/fanout.py
+FANOUT_MAX_WORKERS = env.int('FANOUT_MAX_WORKERS', default=16)
+FANOUT_PER_HOST_LIMIT = env.int('FANOUT_PER_HOST_LIMIT', default=4)  # calls running at once against the same node
+FANOUT_REQUEST_TIMEOUT = env.float('FANOUT_REQUEST_TIMEOUT', default=5.0)  # seconds for a single remote call
+FANOUT_DEADLINE = env.float('FANOUT_DEADLINE', default=8.0)  # seconds for a whole batch, late results are dropped
+
+# Queue of activities sent to remote inboxes, see azureDSN/utils/outbox.py
+OUTBOX_BACKGROUND_DELIVERY = env.bool('OUTBOX_BACKGROUND_DELIVERY', default=True)  # send right after the request without a worker
+OUTBOX_MAX_WORKERS = env.int('OUTBOX_MAX_WORKERS', default=8)
+OUTBOX_PER_HOST_LIMIT = env.int('OUTBOX_PER_HOST_LIMIT', default=4)  # deliveries sent at once to the same node
+OUTBOX_BATCH = env.int('OUTBOX_BATCH', default=100)  # deliveries claimed per run
+OUTBOX_DELIVERY_TIMEOUT = env.float('OUTBOX_DELIVERY_TIMEOUT', default=10.0)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=8)  # attempts before a delivery is dead
+OUTBOX_RETRY_BASE = env.int('OUTBOX_RETRY_BASE', default=30)  # seconds before the first retry, doubled after every attempt
+OUTBOX_RETRY_MAX = env.int('OUTBOX_RETRY_MAX', default=3600)
+OUTBOX_LEASE = env.int('OUTBOX_LEASE', default=300)  # seconds a worker holds a delivery before another one can take it
+OUTBOX_POLL_INTERVAL = env.float('OUTBOX_POLL_INTERVAL', default=5.0)  # seconds between two runs of deliver_outbox --loop
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
@@ -7,8 +7,6 @@ import { useState } from "react";
 import { PostData } from "../../models/models";
 import { api } from "../../service/config";
 import { extractUUID } from "../../util/formatting/extractUUID";
-import follow from "../../service/follow";
-import inbox from "../../service/inbox";
 import EditPostModal from "../EditPostModal/EditPostModal";
 import DeletePostModal from "../DeletePostModal/DeletePostModal";
 import { normalizeVisibility } from "../../util/formatting/normalizeVisibility";
@@ -129,29 +127,7 @@ export default function EllipseMenu({
         updatedPost
       ); // Model will auto convert integer to string
 
-      const followers = await follow.getFollowers(extractUUID(authorUUID));
-      const friends = await follow.getFriends(extractUUID(authorUUID));
-      const target =
-        normalizeVisibility(postData.visibility) === 1 ||
-        normalizeVisibility(postData.visibility) === 3
-          ? followers
-          : friends;
-      for (const recipient of target) {
-        const post_obj = {
-          ...postData,
-          ...(postData.type ? {} : { type: "post" }),
-          title: updatedPost.title,
-          content: updatedPost.content,
-          visibility: updatedPost.visibility,
-          follower: {
-            type: "author",
-            id: recipient.id,
-            host: recipient.host,
-          },
-        };
-        
-        await inbox.updateInboxPost(recipient.id, post_obj);
-      }
+      // The server sends the edited post to the inboxes of followers and friends
 
       // Update local postData state
       setPostData({
@@ -175,25 +151,7 @@ export default function EllipseMenu({
         `/api/authors/${extractUUID(authorUUID)}/posts/${postId}/`
       );
 
-      const followers = await follow.getFollowers(extractUUID(authorUUID));
-      const friends = await follow.getFriends(extractUUID(authorUUID));
-      const target =
-        normalizeVisibility(postData.visibility) === 1 ||
-        normalizeVisibility(postData.visibility) === 3
-          ? followers
-          : friends;
-      for (const recipient of target) {
-        const deletedPost = {
-          ...postData,
-          ...(postData.type ? {} : { type: "post" }),
-          follower: {
-            type: "author",
-            id: recipient.id,
-            host: recipient.host,
-          },
-        };
-        await inbox.deleteInboxPost(recipient.id, deletedPost);
-      }
+      // The server tells the followers and friends who received the post that it is deleted
 
       // Update postData state to indicate deletion
       setPostData({ ...postData, visibility: "DELETED" });
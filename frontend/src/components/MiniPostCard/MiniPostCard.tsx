@@ -9,9 +9,7 @@ import { PostData } from "../../models/models";
 import ReactMarkdown from 'react-markdown';
 import { api } from "../../service/config";
 import { extractUUID } from "../../util/formatting/extractUUID";
-import follow from "../../service/follow";
 import { formatCount } from "../../util/formatting/formatCount";
-import inbox from "../../service/inbox";
 import { normalizeVisibility } from "../../util/formatting/normalizeVisibility";
 import profileService from "../../service/profile";
 import remarkGfm from 'remark-gfm';
@@ -73,25 +71,7 @@ function MiniPostCard({ post, authorUUID, onDelete }: MiniPostCardProps) {
       const postId = extractUUID(postData.id);
       await api.put(`/api/authors/${extractUUID(authorUUID)}/posts/${postId}/`, updatedPost);
 
-      const followers = await follow.getFollowers(extractUUID(authorUUID));
-      const friends = await follow.getFriends(extractUUID(authorUUID));
-      const target = normalizeVisibility(updatedPost.visibility) === 1 || normalizeVisibility(updatedPost.visibility) === 3 ? followers : friends;
-      for (const recipient of target) {
-        const post_obj = {
-          ...postData,
-          ...(postData.type ? {} : { type: "post" }),
-          title: updatedPost.title,
-          content: updatedPost.content,
-          visibility: normalizeVisibility(updatedPost.visibility, true) as string,
-          follower: {
-            type: "author",
-            id: recipient.id,
-            host: recipient.host,
-          }
-        };
-
-        await inbox.updateInboxPost(recipient.id, post_obj);
-      }
+      // The server sends the edited post to the inboxes of followers and friends
 
       // Update local postData state
       setPostData({
@@ -112,21 +92,7 @@ function MiniPostCard({ post, authorUUID, onDelete }: MiniPostCardProps) {
       const postId = extractUUID(postData.id);
       await api.delete(`/api/authors/${extractUUID(authorUUID)}/posts/${postId}/`);
 
-      const followers = await follow.getFollowers(extractUUID(authorUUID));
-      const friends = await follow.getFriends(extractUUID(authorUUID));
-      const target = normalizeVisibility(postData.visibility) === 1 || normalizeVisibility(postData.visibility) === 3 ? followers : friends;
-      for (const recipient of target) {
-        const deletedPost = {
-          ...postData,
-          ...(postData.type ? {} : { type: "post" }),
-          follower: {
-            type: "author",
-            id: recipient.id,
-            host: recipient.host,
-          }
-        };
-        await inbox.deleteInboxPost(recipient.id, deletedPost);
-      }
+      // The server tells the followers and friends who received the post that it is deleted
 
       // Update postData state to indicate deletion
       setPostData({ ...postData, visibility: "DELETED" });
@@ -9,10 +9,6 @@ import PeopleIcon from '@mui/icons-material/People';
 import { PostData as Post } from "../../models/models";
 import PublicIcon from '@mui/icons-material/Public';
 import { api } from "../../service/config";
-import follow from "../../service/follow";
-import inbox from "../../service/inbox";
-import { normalizeURL } from "../../util/formatting/normalizeURL";
-import { normalizeVisibility } from "../../util/formatting/normalizeVisibility";
 import styled from "@mui/material/styles/styled";
 import styles from "./PostBar.module.scss";
 import { useAuth } from "../../state";
@@ -187,57 +183,12 @@ const PostBar: React.FC<PostBarProps> = ({ fetchPosts, author }) => {
         visibility: visibilityNumber,
       };
 
-      const postResponse = await api.post<Post>(
+      await api.post<Post>(
         `/api/authors/${authProvider.user.uuid}/posts/`,
         newPost
       );
 
-      // Get friends and followers list, followers include both friends and followers
-      const followers = await follow.getFollowers(authProvider.user.uuid);
-      const friends = await follow.getFriends(authProvider.user.uuid);
-
-      // Send to followers if post is public or unlisted
-      if (normalizeVisibility(visibilityNumber) === 1 || normalizeVisibility(visibilityNumber) === 3) {
-        for (const follower of followers) {
-          if (normalizeURL(follower.host) === normalizeURL(process.env.REACT_APP_API_BASE_URL)) {
-            await inbox.sendPostToInbox(follower.id, postResponse.data);
-          } else {
-            const enrichedPost = { // to handle remote followers
-              ...postResponse.data,
-              follower: {
-                type: "author",
-                id: follower.id,
-                host: follower.host,
-                displayName: follower.displayName,
-                page: follower.page,
-                github: follower.github,
-                profileImage: follower.profileImage
-              }
-            };
-            await inbox.sendPostToInbox(follower.id, enrichedPost);
-          }
-        }
-      } else {
-        for (const friend of friends) {
-          if (normalizeURL(friend.host) === normalizeURL(process.env.REACT_APP_API_BASE_URL)) {
-            await inbox.sendPostToInbox(friend.id, postResponse.data);
-          } else {
-            const enrichedPost = { // to handle remote followers
-              ...postResponse.data,
-              follower: {
-                type: "author",
-                id: friend.id,
-                host: friend.host,
-                displayName: friend.displayName,
-                page: friend.page,
-                github: friend.github,
-                profileImage: friend.profileImage
-              }
-            };
-            await inbox.sendPostToInbox(friend.id, enrichedPost);
-          }
-        }
-      }
+      // The server sends the new post to the inboxes of followers and friends
       // re-fetch stream
       fetchPosts();
       
@@ -98,14 +98,17 @@ class FollowService{
       //follower is the logged in user, user is the user profile we're viewing
       const userResponse = await api.get<Author>(`/api/authors/${follower.uuid}/`);
       const encodedUrl = encodeURIComponent(userResponse.data.id);
+      let query = '';
 
       if (userId.includes('/')) {
+         // The backend finds the follow of a remote author by its full ID, the path only has room for its serial
+         query = `?followee=${encodeURIComponent(userId)}`;
          // Split the URL by '/' and take the last part as the ID
          userId = userId.replace(/\/+$/, '').split('/').pop() || userId;
      }
  
       try {
-         await api.delete(`/api/authors/${userId}/followers/${encodedUrl}/`);
+         await api.delete(`/api/authors/${userId}/followers/${encodedUrl}/${query}`);
       } catch (error) {
          console.error('Fetch error:', error);
       }